@@ -0,0 +1,31 @@
+"""add activity feed indexes
+
+Revision ID: 7c2d9e41a6b3
+Revises: 4bb2e9540b5d
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c2d9e41a6b3"
+down_revision: Union[str, None] = "4bb2e9540b5d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_user_stories_project_created", "user_stories", ["project_id", "created_date"])
+    op.create_index("ix_user_stories_project_modified", "user_stories", ["project_id", "modified_date"])
+    op.create_index("ix_tasks_project_created", "tasks", ["project_id", "created_date"])
+    op.create_index("ix_tasks_project_modified", "tasks", ["project_id", "modified_date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_project_modified", table_name="tasks")
+    op.drop_index("ix_tasks_project_created", table_name="tasks")
+    op.drop_index("ix_user_stories_project_modified", table_name="user_stories")
+    op.drop_index("ix_user_stories_project_created", table_name="user_stories")
@@ -0,0 +1,43 @@
+"""add story proposals table
+
+Revision ID: a7d3e5f1b2c8
+Revises: f6a4c8d2b9e1
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7d3e5f1b2c8"
+down_revision: Union[str, None] = "f6a4c8d2b9e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "story_proposals",
+        sa.Column("user_story_id", sa.Integer(), nullable=False),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("modules_version", sa.String(length=32), nullable=False),
+        sa.Column("proposed_module", sa.String(length=100), nullable=False),
+        sa.Column("confidence", sa.Float(), nullable=False),
+        sa.Column("proposed_tags", sa.JSON(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_story_id"], ["user_stories.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"]),
+        sa.PrimaryKeyConstraint("user_story_id"),
+    )
+    op.create_index(
+        op.f("ix_story_proposals_project_id"), "story_proposals", ["project_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_story_proposals_project_id"), table_name="story_proposals")
+    op.drop_table("story_proposals")
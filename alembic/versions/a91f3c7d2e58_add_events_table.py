@@ -0,0 +1,46 @@
+"""add events table
+
+Revision ID: a91f3c7d2e58
+Revises: 7c2d9e41a6b3
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a91f3c7d2e58"
+down_revision: Union[str, None] = "7c2d9e41a6b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("entity_type", sa.String(length=20), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("entity_taiga_id", sa.Integer(), nullable=False),
+        sa.Column("entity_ref", sa.Integer(), nullable=True),
+        sa.Column("subject", sa.String(length=500), nullable=False),
+        sa.Column("event_type", sa.String(length=30), nullable=False),
+        sa.Column("changes", sa.JSON(), nullable=True),
+        sa.Column("from_status", sa.String(length=255), nullable=True),
+        sa.Column("to_status", sa.String(length=255), nullable=True),
+        sa.Column("actor", sa.String(length=255), nullable=True),
+        sa.Column("occurred_at", sa.DateTime(), nullable=False),
+        sa.Column("recorded_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_events_project_occurred", "events", ["project_id", "occurred_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_events_project_occurred", table_name="events")
+    op.drop_table("events")
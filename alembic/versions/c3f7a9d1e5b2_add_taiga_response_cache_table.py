@@ -0,0 +1,51 @@
+"""add taiga response cache table
+
+Revision ID: c3f7a9d1e5b2
+Revises: b8e4f2a6c1d9
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3f7a9d1e5b2"
+down_revision: Union[str, None] = "b8e4f2a6c1d9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "taiga_response_cache",
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.Column("path", sa.String(length=255), nullable=False),
+        sa.Column("status_code", sa.Integer(), nullable=False),
+        sa.Column("headers", sa.JSON(), nullable=False),
+        sa.Column("body", sa.LargeBinary(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index(
+        op.f("ix_taiga_response_cache_created_at"),
+        "taiga_response_cache",
+        ["created_at"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_taiga_response_cache_expires_at"),
+        "taiga_response_cache",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_taiga_response_cache_expires_at"), table_name="taiga_response_cache")
+    op.drop_index(op.f("ix_taiga_response_cache_created_at"), table_name="taiga_response_cache")
+    op.drop_table("taiga_response_cache")
@@ -0,0 +1,107 @@
+"""add status history table
+
+Also seeds the history of the user stories and tasks already stored, the same
+way sync opens it for a new entity: the initial status at created_date and, for
+closed items, the closing transition at their finish date. Without it, items
+synced before the upgrade would only get history from their next status change.
+
+Revision ID: d5e8b2c4f1a7
+Revises: a91f3c7d2e58
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d5e8b2c4f1a7"
+down_revision: Union[str, None] = "a91f3c7d2e58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "status_history",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("entity_type", sa.String(length=20), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("from_status", sa.String(length=255), nullable=True),
+        sa.Column("to_status", sa.String(length=255), nullable=True),
+        sa.Column("from_closed", sa.Boolean(), nullable=True),
+        sa.Column("to_closed", sa.Boolean(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_status_history_entity", "status_history", ["entity_type", "entity_id", "changed_at"]
+    )
+    op.create_index("ix_status_history_project", "status_history", ["project_id", "entity_type"])
+
+    history = sa.table(
+        "status_history",
+        sa.column("project_id", sa.Integer()),
+        sa.column("entity_type", sa.String()),
+        sa.column("entity_id", sa.Integer()),
+        sa.column("from_closed", sa.Boolean()),
+        sa.column("to_status", sa.String()),
+        sa.column("to_closed", sa.Boolean()),
+        sa.column("changed_at", sa.DateTime()),
+    )
+    inspector = sa.inspect(op.get_bind())
+    for entity_type, table_name, finished_col in (
+        ("user_story", "user_stories", "finish_date"),
+        ("task", "tasks", "finished_date"),
+    ):
+        entity = sa.table(
+            table_name,
+            sa.column("id", sa.Integer()),
+            sa.column("project_id", sa.Integer()),
+            sa.column("status_name", sa.String()),
+            sa.column("is_closed", sa.Boolean()),
+            sa.column("created_date", sa.DateTime()),
+            sa.column("modified_date", sa.DateTime()),
+        )
+        # The finish date column only exists in databases created from the models
+        closed_at = entity.c.modified_date
+        if finished_col in {col["name"] for col in inspector.get_columns(table_name)}:
+            closed_at = sa.func.coalesce(sa.column(finished_col, sa.DateTime()), closed_at)
+        columns = ["project_id", "entity_type", "entity_id", "to_status", "to_closed", "changed_at"]
+        op.execute(
+            history.insert().from_select(
+                columns,
+                sa.select(
+                    entity.c.project_id,
+                    sa.literal(entity_type),
+                    entity.c.id,
+                    sa.case((entity.c.is_closed.is_(True), None), else_=entity.c.status_name),
+                    sa.false(),
+                    entity.c.created_date,
+                ),
+            )
+        )
+        op.execute(
+            history.insert().from_select(
+                columns + ["from_closed"],
+                sa.select(
+                    entity.c.project_id,
+                    sa.literal(entity_type),
+                    entity.c.id,
+                    entity.c.status_name,
+                    sa.true(),
+                    closed_at,
+                    sa.false(),
+                ).where(entity.c.is_closed.is_(True)),
+            )
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_status_history_project", table_name="status_history")
+    op.drop_index("ix_status_history_entity", table_name="status_history")
+    op.drop_table("status_history")
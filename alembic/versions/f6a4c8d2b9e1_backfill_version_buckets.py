@@ -0,0 +1,43 @@
+"""backfill version buckets
+
+One-off data migration: clamps the stored user story / task versions to the
+MVP (1) / Post-MVP (2) buckets. New rows are normalized at upsert time, so
+GET /table-map no longer has to rewrite them on every view.
+
+Revision ID: f6a4c8d2b9e1
+Revises: e3b7f9a1c6d4
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f6a4c8d2b9e1"
+down_revision: Union[str, None] = "e3b7f9a1c6d4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table_name in ("user_stories", "tasks"):
+        table = sa.table(table_name, sa.column("version", sa.Integer()))
+        op.execute(
+            table.update()
+            .where(sa.or_(table.c.version.is_(None), table.c.version.notin_([1, 2])))
+            .values(
+                version=sa.case(
+                    (table.c.version.is_(None), 1),
+                    (table.c.version <= 1, 1),
+                    else_=2,
+                )
+            )
+        )
+
+
+def downgrade() -> None:
+    # The original Taiga version numbers are not recoverable; nothing to undo.
+    pass
@@ -1 +1,6 @@
 """Taiga FastAPI application package."""
+
+import time
+
+# Inicio de la importación de la app, para medir el arranque en frío (ver app.main)
+IMPORT_STARTED = time.perf_counter()
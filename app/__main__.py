@@ -1,15 +1,33 @@
 """CLI helpers for launching the FastAPI app."""
 
+import logging
 import os
 
 import uvicorn
 
+logger = logging.getLogger(__name__)
+
 
 def main() -> None:
-    """Run the FastAPI development server with reload enabled."""
+    """
+    Run the FastAPI server.
+
+    UVICORN_WORKERS > 1 starts several worker processes (reload is then
+    disabled, uvicorn does not support both). Workers only share the Taiga
+    token with SESSION_BACKEND=database.
+    """
     host = os.getenv("UVICORN_HOST", "0.0.0.0")
     port = int(os.getenv("UVICORN_PORT", "8000"))
-    uvicorn.run("app.main:app", host=host, port=port, reload=True)
+    workers = max(int(os.getenv("UVICORN_WORKERS", "1")), 1)
+    reload = workers == 1 and os.getenv("UVICORN_RELOAD", "true").lower() == "true"
+
+    if workers > 1 and os.getenv("SESSION_BACKEND", "memory").strip().lower() == "memory":
+        logger.warning(
+            "UVICORN_WORKERS=%s con SESSION_BACKEND=memory: cada worker tendrá su propio token",
+            workers,
+        )
+
+    uvicorn.run("app.main:app", host=host, port=port, reload=reload, workers=workers)
 
 
 if __name__ == "__main__":
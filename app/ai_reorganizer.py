@@ -5,9 +5,38 @@ Analyzes current epics, user stories and tasks, and proposes reorganization
 based on DAI architecture (modules D3-D8).
 """
 
-from typing import Dict, List, Optional
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+from functools import lru_cache
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 from dataclasses import asdict, dataclass
 
+if TYPE_CHECKING:
+    from app.tfidf_scorer import TfidfModuleScorer
+
+# numpy/scipy are only imported when the TF-IDF engine is actually used
+TFIDF_AVAILABLE = all(importlib.util.find_spec(name) for name in ("numpy", "scipy"))
+
+logger = logging.getLogger(__name__)
+
+# Scoring engine: "keywords" (substring hits) or "tfidf" (needs numpy/scipy)
+AI_REORGANIZER_ENGINE = os.getenv("AI_REORGANIZER_ENGINE", "keywords").strip().lower()
+ENGINES = ("keywords", "tfidf")
+
 # DAI Architecture Epic Definitions (granular epics from architecture docs)
 MODULE_DEFINITIONS = {
     "D3-authenticar": {
@@ -85,6 +114,216 @@ MODULE_DEFINITIONS = {
 }
 
 
+# Words looked up by _generate_tags (substring semantics, like the module keywords)
+PRIORITY_HIGH_WORDS = ("p0", "crítico", "bloqueante")
+PRIORITY_MEDIUM_WORDS = ("p1",)
+PRIORITY_LOW_WORDS = ("p2", "nice")
+MVP_WORDS = ("mvp", "kickoff", "minimo")
+TESTING_WORDS = ("testing", "test", "e2e")
+INTEGRATION_WORDS = ("integ", "integración")
+FRONTEND_WORDS = ("frontend", "ui", "pantalla", "component")
+BACKEND_WORDS = ("backend", "endpoint", "api")
+MODULE_TAG_WORDS = (
+    "delegac", "rol", "permiso", "auth", "login", "dashboard", "notif", "oficial",
+    "operaci", "ncm", "catálogo", "catalogo", "lpco", "sobre",
+)
+TAG_WORDS = (
+    PRIORITY_HIGH_WORDS + PRIORITY_MEDIUM_WORDS + PRIORITY_LOW_WORDS + MVP_WORDS
+    + TESTING_WORDS + INTEGRATION_WORDS + FRONTEND_WORDS + BACKEND_WORDS + MODULE_TAG_WORDS
+)
+
+
+def _has_space(value: str) -> bool:
+    return any(char.isspace() for char in value)
+
+
+class KeywordMatcher:
+    """
+    Finds which of a fixed set of keywords occur as substrings of a text.
+
+    A keyword without whitespace can only occur inside a single
+    whitespace-delimited token, so the text is split once and each distinct
+    token is resolved to the keywords it contains through a memo shared across
+    calls (story texts reuse a small vocabulary). The few keywords that contain
+    whitespace are checked directly on the text. The result is exactly the set
+    of keywords for which `keyword in text` holds.
+
+    A single combined lookahead regex (overlapping matches are required) was
+    measured slower than the plain per-keyword scan under CPython's `re`, even
+    trie-factored; see scripts/bench_ai_reorganizer.py for the per-story cost.
+    """
+
+    def __init__(self, keywords: Iterable[str], max_cached_tokens: int = 100_000) -> None:
+        unique = tuple(dict.fromkeys(keywords))
+        self.keywords: Tuple[str, ...] = unique
+        self._token_keywords = tuple(kw for kw in unique if kw and not _has_space(kw))
+        self._phrase_keywords = tuple(kw for kw in unique if not kw or _has_space(kw))
+        self._max_cached_tokens = max_cached_tokens
+        self._token_hits: Dict[str, FrozenSet[str]] = {}
+
+    def _hits_for(self, token: str) -> FrozenSet[str]:
+        if len(self._token_hits) >= self._max_cached_tokens:
+            self._token_hits.clear()
+        hits = frozenset(kw for kw in self._token_keywords if kw in token)
+        self._token_hits[token] = hits
+        return hits
+
+    def find(self, text: str) -> FrozenSet[str]:
+        """Return the keywords contained in `text` (which must already be lowercased)."""
+        if not text:
+            return frozenset()
+        found: Set[str] = set()
+        cached = self._token_hits.get
+        for token in set(text.split()):
+            hits = cached(token)
+            if hits is None:
+                hits = self._hits_for(token)
+            if hits:
+                found.update(hits)
+        for keyword in self._phrase_keywords:
+            if keyword in text:
+                found.add(keyword)
+        return frozenset(found)
+
+
+class ModuleMatcher:
+    """Scores every module of a module set against a text in a single pass."""
+
+    def __init__(self, modules: Dict[str, Dict]) -> None:
+        self.module_keys: Tuple[str, ...] = tuple(modules)
+        # keyword -> [(module index, weight)]; repeated keywords keep their multiplicity
+        self._keyword_hits: Dict[str, List[Tuple[int, int]]] = {}
+        # lowercased module key -> module indexes boosted when it appears in the text
+        self._name_hits: Dict[str, List[int]] = {}
+        self._keyword_counts: List[int] = []
+
+        for index, (module_key, module) in enumerate(modules.items()):
+            keywords = module["keywords"]
+            self._keyword_counts.append(len(keywords))
+            for keyword in keywords:
+                hits = self._keyword_hits.setdefault(keyword, [])
+                if hits and hits[-1][0] == index:
+                    hits[-1] = (index, hits[-1][1] + 1)
+                else:
+                    hits.append((index, 1))
+            self._name_hits.setdefault(module_key.lower(), []).append(index)
+
+        self._matcher = KeywordMatcher(list(self._keyword_hits) + list(self._name_hits))
+
+    def scores(self, text: str) -> List[float]:
+        """Keyword score of each module (same order as `module_keys`)."""
+        matches = [0] * len(self.module_keys)
+        boosts = [0.0] * len(self.module_keys)
+        if text:
+            for term in self._matcher.find(text.lower()):
+                for index, weight in self._keyword_hits.get(term, ()):
+                    matches[index] += weight
+                for index in self._name_hits.get(term, ()):
+                    boosts[index] = 0.3
+
+        return [
+            min((matches[i] / count if count else 0.0) + boosts[i], 1.0)
+            for i, count in enumerate(self._keyword_counts)
+        ]
+
+    def best(self, text: str) -> Tuple[str, float]:
+        """Best scoring module; ties resolve to the first module, like max() over a dict."""
+        scores = self.scores(text)
+        best_index = max(range(len(scores)), key=scores.__getitem__)
+        return self.module_keys[best_index], scores[best_index]
+
+
+def _modules_fingerprint(modules: Dict[str, Dict]) -> Tuple:
+    return tuple((key, tuple(module["keywords"])) for key, module in modules.items())
+
+
+@lru_cache(maxsize=8)
+def _module_matcher(fingerprint: Tuple) -> ModuleMatcher:
+    return ModuleMatcher({key: {"keywords": list(keywords)} for key, keywords in fingerprint})
+
+
+def get_module_matcher(modules: Dict[str, Dict]) -> ModuleMatcher:
+    """Matcher for a module set, compiled once per distinct set of keys/keywords."""
+    return _module_matcher(_modules_fingerprint(modules))
+
+
+@lru_cache(maxsize=8)
+def _tfidf_scorer(fingerprint: Tuple, documents: Tuple) -> "TfidfModuleScorer":
+    from app.tfidf_scorer import TfidfModuleScorer
+
+    return TfidfModuleScorer(
+        {
+            key: {"keywords": list(keywords), "name": name, "description": description}
+            for (key, keywords), (name, description) in zip(fingerprint, documents)
+        }
+    )
+
+
+def get_tfidf_scorer(modules: Dict[str, Dict]) -> "TfidfModuleScorer":
+    """TF-IDF scorer for a module set, fitted once per distinct set of module texts."""
+    documents = tuple(
+        (module.get("name", ""), module.get("description", "")) for module in modules.values()
+    )
+    return _tfidf_scorer(_modules_fingerprint(modules), documents)
+
+
+def resolve_engine(engine: Optional[str] = None) -> str:
+    """Validate the requested engine, falling back to keywords when TF-IDF is unavailable."""
+    engine = (engine or AI_REORGANIZER_ENGINE).strip().lower()
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown AIReorganizer engine '{engine}' (expected one of {ENGINES})")
+    if engine == "tfidf" and not TFIDF_AVAILABLE:
+        logger.warning("AI_REORGANIZER_ENGINE=tfidf requires numpy and scipy; using keywords")
+        return "keywords"
+    return engine
+
+
+TAG_MATCHER = KeywordMatcher(TAG_WORDS)
+
+# Confidence above which a story already in a matching epic is still proposed.
+# The scales differ: keyword scores are the share of a module's keywords found
+# (plus a name boost), TF-IDF scores are cosine similarities and run lower. The
+# TF-IDF value was calibrated on stories built from the module keywords so that
+# both engines flag about the same share of them (~20%).
+CONFIDENCE_THRESHOLDS = {"keywords": 0.5, "tfidf": 0.45}
+
+# Management epics whose stories are never reorganized (matched as substrings)
+MANAGEMENT_EPICS = (
+    "requerimientos vuce",
+    "gestión técnica y operativa interna",
+    "gestion tecnica y operativa interna",
+)
+
+
+def is_management_epic(subject: Optional[str]) -> bool:
+    """Whether an epic subject names a management epic (excluded from analysis)."""
+    subject = (subject or "").lower()
+    return any(management_epic in subject for management_epic in MANAGEMENT_EPICS)
+
+
+# Bump when the rules in _generate_tags change so cached proposals are recomputed
+TAG_RULES_REVISION = 1
+
+# Cached inference for a story: (content hash, module key, confidence, tags)
+CachedInference = Tuple[str, str, float, List[str]]
+
+
+def modules_version(modules: Dict[str, Dict], engine: str = "keywords") -> str:
+    """Short hash identifying a module set, engine and tag rules, used to key cached proposals."""
+    fingerprint = [_modules_fingerprint(modules), TAG_WORDS, TAG_RULES_REVISION]
+    if engine != "keywords":
+        # The TF-IDF engine also reads module names and descriptions
+        fingerprint += [engine, [[m.get("name"), m.get("description")] for m in modules.values()]]
+    payload = json.dumps(fingerprint, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def story_content_hash(subject: Optional[str], description: Optional[str]) -> str:
+    """Hash of the text the inference depends on (subject and description)."""
+    payload = f"{subject or ''}\x00{description or ''}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
 @dataclass
 class ProposedChange:
     """Represents a proposed change to a user story or task."""
@@ -105,156 +344,189 @@ class ProposedChange:
 class AIReorganizer:
     """AI-powered reorganizer for Taiga projects."""
 
-    def __init__(self):
+    def __init__(self, engine: Optional[str] = None):
         self.modules = MODULE_DEFINITIONS
+        self.engine = resolve_engine(engine)
+        self.modules_version = modules_version(self.modules, self.engine)
+        self.confidence_threshold = CONFIDENCE_THRESHOLDS[self.engine]
+        self._matcher = get_module_matcher(self.modules)
+        self._tfidf = get_tfidf_scorer(self.modules) if self.engine == "tfidf" else None
+        # TF-IDF weights come from the whole batch, so any change re-scores every story
+        self.batch_dependent = self._tfidf is not None
 
     def _calculate_module_score(self, text: str, module_key: str) -> float:
         """Calculate how well a text matches a module based on keywords."""
         if not text:
             return 0.0
-
-        text_lower = text.lower()
-        module = self.modules[module_key]
-        keywords = module["keywords"]
-
-        # Count keyword matches
-        matches = sum(1 for keyword in keywords if keyword in text_lower)
-
-        # Normalize by number of keywords
-        score = matches / len(keywords) if keywords else 0.0
-
-        # Boost score if module name appears in text
-        if module_key.lower() in text_lower:
-            score += 0.3
-
-        return min(score, 1.0)
+        index = self._matcher.module_keys.index(module_key)
+        return self._matcher.scores(text)[index]
 
     def _infer_module(self, subject: str, description: Optional[str] = None) -> tuple[str, float]:
         """Infer the best module for a user story or task."""
-        combined_text = subject
-        if description:
-            combined_text += " " + description
-
-        scores = {}
-        for module_key in self.modules:
-            scores[module_key] = self._calculate_module_score(combined_text, module_key)
+        return self._infer_modules([(subject, description)])[0]
+
+    def _infer_modules(
+        self, items: Sequence[Tuple[str, Optional[str]]]
+    ) -> List[Tuple[str, float]]:
+        """Infer the best module for a batch of (subject, description) pairs."""
+        texts = [
+            subject + (" " + description if description else "") for subject, description in items
+        ]
 
-        # Get best match
-        best_module = max(scores, key=scores.get)
-        confidence = scores[best_module]
+        # Single pass over each text scores every module at once
+        if self._tfidf is None:
+            return [self._matcher.best(text) for text in texts]
 
-        return best_module, confidence
+        # One sparse product scores the whole batch; texts sharing no n-gram
+        # with any module keep the keyword score
+        return [
+            result if result[1] > 0 else self._matcher.best(text)
+            for result, text in zip(self._tfidf.best_many(texts), texts)
+        ]
 
     def _generate_tags(self, subject: str, module_key: str) -> List[str]:
         """Generate suggested tags based on subject and module."""
         tags = []
-        subject_lower = subject.lower()
+        found = TAG_MATCHER.find(subject.lower())
+
+        def has_any(words: Tuple[str, ...]) -> bool:
+            return any(word in found for word in words)
 
         # Priority tags
-        if any(word in subject_lower for word in ["p0", "crítico", "bloqueante"]):
+        if has_any(PRIORITY_HIGH_WORDS):
             tags.append("prioridad:alta")
-        elif any(word in subject_lower for word in ["p1"]):
+        elif has_any(PRIORITY_MEDIUM_WORDS):
             tags.append("prioridad:media")
-        elif any(word in subject_lower for word in ["p2", "nice"]):
+        elif has_any(PRIORITY_LOW_WORDS):
             tags.append("prioridad:baja")
 
         # Status tags
-        if any(word in subject_lower for word in ["mvp", "kickoff", "minimo"]):
+        if has_any(MVP_WORDS):
             tags.append("mvp")
 
-        if any(word in subject_lower for word in ["testing", "test", "e2e"]):
+        if has_any(TESTING_WORDS):
             tags.append("testing")
 
-        if any(word in subject_lower for word in ["integ", "integración"]):
+        if has_any(INTEGRATION_WORDS):
             tags.append("integración")
 
         # Module-specific tags
         if module_key.startswith("D3"):
-            if "delegac" in subject_lower:
+            if "delegac" in found:
                 tags.append("delegaciones")
-            if "rol" in subject_lower or "permiso" in subject_lower:
+            if "rol" in found or "permiso" in found:
                 tags.append("rbac")
-            if "auth" in subject_lower or "login" in subject_lower:
+            if "auth" in found or "login" in found:
                 tags.append("autenticación")
         elif module_key.startswith("D4"):
-            if "dashboard" in subject_lower:
+            if "dashboard" in found:
                 tags.append("dashboard")
-            if "notif" in subject_lower:
+            if "notif" in found:
                 tags.append("notificaciones")
-            if "oficial" in subject_lower:
+            if "oficial" in found:
                 tags.append("oficialización")
-            if "operaci" in subject_lower:
+            if "operaci" in found:
                 tags.append("operaciones")
         elif module_key.startswith("D5"):
-            if "ncm" in subject_lower:
+            if "ncm" in found:
                 tags.append("ncm")
-            if "catálogo" in subject_lower or "catalogo" in subject_lower:
+            if "catálogo" in found or "catalogo" in found:
                 tags.append("catálogo")
         elif module_key.startswith("D7"):
-            if "lpco" in subject_lower:
+            if "lpco" in found:
                 tags.append("lpco")
         elif module_key.startswith("D8"):
-            if "sobre" in subject_lower:
+            if "sobre" in found:
                 tags.append("sobre-digital")
 
         # Tech stack tags
-        if any(word in subject_lower for word in ["frontend", "ui", "pantalla", "component"]):
+        if has_any(FRONTEND_WORDS):
             tags.append("frontend")
-        if any(word in subject_lower for word in ["backend", "endpoint", "api"]):
+        if has_any(BACKEND_WORDS):
             tags.append("backend")
 
         return tags
 
-    def analyze_project(self, epics: List, orphan_user_stories: List) -> Dict:
+    def infer_story(
+        self, subject: str, description: Optional[str] = None
+    ) -> Tuple[str, float, List[str]]:
+        """Module, confidence and suggested tags for a story's text."""
+        return self.infer_stories([(subject, description)])[0]
+
+    def infer_stories(
+        self, items: Sequence[Tuple[str, Optional[str]]]
+    ) -> List[Tuple[str, float, List[str]]]:
+        """Module, confidence and suggested tags for a batch of (subject, description) pairs."""
+        return [
+            (module_key, confidence, self._generate_tags(subject, module_key))
+            for (subject, _), (module_key, confidence) in zip(items, self._infer_modules(items))
+        ]
+
+    def analyze_project(
+        self,
+        epics: List,
+        orphan_user_stories: List,
+        cached_inferences: Optional[Dict[int, CachedInference]] = None,
+    ) -> Dict:
         """
         Analyze current project structure and generate reorganization proposals.
 
         Args:
             epics: List of Epic ORM objects with user_stories and tasks
             orphan_user_stories: List of UserStory ORM objects without epic
+            cached_inferences: Stored inferences by story id (computed with this
+                module set); only stories whose content hash changed are re-scored
 
         Returns:
             Dict with analysis and proposals
         """
         proposals = []
-        statistics = {
+        statistics: Dict[str, Any] = {
             "total_items": 0,
             "items_needing_change": 0,
             "modules_proposed": {},
-            "confidence_avg": 0.0
+            "confidence_avg": 0.0,
+            "cache": {"hits": 0, "misses": 0},
         }
-
-        # Épicas de gestión que no se deben reorganizar
-        MANAGEMENT_EPICS = [
-            "requerimientos vuce",
-            "gestión técnica y operativa interna",
-            "gestion tecnica y operativa interna"
-        ]
+        cached_inferences = cached_inferences or {}
+
+        analyzed_epics = [epic for epic in epics if not is_management_epic(epic.subject)]
+
+        # Reuse cached inferences and score every remaining story in one batch
+        stories = [us for epic in analyzed_epics for us in epic.user_stories]
+        stories += list(orphan_user_stories)
+        inferences: Dict[int, Tuple[str, float, List[str]]] = {}
+        pending = []
+        for us in stories:
+            cached = cached_inferences.get(us.id)
+            if cached is not None and cached[0] == story_content_hash(us.subject, us.description):
+                inferences[id(us)] = (cached[1], cached[2], list(cached[3]))
+            else:
+                pending.append(us)
+        if pending and self.batch_dependent:
+            pending = stories
+        statistics["cache"]["hits"] = len(stories) - len(pending)
+        statistics["cache"]["misses"] = len(pending)
+        batch = self.infer_stories([(us.subject, us.description) for us in pending])
+        inferences.update(zip(map(id, pending), batch))
+
+        def infer(us: Any) -> Tuple[str, float, List[str]]:
+            return inferences[id(us)]
 
         # Analyze user stories in epics
-        for epic in epics:
-            # Skip management epics
-            epic_name_lower = epic.subject.lower() if epic.subject else ""
-            if any(mgmt_epic in epic_name_lower for mgmt_epic in MANAGEMENT_EPICS):
-                continue
+        for epic in analyzed_epics:
             for us in epic.user_stories:
                 statistics["total_items"] += 1
 
-                # Infer best module for this US
-                proposed_module, confidence = self._infer_module(
-                    us.subject,
-                    us.description
-                )
-
-                # Generate tags
-                proposed_tags = self._generate_tags(us.subject, proposed_module)
+                # Infer best module and tags for this US (cached when unchanged)
+                proposed_module, confidence, proposed_tags = infer(us)
 
                 # Check if change is needed
                 epic_matches_module = (
                     proposed_module in epic.subject if epic.subject else False
                 )
 
-                if not epic_matches_module or confidence > 0.5:
+                if not epic_matches_module or confidence > self.confidence_threshold:
                     statistics["items_needing_change"] += 1
                     statistics["modules_proposed"][proposed_module] = \
                         statistics["modules_proposed"].get(proposed_module, 0) + 1
@@ -279,8 +551,7 @@ class AIReorganizer:
             statistics["total_items"] += 1
             statistics["items_needing_change"] += 1
 
-            proposed_module, confidence = self._infer_module(us.subject, us.description)
-            proposed_tags = self._generate_tags(us.subject, proposed_module)
+            proposed_module, confidence, proposed_tags = infer(us)
 
             statistics["modules_proposed"][proposed_module] = \
                 statistics["modules_proposed"].get(proposed_module, 0) + 1
@@ -1,28 +1,184 @@
 """
 Authentication and session management.
 
-This module provides in-memory session storage for Taiga auth tokens
-and middleware for request validation.
+This module provides session storage for Taiga auth tokens and middleware
+for request validation. The token lives in a pluggable backend:
+
+- SESSION_BACKEND=memory (default): process-local dict, for a single worker
+  and for tests.
+- SESSION_BACKEND=database: the `auth_sessions` table, so a token set
+  through any uvicorn worker (`--workers N` behind a load balancer) is seen
+  by all of them.
+
+The database backend stores the Taiga bearer token in plaintext: anyone who
+can read `auth_sessions` (or a backup of the database) can act as that Taiga
+user until the token expires. Restrict access to the database accordingly,
+or keep the memory backend when a single worker is enough.
 """
 
+import abc
+import os
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from fastapi import HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
+SESSION_BACKENDS = ("memory", "database")
 
-class SessionStore:
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory").strip().lower()
+# Seconds a worker reuses the session it read from the backend before reading it again
+SESSION_CACHE_SECONDS = float(os.getenv("SESSION_CACHE_SECONDS", "5"))
+
+if SESSION_BACKEND not in SESSION_BACKENDS:
+    raise RuntimeError(
+        f"SESSION_BACKEND debe ser uno de {SESSION_BACKENDS}, no '{SESSION_BACKEND}'"
+    )
+
+# Key of the (single) session holding the Taiga token
+CURRENT_SESSION = "current"
+
+# {"token": str, "expires_at": datetime, "created_at": datetime}
+SessionRecord = Dict[str, Any]
+
+
+class SessionBackend(abc.ABC):
+    """Storage for session records, keyed by session name."""
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[SessionRecord]:
+        """Return the record stored under `key`, or None."""
+
+    @abc.abstractmethod
+    async def set(self, key: str, record: SessionRecord) -> None:
+        """Store (or replace) the record under `key`."""
+
+    @abc.abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove the record under `key`, if any."""
+
+    @abc.abstractmethod
+    async def clear(self) -> None:
+        """Remove every record."""
+
+
+class MemorySessionBackend(SessionBackend):
+    """Process-local backend. Does not persist across restarts or workers."""
+
+    def __init__(self) -> None:
+        self._sessions: Dict[str, SessionRecord] = {}
+
+    async def get(self, key: str) -> Optional[SessionRecord]:
+        return self._sessions.get(key)
+
+    async def set(self, key: str, record: SessionRecord) -> None:
+        self._sessions[key] = dict(record)
+
+    async def delete(self, key: str) -> None:
+        self._sessions.pop(key, None)
+
+    async def clear(self) -> None:
+        self._sessions.clear()
+
+
+class DatabaseSessionBackend(SessionBackend):
     """
-    In-memory session store for auth tokens.
+    Backend on the `auth_sessions` table, shared by every worker.
 
-    Stores tokens with expiration time. Does not persist across server restarts.
+    Uses the primary (write) session factory: a replica could lag behind a
+    token that was just set. The token is stored as is (plaintext), see the
+    module docstring.
     """
 
-    def __init__(self) -> None:
-        self._sessions: Dict[str, Dict[str, any]] = {}
+    def __init__(self, session_factory: Optional[async_sessionmaker] = None) -> None:
+        self._session_factory = session_factory
+
+    def _factory(self) -> async_sessionmaker:
+        if self._session_factory is None:
+            from app.database import AsyncSessionLocal
+
+            self._session_factory = AsyncSessionLocal
+        return self._session_factory
+
+    async def get(self, key: str) -> Optional[SessionRecord]:
+        from app.models import AuthSession
+
+        async with self._factory()() as db:
+            row = await db.scalar(select(AuthSession).where(AuthSession.key == key))
+            if row is None:
+                return None
+            return {"token": row.token, "expires_at": row.expires_at, "created_at": row.created_at}
+
+    async def set(self, key: str, record: SessionRecord) -> None:
+        from app.models import AuthSession
+
+        async with self._factory()() as db:
+            await db.merge(
+                AuthSession(
+                    key=key,
+                    token=record["token"],
+                    created_at=record["created_at"],
+                    expires_at=record["expires_at"],
+                )
+            )
+            await db.commit()
+
+    async def delete(self, key: str) -> None:
+        from app.models import AuthSession
+
+        async with self._factory()() as db:
+            await db.execute(delete(AuthSession).where(AuthSession.key == key))
+            await db.commit()
+
+    async def clear(self) -> None:
+        from app.models import AuthSession
 
-    def set_token(self, token: str, ttl_seconds: int = 82800) -> None:
+        async with self._factory()() as db:
+            await db.execute(delete(AuthSession))
+            await db.commit()
+
+
+def build_session_backend(name: str = SESSION_BACKEND) -> SessionBackend:
+    """Backend configured by SESSION_BACKEND."""
+    if name == "database":
+        return DatabaseSessionBackend()
+    return MemorySessionBackend()
+
+
+class SessionStore:
+    """
+    Session store for auth tokens.
+
+    Stores tokens with expiration time in a SessionBackend. Reads are
+    cached for `cache_seconds`, so a token set or cleared in another worker
+    is picked up after at most that long.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[SessionBackend] = None,
+        cache_seconds: float = SESSION_CACHE_SECONDS,
+    ) -> None:
+        self.backend = backend or MemorySessionBackend()
+        self.cache_seconds = cache_seconds
+        # (monotonic time of the read, record)
+        self._cached: Optional[Tuple[float, Optional[SessionRecord]]] = None
+
+    async def _load(self) -> Optional[SessionRecord]:
+        now = time.monotonic()
+        if self._cached is not None and now - self._cached[0] < self.cache_seconds:
+            return self._cached[1]
+        record = await self.backend.get(CURRENT_SESSION)
+        self._cached = (now, record)
+        return record
+
+    def _remember(self, record: Optional[SessionRecord]) -> None:
+        self._cached = (time.monotonic(), record)
+
+    async def set_token(self, token: str, ttl_seconds: int = 82800) -> None:
         """
         Store a token with expiration time.
 
@@ -30,49 +186,53 @@ class SessionStore:
             token: The Taiga auth token
             ttl_seconds: Time to live in seconds (default: ~23 hours)
         """
-        expires_at = datetime.utcnow() + timedelta(seconds=ttl_seconds)
-        self._sessions["current"] = {
+        created_at = datetime.utcnow()
+        record = {
             "token": token,
-            "expires_at": expires_at,
-            "created_at": datetime.utcnow(),
+            "expires_at": created_at + timedelta(seconds=ttl_seconds),
+            "created_at": created_at,
         }
+        await self.backend.set(CURRENT_SESSION, record)
+        self._remember(record)
 
-    def get_token(self) -> Optional[str]:
+    async def get_token(self) -> Optional[str]:
         """
         Get the current valid token.
 
         Returns:
             The token if valid and not expired, None otherwise
         """
-        session = self._sessions.get("current")
+        session = await self._load()
         if not session:
             return None
 
         # Check if expired
         if datetime.utcnow() > session["expires_at"]:
             # Clean up expired token
-            del self._sessions["current"]
+            await self.backend.delete(CURRENT_SESSION)
+            self._remember(None)
             return None
 
-        return session["token"]
+        token: str = session["token"]
+        return token
 
-    def has_valid_token(self) -> bool:
+    async def has_valid_token(self) -> bool:
         """
         Check if there's a valid token in the session.
 
         Returns:
             True if valid token exists, False otherwise
         """
-        return self.get_token() is not None
+        return await self.get_token() is not None
 
-    def get_token_info(self) -> Optional[Dict[str, any]]:
+    async def get_token_info(self) -> Optional[Dict[str, Any]]:
         """
         Get token metadata.
 
         Returns:
             Dict with token info (without the actual token value) or None
         """
-        session = self._sessions.get("current")
+        session = await self._load()
         if not session:
             return None
 
@@ -88,13 +248,14 @@ class SessionStore:
             "time_remaining_seconds": time_remaining,
         }
 
-    def clear(self) -> None:
+    async def clear(self) -> None:
         """Clear all sessions."""
-        self._sessions.clear()
+        await self.backend.clear()
+        self._remember(None)
 
 
 # Global session store instance
-session_store = SessionStore()
+session_store = SessionStore(build_session_backend())
 
 
 # Security scheme for bearer token
@@ -121,7 +282,7 @@ async def require_auth(
     Raises:
         HTTPException: If no valid token in session
     """
-    token = session_store.get_token()
+    token = await session_store.get_token()
 
     if not token:
         raise HTTPException(
@@ -140,11 +301,11 @@ async def require_auth(
     return token
 
 
-def get_optional_auth() -> Optional[str]:
+async def get_optional_auth() -> Optional[str]:
     """
     Get auth token if available, but don't raise exception if missing.
 
     Returns:
         The token if available, None otherwise
     """
-    return session_store.get_token()
+    return await session_store.get_token()
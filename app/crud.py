@@ -5,14 +5,51 @@ This module provides Create, Read, Update, Delete operations
 for all database models.
 """
 
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.models import DraftBoard, Epic, Project, Tag, Task, TaskTag, UserStory, UserStoryTag
+from app.models import (
+    ActivityEvent,
+    DraftBoard,
+    Epic,
+    Project,
+    StatusTransition,
+    StoryProposal,
+    Tag,
+    Task,
+    TaskTag,
+    UserStory,
+    UserStoryTag,
+)
+from app.telemetry import observe_crud
+
+if TYPE_CHECKING:
+    from app.ai_reorganizer import AIReorganizer
+
+# Fields compared against the stored row to build the activity event diff
+USERSTORY_TRACKED_FIELDS = (
+    "subject",
+    "description",
+    "status_name",
+    "is_closed",
+    "milestone_name",
+    "total_points",
+    "epic_id",
+)
+TASK_TRACKED_FIELDS = (
+    "subject",
+    "description",
+    "status_name",
+    "is_closed",
+    "assigned_to_username",
+    "user_story_id",
+)
+# Long text fields are summarized by length instead of storing both values
+SUMMARIZED_FIELDS = {"description"}
 
 
 def parse_datetime(value: any) -> datetime:
@@ -36,6 +73,153 @@ def parse_datetime(value: any) -> datetime:
         return datetime.utcnow()
 
 
+def normalize_version(value: Any) -> int:
+    """Clamp a Taiga version number to the MVP (1) / Post-MVP (2) buckets."""
+    if value is None or value <= 1:
+        return 1
+    return 2
+
+
+def _snapshot(entity: Any, fields: Sequence[str]) -> Dict[str, Any]:
+    """Capture the current value of the tracked fields of an entity."""
+    return {field: getattr(entity, field) for field in fields}
+
+
+def _diff_snapshot(before: Dict[str, Any], entity: Any) -> Dict[str, Dict[str, Any]]:
+    """Field-level diff summary between a snapshot and the entity's current values."""
+    changes: Dict[str, Dict[str, Any]] = {}
+    for field, old in before.items():
+        new = getattr(entity, field)
+        if old == new:
+            continue
+        if field in SUMMARIZED_FIELDS:
+            changes[field] = {"old_length": len(old or ""), "new_length": len(new or "")}
+        else:
+            changes[field] = {"old": old, "new": new}
+    return changes
+
+
+def _actor(payload: dict, key: str) -> Optional[str]:
+    return (payload.get(key) or {}).get("full_name_display")
+
+
+def _record_initial_status(db: AsyncSession, entity_type: str, entity: Any) -> None:
+    """Open the status history of an entity seen for the first time.
+
+    Items first seen already closed get an unknown initial status at creation
+    plus the closing transition at their finish date, so lead time stays measurable.
+    """
+    db.add(
+        StatusTransition(
+            project_id=entity.project_id,
+            entity_type=entity_type,
+            entity_id=entity.id,
+            to_status=None if entity.is_closed else entity.status_name,
+            to_closed=False,
+            changed_at=entity.created_date,
+        )
+    )
+    if entity.is_closed:
+        finished = getattr(entity, "finish_date", None) or getattr(entity, "finished_date", None)
+        db.add(
+            StatusTransition(
+                project_id=entity.project_id,
+                entity_type=entity_type,
+                entity_id=entity.id,
+                to_status=entity.status_name,
+                from_closed=False,
+                to_closed=True,
+                changed_at=finished or entity.modified_date,
+            )
+        )
+
+
+def _record_created_events(
+    db: AsyncSession, entity_type: str, entity: Any, payload: dict
+) -> None:
+    """Append the events for an entity seen for the first time."""
+    _record_initial_status(db, entity_type, entity)
+    db.add(
+        ActivityEvent(
+            project_id=entity.project_id,
+            entity_type=entity_type,
+            entity_id=entity.id,
+            entity_taiga_id=entity.taiga_id,
+            entity_ref=entity.ref,
+            subject=entity.subject,
+            event_type="created",
+            to_status=entity.status_name,
+            actor=_actor(payload, "owner_extra_info"),
+            occurred_at=entity.created_date,
+            recorded_at=datetime.utcnow(),
+        )
+    )
+    if entity.modified_date != entity.created_date:
+        db.add(
+            ActivityEvent(
+                project_id=entity.project_id,
+                entity_type=entity_type,
+                entity_id=entity.id,
+                entity_taiga_id=entity.taiga_id,
+                entity_ref=entity.ref,
+                subject=entity.subject,
+                event_type="updated",
+                changes={},
+                to_status=entity.status_name,
+                actor=_actor(payload, "modified_by_extra_info"),
+                occurred_at=entity.modified_date,
+                recorded_at=datetime.utcnow(),
+            )
+        )
+
+
+def _record_update_event(
+    db: AsyncSession,
+    entity_type: str,
+    entity: Any,
+    payload: dict,
+    before: Dict[str, Any],
+    previous_modified: datetime,
+) -> None:
+    """Append an event if the incoming payload changed the stored row."""
+    changes = _diff_snapshot(before, entity)
+    if not changes and entity.modified_date == previous_modified:
+        return
+
+    status_changed = "status_name" in changes or "is_closed" in changes
+    if status_changed:
+        db.add(
+            StatusTransition(
+                project_id=entity.project_id,
+                entity_type=entity_type,
+                entity_id=entity.id,
+                from_status=before.get("status_name"),
+                to_status=entity.status_name,
+                from_closed=before.get("is_closed"),
+                to_closed=bool(entity.is_closed),
+                changed_at=entity.modified_date,
+            )
+        )
+
+    db.add(
+        ActivityEvent(
+            project_id=entity.project_id,
+            entity_type=entity_type,
+            entity_id=entity.id,
+            entity_taiga_id=entity.taiga_id,
+            entity_ref=entity.ref,
+            subject=entity.subject,
+            event_type="status_changed" if status_changed else "updated",
+            changes=changes,
+            from_status=before.get("status_name"),
+            to_status=entity.status_name,
+            actor=_actor(payload, "modified_by_extra_info"),
+            occurred_at=entity.modified_date,
+            recorded_at=datetime.utcnow(),
+        )
+    )
+
+
 # ============================================================================
 # PROJECT CRUD
 # ============================================================================
@@ -53,6 +237,7 @@ async def get_project_by_slug(db: AsyncSession, slug: str) -> Optional[Project]:
     return result.scalar_one_or_none()
 
 
+@observe_crud
 async def create_or_update_project(db: AsyncSession, project_data: dict) -> Project:
     """Create or update a project."""
     existing = await get_project_by_taiga_id(db, project_data["id"])
@@ -93,6 +278,17 @@ async def create_or_update_project(db: AsyncSession, project_data: dict) -> Proj
 # ============================================================================
 
 
+@observe_crud
+async def bump_project_data_version(db: AsyncSession, project_id: int) -> None:
+    """Invalidate cached renders of a project by moving its data version forward."""
+    await db.execute(
+        update(Project)
+        .where(Project.id == project_id)
+        .values(data_version=Project.data_version + 1)
+    )
+    await db.commit()
+
+
 async def get_epic_by_taiga_id(db: AsyncSession, taiga_id: int) -> Optional[Epic]:
     """Get epic by Taiga ID."""
     result = await db.execute(select(Epic).where(Epic.taiga_id == taiga_id))
@@ -110,6 +306,7 @@ async def list_epics(
     return list(result.scalars().all())
 
 
+@observe_crud
 async def create_or_update_epic(
     db: AsyncSession, epic_data: dict, project_id: int
 ) -> Epic:
@@ -180,6 +377,7 @@ async def list_userstories(
     return list(result.scalars().all())
 
 
+@observe_crud
 async def create_or_update_userstory(
     db: AsyncSession,
     us_data: dict,
@@ -191,18 +389,21 @@ async def create_or_update_userstory(
 
     if existing:
         # Update existing user story
+        before = _snapshot(existing, USERSTORY_TRACKED_FIELDS)
+        previous_modified = existing.modified_date
         existing.epic_id = epic_id
         existing.subject = us_data["subject"]
         existing.description = us_data.get("description")
         existing.status_name = us_data.get("status_extra_info", {}).get("name")
         existing.is_closed = us_data.get("is_closed", False)
-        existing.version = us_data.get("version", 1)
+        existing.version = normalize_version(us_data.get("version"))
         existing.milestone_name = us_data.get("milestone_name")
         existing.modified_date = parse_datetime(us_data.get("modified_date", datetime.utcnow()))
         existing.finish_date = parse_datetime(us_data.get("finish_date")) if us_data.get("finish_date") else None
         existing.total_points = float(us_data.get("total_points")) if us_data.get("total_points") is not None else None
         existing.raw_data = us_data
         existing.last_synced = datetime.utcnow()
+        _record_update_event(db, "user_story", existing, us_data, before, previous_modified)
         await db.commit()
         await db.refresh(existing)
         return existing
@@ -217,7 +418,7 @@ async def create_or_update_userstory(
             description=us_data.get("description"),
             status_name=us_data.get("status_extra_info", {}).get("name"),
             is_closed=us_data.get("is_closed", False),
-            version=us_data.get("version", 1),
+            version=normalize_version(us_data.get("version")),
             milestone_name=us_data.get("milestone_name"),
             created_date=parse_datetime(us_data.get("created_date", datetime.utcnow())),
             modified_date=parse_datetime(us_data.get("modified_date", datetime.utcnow())),
@@ -227,6 +428,8 @@ async def create_or_update_userstory(
             last_synced=datetime.utcnow(),
         )
         db.add(us)
+        await db.flush()
+        _record_created_events(db, "user_story", us, us_data)
         await db.commit()
         await db.refresh(us)
         return us
@@ -262,6 +465,7 @@ async def list_tasks(
     return list(result.scalars().all())
 
 
+@observe_crud
 async def create_or_update_task(
     db: AsyncSession,
     task_data: dict,
@@ -273,18 +477,21 @@ async def create_or_update_task(
 
     if existing:
         # Update existing task
+        before = _snapshot(existing, TASK_TRACKED_FIELDS)
+        previous_modified = existing.modified_date
         existing.user_story_id = userstory_id
         existing.subject = task_data["subject"]
         existing.description = task_data.get("description")
         existing.status_name = task_data.get("status_extra_info", {}).get("name")
         existing.is_closed = task_data.get("is_closed", False)
-        existing.version = task_data.get("version", 1)
+        existing.version = normalize_version(task_data.get("version"))
         existing.assigned_to_username = task_data.get("assigned_to_extra_info", {}).get("username")
         existing.ref = task_data.get("ref")
         existing.modified_date = parse_datetime(task_data.get("modified_date", datetime.utcnow()))
         existing.finished_date = parse_datetime(task_data.get("finished_date")) if task_data.get("finished_date") else None
         existing.raw_data = task_data
         existing.last_synced = datetime.utcnow()
+        _record_update_event(db, "task", existing, task_data, before, previous_modified)
         await db.commit()
         await db.refresh(existing)
         return existing
@@ -299,7 +506,7 @@ async def create_or_update_task(
             description=task_data.get("description"),
             status_name=task_data.get("status_extra_info", {}).get("name"),
             is_closed=task_data.get("is_closed", False),
-            version=task_data.get("version", 1),
+            version=normalize_version(task_data.get("version")),
             assigned_to_username=task_data.get("assigned_to_extra_info", {}).get("username"),
             created_date=parse_datetime(task_data.get("created_date", datetime.utcnow())),
             modified_date=parse_datetime(task_data.get("modified_date", datetime.utcnow())),
@@ -308,6 +515,8 @@ async def create_or_update_task(
             last_synced=datetime.utcnow(),
         )
         db.add(task)
+        await db.flush()
+        _record_created_events(db, "task", task, task_data)
         await db.commit()
         await db.refresh(task)
         return task
@@ -347,6 +556,7 @@ async def get_or_create_tag(db: AsyncSession, project_id: int, tag_name: str, ta
         return tag
 
 
+@observe_crud
 async def sync_userstory_tags(
     db: AsyncSession, userstory: UserStory, tag_names: List[str]
 ) -> None:
@@ -372,6 +582,7 @@ async def sync_userstory_tags(
     await db.commit()
 
 
+@observe_crud
 async def sync_task_tags(db: AsyncSession, task: Task, tag_names: List[str]) -> None:
     """Sync tags for a task."""
     # Remove existing tags
@@ -417,6 +628,116 @@ async def save_draft_board_state(db: AsyncSession, project_id: int, state: dict)
         board = DraftBoard(project_id=project_id, state=state, updated_at=datetime.utcnow())
         db.add(board)
 
-    await db.commit()
+    # The draft state is embedded in the rendered table map
+    await bump_project_data_version(db, project_id)
     await db.refresh(board)
     return board
+
+
+# ============================================================================
+# ACTIVITY EVENT CRUD
+# ============================================================================
+
+
+@observe_crud
+async def prune_events(db: AsyncSession, retention_days: int) -> int:
+    """Delete activity events older than the retention window. Returns rows deleted."""
+    if retention_days <= 0:
+        return 0
+
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    result = await db.execute(delete(ActivityEvent).where(ActivityEvent.occurred_at < cutoff))
+    await db.commit()
+    return result.rowcount or 0
+
+
+# ============================================================================
+# STORY PROPOSAL CRUD
+# ============================================================================
+
+
+async def get_story_proposals(
+    db: AsyncSession, project_id: int, modules_version: str
+) -> Dict[int, tuple]:
+    """
+    Return cached AIReorganizer inferences for a project, keyed by user story id.
+
+    Values are (content_hash, proposed_module, confidence, proposed_tags); rows
+    computed with another module set are ignored.
+    """
+    result = await db.execute(
+        select(
+            StoryProposal.user_story_id,
+            StoryProposal.content_hash,
+            StoryProposal.proposed_module,
+            StoryProposal.confidence,
+            StoryProposal.proposed_tags,
+        ).where(
+            StoryProposal.project_id == project_id,
+            StoryProposal.modules_version == modules_version,
+        )
+    )
+    return {row[0]: tuple(row[1:]) for row in result.all()}
+
+
+@observe_crud
+async def refresh_story_proposals(
+    db: AsyncSession, project_id: int, reorganizer: "AIReorganizer"
+) -> int:
+    """
+    Recompute cached inferences for stories whose content or module set changed.
+
+    Scores the same stories as AIReorganizer.analyze_project (stories in
+    management epics are left out), so batch-dependent engines see the same
+    corpus here and in the render path. Engines whose scores depend on the whole
+    batch (TF-IDF) re-score every story of the project as soon as one changed.
+    Returns the number of stories re-scored.
+    """
+    from app.ai_reorganizer import is_management_epic, story_content_hash
+
+    stories = await db.execute(
+        select(UserStory.id, UserStory.subject, UserStory.description, Epic.subject)
+        .outerjoin(Epic, UserStory.epic_id == Epic.id)
+        .where(UserStory.project_id == project_id)
+    )
+    existing = {
+        proposal.user_story_id: proposal
+        for proposal in (
+            await db.execute(select(StoryProposal).where(StoryProposal.project_id == project_id))
+        ).scalars()
+    }
+
+    rows = [
+        (story_id, story_content_hash(subject, description), subject, description)
+        for story_id, subject, description, epic_subject in stories.all()
+        if not is_management_epic(epic_subject)
+    ]
+    stale = [
+        row
+        for row in rows
+        if row[0] not in existing
+        or existing[row[0]].content_hash != row[1]
+        or existing[row[0]].modules_version != reorganizer.modules_version
+    ]
+    if stale and reorganizer.batch_dependent:
+        stale = rows
+
+    # Score every stale story in one batch (the TF-IDF engine uses a single matrix product)
+    inferences = reorganizer.infer_stories(
+        [(subject, description) for _, _, subject, description in stale]
+    )
+    now = datetime.utcnow()
+    for (story_id, content_hash, _, _), (module_key, confidence, tags) in zip(stale, inferences):
+        proposal = existing.get(story_id)
+        if proposal is None:
+            proposal = StoryProposal(user_story_id=story_id, project_id=project_id)
+            db.add(proposal)
+        proposal.content_hash = content_hash
+        proposal.modules_version = reorganizer.modules_version
+        proposal.proposed_module = module_key
+        proposal.confidence = confidence
+        proposal.proposed_tags = tags
+        proposal.computed_at = now
+
+    await db.commit()
+    return len(stale)
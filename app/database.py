@@ -1,26 +1,151 @@
 """
 Database configuration and session management.
 
-This module provides async SQLAlchemy engine, session factory,
-and base class for models.
+This module provides async SQLAlchemy engines (primary and read),
+session factories and base class for models.
 """
 
 import os
-from typing import AsyncGenerator
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Dict, Optional, Tuple
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Connection, Inspector, make_url
+from sqlalchemy.engine.interfaces import DBAPIConnection
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import ConnectionPoolEntry
+
+from app import query_monitor
+
+if TYPE_CHECKING:
+    from alembic.script import ScriptDirectory
 
+# Alembic configuration used to check the schema revision on startup
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
 
 # Database URL from environment or default to SQLite
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./taiga_sync.db")
 
+# Server database pool (PostgreSQL)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# asyncpg prepared statement cache per connection (0 disables it, e.g. behind PgBouncer)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))
+
+# SQLite pragmas applied on every new connection
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+def is_sqlite_memory(url: str) -> bool:
+    """Whether the URL points to an in-memory SQLite database."""
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """
+    Engine keyword arguments for the URL's dialect.
+
+    PostgreSQL gets a sized queue pool with pre-ping and recycle, plus the
+    asyncpg prepared statement cache size. SQLite keeps SQLAlchemy's default
+    pool (its pragmas are applied by `apply_sqlite_pragmas`).
+    """
+    parsed = make_url(url)
+    options: Dict[str, Any] = {
+        "echo": bool(os.getenv("SQL_ECHO", "False").lower() == "true"),  # Log SQL queries
+        "future": True,
+    }
+    if parsed.get_backend_name() == "sqlite":
+        return options
+
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    if parsed.get_driver_name() == "asyncpg":
+        # SQLAlchemy's prepared statement cache and asyncpg's own statement cache
+        options["connect_args"] = {
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
+
+def sqlite_pragmas(url: str) -> Dict[str, Any]:
+    """Pragmas for a SQLite URL (WAL does not apply to in-memory databases)."""
+    pragmas: Dict[str, Any] = {
+        "synchronous": SQLITE_SYNCHRONOUS,
+        "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+        "mmap_size": SQLITE_MMAP_SIZE,
+    }
+    if not is_sqlite_memory(url):
+        pragmas = {"journal_mode": SQLITE_JOURNAL_MODE, **pragmas}
+    return pragmas
+
+
+def apply_sqlite_pragmas(async_engine: AsyncEngine, pragmas: Dict[str, Any]) -> None:
+    """
+    Run the pragmas on every new DBAPI connection.
+
+    WAL lets dashboard reads proceed while a sync writes, and busy_timeout
+    makes a second writer wait for the lock instead of failing with
+    "database is locked".
+    """
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _set_pragmas(
+        dbapi_connection: DBAPIConnection, connection_record: ConnectionPoolEntry
+    ) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def build_engine(url: str, read_only: bool = False) -> AsyncEngine:
+    """
+    Async engine with the per-dialect profile for `url`.
+
+    With `read_only`, SQLite connections also get `query_only`, so a write
+    through the read engine fails instead of taking the writer's lock.
+    """
+    async_engine = create_async_engine(url, **engine_options(url))
+    if make_url(url).get_backend_name() == "sqlite":
+        pragmas = sqlite_pragmas(url)
+        if read_only:
+            pragmas["query_only"] = "ON"
+        apply_sqlite_pragmas(async_engine, pragmas)
+    # Conteo y tiempo de sentencias SQL (query_monitor y el span "sql" del perfil)
+    query_monitor.install()
+    return async_engine
+
+
 # Create async engine
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=bool(os.getenv("SQL_ECHO", "False").lower() == "true"),  # Log SQL queries if enabled
-    future=True,
-)
+engine = build_engine(DATABASE_URL)
+
+# Read engine for read-only routes (dashboards, Grafana, table map): a PostgreSQL
+# replica or a separate read-only SQLite connection pool in WAL mode. Without
+# DATABASE_READ_URL reads share the primary engine.
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL") or None
+read_engine = build_engine(DATABASE_READ_URL, read_only=True) if DATABASE_READ_URL else engine
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -31,6 +156,15 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Session factory for read-only routes
+AsyncReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
 
 class Base(DeclarativeBase):
     """Base class for all database models."""
@@ -57,15 +191,181 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
-async def init_db() -> None:
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency that provides a session on the read engine.
+
+    For routes that only query (dashboards, Grafana, table map), so heavy
+    read traffic does not compete with the sync writer's connections.
+
+    Yields:
+        AsyncSession: Read-only database session
+    """
+    async with AsyncReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+def get_session_factory() -> async_sessionmaker:
+    """
+    Dependency that provides the session factory.
+
+    For endpoints that need several independent sessions at once
+    (e.g. running queries concurrently).
     """
-    Initialize database tables.
+    return AsyncSessionLocal
+
+
+def get_read_session_factory() -> async_sessionmaker:
+    """Dependency that provides the read session factory (see get_read_db)."""
+    return AsyncReadSessionLocal
+
+
+@lru_cache(maxsize=1)
+def alembic_script() -> Optional["ScriptDirectory"]:
+    """Alembic ScriptDirectory for the project's migrations (None if unavailable)."""
+    if not ALEMBIC_INI.exists():
+        return None
+    try:
+        from alembic.config import Config
+        from alembic.script import ScriptDirectory
+    except ImportError:  # pragma: no cover - alembic is a runtime dependency
+        return None
+    return ScriptDirectory.from_config(Config(str(ALEMBIC_INI)))
+
+
+class SchemaOutdatedError(RuntimeError):
+    """The database revision does not match the migration head."""
+
+
+# Schema object each migration creates, used to tell which revision a database
+# built by `create_all` (or stamped behind its tables) actually matches.
+# Migrations that only move data have no entry: they count as applied when a
+# later migration's object exists. A new migration that changes the schema
+# adds its entry here.
+REVISION_MARKERS: Dict[str, Tuple[str, ...]] = {
+    "fc0a31b11810": ("table", "projects"),
+    "4bb2e9540b5d": ("table", "draft_boards"),
+    "7c2d9e41a6b3": ("index", "user_stories", "ix_user_stories_project_created"),
+    "a91f3c7d2e58": ("table", "events"),
+    "d5e8b2c4f1a7": ("table", "status_history"),
+    "e3b7f9a1c6d4": ("column", "projects", "data_version"),
+    "a7d3e5f1b2c8": ("table", "story_proposals"),
+    "b8e4f2a6c1d9": ("table", "auth_sessions"),
+    "c3f7a9d1e5b2": ("table", "taiga_response_cache"),
+}
+
+
+def _marker_exists(inspector: Inspector, marker: Tuple[str, ...]) -> bool:
+    kind, table = marker[0], marker[1]
+    if not inspector.has_table(table):
+        return False
+    if kind == "index":
+        return marker[2] in {index["name"] for index in inspector.get_indexes(table)}
+    if kind == "column":
+        return marker[2] in {column["name"] for column in inspector.get_columns(table)}
+    return True
+
+
+def _detect_revision(connection: Connection, script: "ScriptDirectory") -> Optional[str]:
+    """Latest revision whose schema objects (and those of every earlier one) exist."""
+    inspector = inspect(connection)
+    detected = None
+    for revision in reversed(list(script.walk_revisions())):
+        marker = REVISION_MARKERS.get(revision.revision)
+        if marker is None:
+            continue
+        if not _marker_exists(inspector, marker):
+            break
+        detected = revision.revision
+    return detected
 
-    This creates all tables defined in models.
+
+def _upgrade(connection: Connection, script: "ScriptDirectory", revision: str) -> None:
+    """Stamp `revision` and run the migrations after it up to the head."""
+    from alembic.operations import Operations
+    from alembic.runtime.migration import MigrationContext
+
+    def upgrade_revs(rev: Any, context: MigrationContext) -> Any:
+        return script._upgrade_revs("heads", rev)
+
+    context = MigrationContext.configure(connection, opts={"fn": upgrade_revs})
+    context.stamp(script, revision)
+    with Operations.context(context):
+        context.run_migrations()
+
+
+def _prepare_schema(
+    connection: Connection, script: Optional["ScriptDirectory"]
+) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Compare the database revision with the migration heads and act on it.
+
+    Returns the outcome and the database revision:
+
+    - "current": already at the head, nothing to do.
+    - "created": fresh database, created from the models and stamped at head.
+    - "upgraded": a schema built by `create_all` (unversioned, or stamped
+      behind the tables it has, like databases from before the startup check)
+      is stamped at the revision its tables match and migrated to the head.
+    - "create_all": the migrations are not available.
+
+    A database correctly stamped behind the head raises SchemaOutdatedError
+    without touching the schema (`alembic upgrade head` migrates it), as does
+    one whose tables match no revision.
+    """
+    if script is None:
+        Base.metadata.create_all(connection)
+        return "create_all", ()
+
+    from alembic.runtime.migration import MigrationContext
+
+    context = MigrationContext.configure(connection)
+    heads = set(script.get_heads())
+    current = set(context.get_current_heads())
+    if current == heads:
+        return "current", tuple(sorted(current))
+
+    if not inspect(connection).get_table_names():
+        # Fresh database: the models match the migration head, so create and stamp it
+        Base.metadata.create_all(connection)
+        context.stamp(script, "heads")
+        return "created", tuple(sorted(heads))
+
+    detected = _detect_revision(connection, script)
+    if detected is None or current == {detected}:
+        raise SchemaOutdatedError(
+            f"Database revision {', '.join(sorted(current)) or '(none)'} does not match the "
+            f"migration head {', '.join(sorted(heads))}; run `alembic upgrade head` before "
+            "starting"
+            + ("" if detected else " (its tables match no migration: check DATABASE_URL)")
+        )
+
+    _upgrade(connection, script, detected)
+    return "upgraded", tuple(sorted(heads))
+
+
+async def init_db(target: Optional[AsyncEngine] = None) -> str:
+    """
+    Prepare the database schema (of `target`, the application engine by default).
+
+    Compares the database's Alembic revision with the migration head, so
+    the usual restart of an up-to-date database skips `create_all` and its
+    per-table inspection. A fresh database is created from the models and
+    stamped at head, and one built by `create_all` is stamped at the revision
+    its tables match and migrated; a correctly stamped but outdated one makes
+    startup fail with SchemaOutdatedError until `alembic upgrade head` is run.
     Should be called on application startup.
+
+    Returns:
+        str: Outcome of the check ("current", "created", "upgraded" or "create_all")
     """
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    script = alembic_script()
+    async with (target or engine).begin() as conn:
+        outcome, _ = await conn.run_sync(_prepare_schema, script)
+    return outcome
 
 
 async def close_db() -> None:
@@ -75,3 +375,5 @@ async def close_db() -> None:
     Should be called on application shutdown.
     """
     await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
@@ -0,0 +1,119 @@
+"""
+Executor para las etapas CPU-bound fuera del event loop.
+
+El análisis del AIReorganizer, la preparación de detalles y el render de
+plantillas grandes son trabajo síncrono: ejecutados en el loop bloquean
+todas las demás requests (Grafana, proxy a Taiga) mientras dura el render.
+`run_cpu_bound` los envía a un pool configurable:
+
+- CPU_EXECUTOR=thread (default): ThreadPoolExecutor. Sin costo de
+  serialización; libera el loop aunque el GIL limite el paralelismo.
+- CPU_EXECUTOR=process: ProcessPoolExecutor. Paralelismo real; la función
+  debe ser importable a nivel de módulo y sus argumentos datos planos
+  (dicts, listas, SimpleNamespace), nunca objetos ORM.
+- CPU_EXECUTOR=inline: ejecuta en el loop (depuración / tests).
+
+`CPU_EXECUTOR_WORKERS` fija el tamaño del pool (por defecto el de la stdlib).
+El monitor de lag mide cuánto se atrasa un tick periódico del loop
+(EVENT_LOOP_LAG_INTERVAL segundos) y lo expone en Prometheus.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from app import profiling, telemetry
+
+EXECUTOR_MODES = ("thread", "process", "inline")
+
+CPU_EXECUTOR = os.getenv("CPU_EXECUTOR", "thread").strip().lower()
+CPU_EXECUTOR_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", "0")) or None
+# Intervalo del monitor de lag del event loop (0 = desactivado)
+EVENT_LOOP_LAG_INTERVAL = float(os.getenv("EVENT_LOOP_LAG_INTERVAL", "0.5"))
+
+if CPU_EXECUTOR not in EXECUTOR_MODES:
+    raise RuntimeError(f"CPU_EXECUTOR debe ser uno de {EXECUTOR_MODES}, no '{CPU_EXECUTOR}'")
+
+T = TypeVar("T")
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> Optional[Executor]:
+    """Pool compartido (creado al primer uso); None en modo inline."""
+    global _executor
+    if CPU_EXECUTOR == "inline":
+        return None
+    with _executor_lock:
+        if _executor is None:
+            if CPU_EXECUTOR == "process":
+                _executor = ProcessPoolExecutor(max_workers=CPU_EXECUTOR_WORKERS)
+            else:
+                _executor = ThreadPoolExecutor(
+                    max_workers=CPU_EXECUTOR_WORKERS, thread_name_prefix="cpu-bound"
+                )
+        return _executor
+
+
+def shutdown_executor() -> None:
+    """Cierra el pool (llamado en el shutdown de la app)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+async def run_cpu_bound(stage: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Ejecuta `fn(*args, **kwargs)` en el executor y registra su duración por etapa."""
+    started = time.perf_counter()
+    executor = get_executor()
+    try:
+        if executor is None:
+            return fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+    finally:
+        elapsed = time.perf_counter() - started
+        telemetry.CPU_STAGE_DURATION.observe(elapsed, stage=stage, mode=CPU_EXECUTOR)
+        profiling.record(stage, elapsed)
+
+
+class EventLoopLagMonitor:
+    """Tarea periódica que mide el retraso del event loop."""
+
+    def __init__(self, interval: float = EVENT_LOOP_LAG_INTERVAL) -> None:
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._task is not None:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - expected, 0.0)
+            telemetry.EVENT_LOOP_LAG.set(lag)
+            telemetry.EVENT_LOOP_LAG_DURATION.observe(lag)
+
+
+event_loop_monitor = EventLoopLagMonitor()
@@ -1,26 +1,60 @@
+import asyncio
+import json
+import logging
 import os
+import time
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Annotated, Dict, List, Optional, Union
+from typing import (
+    Annotated,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Union,
+)
 
 from dotenv import find_dotenv, load_dotenv
 from fastapi import Depends, FastAPI, HTTPException, Query, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-from fastapi_mcp import FastApiMCP
-from sqlalchemy import case, func, select, update
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import iterate_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app import crud
+from app import IMPORT_STARTED, crud, profiling, query_monitor, telemetry
 from app.auth import get_optional_auth, require_auth, session_store
-from app.database import close_db, get_db, init_db
+from app.database import (
+    AsyncReadSessionLocal,
+    AsyncSessionLocal,
+    close_db,
+    get_db,
+    get_read_db,
+    init_db,
+)
+from app.executor import event_loop_monitor, run_cpu_bound, shutdown_executor
 from app.markdown_parser import MarkdownTaskParser
-from app.models import Epic, Project, Tag, Task, UserStory
-from app.sync_service import sync_all_projects, sync_project
+from app.models import Epic, Project, Tag, Task, TaskTag, UserStory, UserStoryTag
+from app.render_cache import details_cache, etag_matches, table_map_cache, weak_etag
+from app.response_cache import TaigaResponseCache
 from app.schemas import (
     AuthStatusResponse,
     BulkTaskFromMarkdownRequest,
     BulkTaskResponse,
+    DraftStatePayload,
     EpicDetailResponse,
     EpicResponse,
     TaskCreateRequest,
@@ -28,7 +62,19 @@ from app.schemas import (
     TokenSetRequest,
     UserStoryDetailResponse,
     UserStoryResponse,
-    DraftStatePayload,
+)
+from app.simple_json_api import router as simple_json_router
+from app.sync_service import sync_all_projects, sync_project
+from app.table_map import (
+    build_table_map_context,
+    generate_table_map_analysis,
+    render_table_map,
+    render_table_map_shell,
+    snapshot_epic,
+    snapshot_project,
+    snapshot_story,
+    table_map_fingerprint,
+    tag_names,
 )
 from app.taiga_client import TaigaClient, TaigaClientError
 
@@ -39,70 +85,202 @@ if DOTENV_PATH.exists():
 else:
     load_dotenv(find_dotenv(), override=True)
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="Taiga Task API")
 
-# Configurar MCP Server
-mcp = FastApiMCP(app)
-mcp.mount()
+# Servidor MCP (fastapi_mcp): se importa y monta en el arranque, no al importar la app
+MCP_ENABLED = os.getenv("MCP_ENABLED", "true").lower() == "true"
 
-from app.simple_json_api import router as simple_json_router
 app.include_router(simple_json_router)
 
-# Configure Jinja2 templates
-templates = Jinja2Templates(directory=str(Path(__file__).parent / "templates"))
 
+def _route_path(scope: Scope) -> str:
+    return getattr(scope.get("route"), "path", "unmatched")
 
-async def _resolve_project(db: AsyncSession, identifier: Union[int, str]) -> Optional[Project]:
-    """Resolve a project given a Taiga ID or slug."""
-    project: Optional[Project] = None
-    try:
-        taiga_id = int(identifier)
-        project = await crud.get_project_by_taiga_id(db, taiga_id)
-    except (ValueError, TypeError):
-        project = await crud.get_project_by_slug(db, str(identifier))
-    return project
 
+class RecordRequestMetricsMiddleware:
+    """
+    Mide la latencia de cada request etiquetada por la plantilla de la ruta.
 
-async def _normalize_project_versions(db: AsyncSession, project_id: int) -> None:
+    Middleware ASGI puro: la medición cierra con el último `http.response.body`,
+    así las respuestas en streaming cuentan hasta el envío del cuerpo completo.
     """
-    Clamp project user story/task versions to either MVP (1) or Post-MVP (2).
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        observed = False
+
+        def observe() -> None:
+            nonlocal observed
+            observed = True
+            telemetry.observe_http_request(
+                scope["method"], _route_path(scope), status_code, time.perf_counter() - started
+            )
+
+        async def send_and_observe(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                observe()
+
+        try:
+            await self.app(scope, receive, send_and_observe)
+        finally:
+            # Excepciones o desconexiones antes de terminar el cuerpo
+            if not observed:
+                observe()
+
+
+class TrackSQLQueriesMiddleware:
     """
+    Cuenta las sentencias SQL de la request y marca las sospechas de N+1.
 
-    version_case_user_story = case(
-        (UserStory.version.is_(None), 1),
-        (UserStory.version <= 1, 1),
-        else_=2,
-    )
+    Middleware ASGI puro: la cuenta abarca también las consultas hechas
+    mientras se envía un cuerpo en streaming. Se exporta por ruta a
+    Prometheus; con SQL_DEBUG_HEADERS=true las cabeceras de la respuesta
+    llevan lo ejecutado hasta que empieza la respuesta.
+    """
 
-    version_case_task = case(
-        (Task.version.is_(None), 1),
-        (Task.version <= 1, 1),
-        else_=2,
-    )
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
-    await db.execute(
-        update(UserStory)
-        .where(UserStory.project_id == project_id)
-        .values(version=version_case_user_story)
-    )
-    await db.execute(
-        update(Task)
-        .where(Task.project_id == project_id)
-        .values(version=version_case_task)
-    )
-    await db.commit()
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
+        with query_monitor.track() as stats:
 
-def _build_story_details(epics: List[Epic], orphans: List[UserStory]) -> Dict[int, Dict]:
+            async def send_with_headers(message: Message) -> None:
+                if message["type"] == "http.response.start" and query_monitor.SQL_DEBUG_HEADERS:
+                    headers = MutableHeaders(scope=message)
+                    for name, value in stats.headers().items():
+                        headers[name] = value
+                await send(message)
+
+            await self.app(scope, receive, send_with_headers)
+        query_monitor.report(_route_path(scope), stats)
+
+
+class ProfileRequestMiddleware:
     """
-    Prepare a lightweight mapping of user story details for modal rendering.
+    Perfila la request si lo piden la cabecera X-Profile o `?profile=1`.
+
+    Requiere un token válido (como `require_auth`). Middleware ASGI puro: la
+    respuesta se retiene hasta terminar, así que el perfil incluye el render
+    en streaming; queda en /debug/profiles/{id} y la respuesta lleva
+    X-Profile-Id y Server-Timing.
     """
 
-    details: Dict[int, Dict] = {}
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = Request(scope)
+        if not profiling.profiling_requested(request.headers, request.query_params):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await require_auth(request)
+        except HTTPException as exc:
+            response = JSONResponse(
+                {"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers
+            )
+            await response(scope, receive, send)
+            return
+
+        start: Message = {}
+        body: List[bytes] = []
+
+        async def hold(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+
+        with profiling.RequestProfiler() as profiler:
+            await self.app(scope, receive, hold)
+
+        profile = profiler.result(scope["method"], scope["path"], start["status"])
+        profiling.profile_store.add(profile)
+
+        headers = MutableHeaders(scope=start)
+        headers["X-Profile-Id"] = profile.id
+        headers["Server-Timing"] = profile.server_timing()
+        await send(start)
+        await send({"type": "http.response.body", "body": b"".join(body)})
+
+
+# Cada add_middleware envuelve a los anteriores: el perfil envuelve a todo
+app.add_middleware(RecordRequestMetricsMiddleware)
+app.add_middleware(TrackSQLQueriesMiddleware)
+app.add_middleware(ProfileRequestMiddleware)
+
+
+@lru_cache(maxsize=1)
+def get_templates():
+    """Plantillas Jinja2 (el entorno se crea en el primer render)."""
+    from fastapi.templating import Jinja2Templates
+
+    return Jinja2Templates(directory=str(Path(__file__).parent / "templates"))
+
+
+async def _resolve_project(db: AsyncSession, identifier: Union[int, str]) -> Optional[Project]:
+    """Resolve a project given a Taiga ID or slug."""
+    project: Optional[Project] = None
+    try:
+        taiga_id = int(identifier)
+        project = await crud.get_project_by_taiga_id(db, taiga_id)
+    except (ValueError, TypeError):
+        project = await crud.get_project_by_slug(db, str(identifier))
+    return project
+
 
-    def _serialize(user_story: UserStory) -> Dict:
-        raw_data = user_story.raw_data or {}
-        serialized_tasks = [
+# Campos que pueden pedirse a los endpoints de detalle (proyección con ?fields=)
+STORY_DETAIL_FIELDS = (
+    "id",
+    "taiga_id",
+    "ref",
+    "subject",
+    "description",
+    "description_html",
+    "description_text",
+    "version",
+    "tags",
+    "tasks",
+)
+
+
+def _serialize_story_detail(
+    user_story: UserStory, fields: Sequence[str] = STORY_DETAIL_FIELDS
+) -> Dict:
+    """Detalle completo de una user story (con tareas) limitado a `fields`."""
+    raw_data = user_story.raw_data or {}
+    values = {
+        "id": lambda: user_story.id,
+        "taiga_id": lambda: user_story.taiga_id,
+        "ref": lambda: user_story.ref,
+        "subject": lambda: user_story.subject,
+        "description": lambda: user_story.description or raw_data.get("description") or "",
+        "description_html": lambda: raw_data.get("description_html") or "",
+        "description_text": lambda: raw_data.get("description_text") or "",
+        "version": lambda: user_story.version,
+        "tags": lambda: tag_names(user_story),
+        "tasks": lambda: [
             {
                 "id": task.id,
                 "taiga_id": task.taiga_id,
@@ -110,40 +288,111 @@ def _build_story_details(epics: List[Epic], orphans: List[UserStory]) -> Dict[in
                 "subject": task.subject or "",
                 "description": task.description or "",
                 "description_html": (task.raw_data or {}).get("description_html") or "",
-                "tags": [
-                    assoc.tag.name
-                    for assoc in getattr(task, "tags", [])
-                    if assoc.tag is not None
-                ],
+                "tags": tag_names(task),
             }
             for task in user_story.tasks
-        ]
+        ],
+    }
+    return {field: values[field]() for field in fields}
 
-        return {
-            "id": user_story.id,
-            "taiga_id": user_story.taiga_id,
-            "ref": user_story.ref,
-            "subject": user_story.subject,
-            "description": user_story.description or raw_data.get("description") or "",
-            "description_html": raw_data.get("description_html") or "",
-            "description_text": raw_data.get("description_text") or "",
-            "version": user_story.version,
-            "tags": [
-                assoc.tag.name
-                for assoc in getattr(user_story, "tags", [])
-                if assoc.tag is not None
-            ],
-            "tasks": serialized_tasks,
-        }
 
-    for epic in epics:
-        for user_story in epic.user_stories:
-            details[user_story.id] = _serialize(user_story)
+def _parse_detail_fields(fields: Optional[str]) -> Sequence[str]:
+    """Valida la proyección `?fields=a,b` de los endpoints de detalle."""
+    if not fields:
+        return STORY_DETAIL_FIELDS
+    requested = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in STORY_DETAIL_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos desconocidos: {', '.join(unknown)}. "
+            f"Disponibles: {', '.join(STORY_DETAIL_FIELDS)}",
+        )
+    return requested
+
+
+def _story_detail_options(fields: Sequence[str]) -> list:
+    """Carga ansiosa sólo de las relaciones que la proyección necesita."""
+    from sqlalchemy.orm import selectinload
+
+    options = []
+    if "tags" in fields:
+        options.append(selectinload(UserStory.tags).selectinload(UserStoryTag.tag))
+    if "tasks" in fields:
+        options.append(
+            selectinload(UserStory.tasks).selectinload(Task.tags).selectinload(TaskTag.tag)
+        )
+    return options
+
 
-    for user_story in orphans:
-        details[user_story.id] = _serialize(user_story)
+async def _cached_json(
+    request: Request, cache_key: tuple, build: Callable[[], Awaitable[object]]
+) -> Response:
+    """
+    Sirve JSON desde la caché de detalles con ETag débil y soporte de 304.
+
+    La clave incluye `data_version`, así que `build` sólo se ejecuta (y sólo
+    consulta la base) la primera vez que se pide una versión de los datos.
+    """
+    etag = weak_etag(*cache_key)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    body = details_cache.get(cache_key)
+    if body is None:
+        body = json.dumps(await build(), ensure_ascii=False, default=str).encode("utf-8")
+        details_cache.set(cache_key, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Tamaño aproximado de cada bloque enviado al renderizar en streaming
+STREAM_CHUNK_SIZE = 16 * 1024
+
+
+def _chunked_render(parts: Iterator[str], chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Agrupa la salida de un bloque de Jinja en bloques de ~chunk_size bytes.
+
+    Jinja produce muchos fragmentos pequeños; agruparlos evita un salto al
+    threadpool por fragmento.
+    """
+    buffer: List[bytes] = []
+    buffered = 0
+
+    for part in parts:
+        data = part.encode("utf-8")
+        buffer.append(data)
+        buffered += len(data)
+        if buffered >= chunk_size:
+            yield b"".join(buffer)
+            buffer, buffered = [], 0
 
-    return details
+    if buffer:
+        yield b"".join(buffer)
+
+
+async def _stream_table_map(
+    data: Dict, on_complete: Callable[[bytes], None]
+) -> AsyncIterator[bytes]:
+    """
+    Table map en streaming.
+
+    El bloque `shell` (cabecera, estadísticas y tabla actual) se envía antes de
+    correr el análisis IA, así el navegador pinta la página mientras se calcula;
+    después llega el bloque `analysis` por partes. `on_complete` recibe la
+    página completa al terminar (para poblar la caché de renders).
+    """
+    shell = await run_cpu_bound("table_map_shell", render_table_map_shell, data)
+    yield shell
+
+    context = await run_cpu_bound("table_map_context", build_table_map_context, data)
+    rendered = [shell]
+    async for chunk in iterate_in_threadpool(_chunked_render(generate_table_map_analysis(context))):
+        rendered.append(chunk)
+        yield chunk
+
+    on_complete(b"".join(rendered))
 
 
 def _load_env(variable: str) -> str:
@@ -153,11 +402,10 @@ def _load_env(variable: str) -> str:
     return value.strip()
 
 
-def _build_taiga_client() -> TaigaClient:
+def _build_taiga_client(auth_token: Optional[str] = None) -> TaigaClient:
     base_url = _load_env("TAIGA_BASE_URL")
 
     # Token viene de la sesión (session_store), NO del .env
-    auth_token = get_optional_auth()
 
     token_ttl_raw = os.getenv("TAIGA_TOKEN_TTL", "82800")
     try:
@@ -171,22 +419,57 @@ def _build_taiga_client() -> TaigaClient:
         password=None,  # No usar username/password
         auth_token=auth_token,
         token_ttl=token_ttl,
+        # Caché de respuestas GET compartida entre workers (TAIGA_RESPONSE_CACHE_TTL)
+        response_cache=TaigaResponseCache(AsyncSessionLocal),
     )
 
 
+def _mount_mcp() -> None:
+    """Monta el servidor MCP sobre las rutas ya registradas (una vez por proceso)."""
+    if not MCP_ENABLED or getattr(app.state, "mcp", None) is not None:
+        return
+    from fastapi_mcp import FastApiMCP
+
+    mcp = FastApiMCP(app)
+    mcp.mount()
+    app.state.mcp = mcp
+
+
 @app.on_event("startup")
 async def startup_event() -> None:
-    # Initialize database
-    await init_db()
+    started = time.perf_counter()
+    telemetry.STARTUP_DURATION.set(started - IMPORT_STARTED, phase="import")
+
+    # Initialize database (si la revisión de Alembic está al día no toca el esquema)
+    phase_started = time.perf_counter()
+    schema = await init_db()
+    telemetry.STARTUP_DURATION.set(time.perf_counter() - phase_started, phase="schema")
 
     # Initialize Taiga client
-    client = _build_taiga_client()
+    phase_started = time.perf_counter()
+    client = _build_taiga_client(await get_optional_auth())
     await client.start()
     app.state.taiga_client = client
+    telemetry.STARTUP_DURATION.set(time.perf_counter() - phase_started, phase="taiga_client")
+
+    phase_started = time.perf_counter()
+    _mount_mcp()
+    telemetry.STARTUP_DURATION.set(time.perf_counter() - phase_started, phase="mcp")
+
+    event_loop_monitor.start()
+
+    total = time.perf_counter() - IMPORT_STARTED
+    telemetry.STARTUP_DURATION.set(total, phase="total")
+    logger.info(
+        "Arranque en %.2fs (import %.2fs, esquema: %s)", total, started - IMPORT_STARTED, schema
+    )
 
 
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
+    await event_loop_monitor.stop()
+    shutdown_executor()
+
     # Close Taiga client
     client: TaigaClient | None = getattr(app.state, "taiga_client", None)
     if client is not None:
@@ -196,10 +479,16 @@ async def shutdown_event() -> None:
     await close_db()
 
 
-def get_taiga_client() -> TaigaClient:
+async def get_taiga_client() -> TaigaClient:
     client: TaigaClient | None = getattr(app.state, "taiga_client", None)
     if client is None:
         raise RuntimeError("El cliente de Taiga no está inicializado")
+    # Con varios workers el token pudo haberse establecido o borrado en otro proceso
+    token = await session_store.get_token()
+    if token and token != client.auth_token:
+        await client.set_auth_token(token)
+    elif not token and client.auth_token:
+        await client.clear_auth_token()
     return client
 
 
@@ -489,6 +778,9 @@ async def list_tasks_for_user_story(
 @app.post("/debug/cache/clear")
 async def clear_cache(taiga_client: TaigaClientDep) -> dict:
     await taiga_client.reset_token_cache()
+    await taiga_client.invalidate_response_cache()
+    table_map_cache.clear()
+    details_cache.clear()
     state = taiga_client.debug_state()
     state["cache_cleared"] = True
     return state
@@ -502,7 +794,7 @@ async def get_auth_status() -> AuthStatusResponse:
     Retorna información sobre si hay un token válido en la sesión
     e instrucciones para obtener y configurar uno si no existe.
     """
-    token_info = session_store.get_token_info()
+    token_info = await session_store.get_token_info()
 
     if token_info and token_info["is_valid"]:
         return AuthStatusResponse(
@@ -530,8 +822,9 @@ async def set_auth_token(payload: TokenSetRequest, taiga_client: TaigaClientDep)
     """
     POST /auth - Establece el token de autenticación para la sesión.
 
-    El token se almacena en memoria (session_store) y se usa para todas las
-    peticiones subsecuentes. No se persiste en .env ni en disco.
+    El token se guarda en el session_store (en memoria o, con
+    SESSION_BACKEND=database, en la tabla auth_sessions compartida por los
+    workers) y se usa para todas las peticiones subsecuentes. No se persiste en .env.
 
     Args:
         payload: Objeto con el token de Taiga
@@ -544,7 +837,7 @@ async def set_auth_token(payload: TokenSetRequest, taiga_client: TaigaClientDep)
     """
     try:
         # Guardar token en session store
-        session_store.set_token(payload.token)
+        await session_store.set_token(payload.token)
 
         # Actualizar el token en el cliente de Taiga también
         await taiga_client.set_auth_token(payload.token)
@@ -561,8 +854,9 @@ async def set_auth_token(payload: TokenSetRequest, taiga_client: TaigaClientDep)
         )
 
     except TaigaClientError as exc:
-        # Limpiar token inválido de la sesión
-        session_store.clear()
+        # Limpiar token inválido de la sesión y del cliente
+        await session_store.clear()
+        await taiga_client.clear_auth_token()
         raise HTTPException(
             status_code=401, detail=f"Token inválido o expirado: {str(exc)}"
         ) from exc
@@ -599,12 +893,14 @@ async def sync_data(
     stats = SyncStats()
 
     try:
-        if project is None:
-            # Sync all projects
-            stats = await sync_all_projects(db, taiga_client)
-        else:
-            # Sync specific project
-            await sync_project(db, taiga_client, project, stats)
+        # La sincronización lee siempre de Taiga (y de paso renueva la caché de respuestas)
+        with taiga_client.bypass_response_cache():
+            if project is None:
+                # Sync all projects
+                stats = await sync_all_projects(db, taiga_client)
+            else:
+                # Sync specific project
+                await sync_project(db, taiga_client, project, stats)
 
         return {
             "message": "Sincronización completada",
@@ -624,17 +920,22 @@ async def get_story_map(request: Request) -> HTMLResponse:
     """
     GET /story-map - Visual User Story Mapping Interface.
     """
-    return templates.TemplateResponse("story_map.html", {"request": request})
+    with profiling.span("template_render"):
+        return get_templates().TemplateResponse("story_map.html", {"request": request})
 
 
 @app.get("/table-map", response_class=HTMLResponse)
 async def get_table_map(
+    request: Request,
     project: Annotated[
         Union[int, str],
         Query(..., description="ID o slug del proyecto a visualizar"),
     ],
-    db: Annotated[AsyncSession, Depends(get_db)],
-) -> HTMLResponse:
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    stream: Annotated[
+        bool, Query(description="Enviar el HTML en bloques a medida que se renderiza")
+    ] = False,
+) -> Response:
     """
     GET /table-map - Visualiza el mapeo completo de datos sincronizados en HTML.
 
@@ -653,6 +954,19 @@ async def get_table_map(
         - Secciones colapsables
         - Estadísticas del proyecto
         - User stories huérfanas (sin epic)
+
+    Caché:
+        La página renderizada se guarda por (proyecto, data_version, modal de
+        token, versión de módulos/motor del AIReorganizer, huella de la
+        plantilla). `data_version` avanza con cada sync y cada guardado del borrador,
+        por lo que una visita repetida sin cambios sólo lee el proyecto y
+        responde desde memoria, o con 304 si el navegador envía el ETag.
+
+    Streaming:
+        Con `stream=true` la plantilla se renderiza con `generate()` y se envía
+        en bloques (chunked): el navegador recibe el shell y las estadísticas
+        mientras se generan las secciones de épicas, y el pico de memoria no
+        depende de tener la página entera en un solo string.
     """
     from sqlalchemy.orm import selectinload
 
@@ -664,36 +978,56 @@ async def get_table_map(
             detail=f"Project '{project}' not found in database. Run POST /sync?project={project} first.",
         )
 
-    # Normalize versions to MVP/Post-MVP buckets for this project
-    await _normalize_project_versions(db, db_project.id)
+    show_token_modal = not await session_store.has_valid_token()
+    from app.ai_reorganizer import AIReorganizer
+
+    # Las propuestas dependen del motor y de los módulos; la página, de la plantilla
+    modules_version = AIReorganizer().modules_version
+    cache_key = (
+        db_project.id,
+        db_project.data_version,
+        show_token_modal,
+        modules_version,
+        table_map_fingerprint(),
+    )
+    etag = weak_etag("table-map", *cache_key)
+    cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    cached_body = table_map_cache.get(cache_key)
+    if cached_body is not None:
+        return HTMLResponse(content=cached_body, headers=cache_headers)
 
     # Get epics with their user stories and tasks (with tags eagerly loaded)
     epics_result = await db.execute(
         select(Epic)
         .where(Epic.project_id == db_project.id)
         .options(
-            selectinload(Epic.user_stories).selectinload(UserStory.tags),
-            selectinload(Epic.user_stories).selectinload(UserStory.tasks).selectinload(Task.tags)
+            selectinload(Epic.user_stories)
+            .selectinload(UserStory.tags)
+            .selectinload(UserStoryTag.tag),
+            selectinload(Epic.user_stories)
+            .selectinload(UserStory.tasks)
+            .selectinload(Task.tags)
+            .selectinload(TaskTag.tag),
         )
         .order_by(Epic.ref.desc())
     )
-    epics = list(epics_result.scalars().all())
-
-    # Add total_tasks to each epic
-    for epic in epics:
-        epic.total_tasks = sum(len(us.tasks) for us in epic.user_stories)
+    epics = [snapshot_epic(epic) for epic in epics_result.scalars().all()]
 
     # Get orphan user stories (without epic) with tags eagerly loaded
     orphans_result = await db.execute(
         select(UserStory)
         .where(UserStory.project_id == db_project.id, UserStory.epic_id.is_(None))
         .options(
-            selectinload(UserStory.tags),
-            selectinload(UserStory.tasks).selectinload(Task.tags)
+            selectinload(UserStory.tags).selectinload(UserStoryTag.tag),
+            selectinload(UserStory.tasks).selectinload(Task.tags).selectinload(TaskTag.tag),
         )
         .order_by(UserStory.ref.desc())
     )
-    orphan_user_stories = list(orphans_result.scalars().all())
+    orphan_user_stories = [snapshot_story(us) for us in orphans_result.scalars().all()]
 
     # Calculate statistics
     stats_result = await db.execute(
@@ -746,57 +1080,68 @@ async def get_table_map(
         "tags": total_tags,
     }
 
-    # Generate AI reorganization proposals
-    from app.ai_reorganizer import AIReorganizer
-
-    ai = AIReorganizer()
-    analysis = ai.analyze_project(epics, orphan_user_stories)
+    # Inferencias guardadas por la sincronización; solo se recalculan las HU modificadas
+    cached_inferences = await crud.get_story_proposals(db, db_project.id, modules_version)
+    draft_state = await crud.get_draft_board_state(db, db_project.id)
 
-    proposals = analysis["proposals"]
-    analyzed_epic_refs = {
-        proposal.get("current_epic_ref")
-        for proposal in proposals
-        if proposal.get("current_epic_ref") is not None
+    # Desde aquí sólo datos planos: el análisis y el render corren en el executor
+    data = {
+        "project": snapshot_project(db_project),
+        "epics": epics,
+        "orphan_user_stories": orphan_user_stories,
+        "stats": stats,
+        "cached_inferences": cached_inferences,
+        "draft_state": draft_state,
+        "project_tags": project_tags,
+        "show_token_modal": show_token_modal,
     }
 
-    # Extend modules with project-specific epics that were not analyzed
-    draft_modules = {key: value for key, value in analysis["modules"].items()}
-    for epic in epics:
-        if epic.ref in analyzed_epic_refs:
-            continue
-        module_key = f"project-epic-{epic.ref}"
-        if module_key in draft_modules:
-            continue
-        draft_modules[module_key] = {
-            "name": epic.subject or f"Epic #{epic.ref}",
-            "description": epic.description or f"Epic #{epic.ref}",
-            "color": epic.color or "#6c757d",
-        }
+    if stream:
+        return StreamingResponse(
+            _stream_table_map(data, on_complete=lambda page: table_map_cache.set(cache_key, page)),
+            media_type="text/html; charset=utf-8",
+            headers=cache_headers,
+        )
 
-    story_details = _build_story_details(epics, orphan_user_stories)
-    draft_state = await crud.get_draft_board_state(db, db_project.id)
+    body = await run_cpu_bound("table_map_render", render_table_map, data)
+    table_map_cache.set(cache_key, body)
 
-    return templates.TemplateResponse(
-        "table_map.html",
-        {
-            "request": {},  # Jinja2 requires request object
-            "project": db_project,
-            "epics": epics,
-            "orphan_user_stories": orphan_user_stories,
-            "stats": stats,
-            "ai_analysis": analysis,
-            "draft_modules": draft_modules,
-            "story_details": story_details,
-            "draft_state": draft_state,
-            "project_tags": project_tags,
-            "show_token_modal": not session_store.has_valid_token(),
-        },
-    )
+    return HTMLResponse(content=body, headers=cache_headers)
 
 
 @app.get("/debug/state")
 def debug_state(taiga_client: TaigaClientDep) -> dict:
-    return taiga_client.debug_state()
+    state = taiga_client.debug_state()
+    # Histogramas de tiempos (Taiga, crud, sync); los mismos que /metrics/prometheus
+    state["timings"] = telemetry.timing_summary()
+    return state
+
+
+@app.get("/debug/profiles")
+async def list_profiles(_token: Annotated[str, Depends(require_auth)]) -> List[dict]:
+    """Perfiles capturados con X-Profile / ?profile=1, del más reciente al más antiguo."""
+    return [profile.summary() for profile in profiling.profile_store.list()]
+
+
+@app.get("/debug/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    _token: Annotated[str, Depends(require_auth)],
+    format: Annotated[
+        Literal["collapsed", "json"],
+        Query(description="collapsed: stacks para flamegraph.pl/speedscope; json: resumen"),
+    ] = "collapsed",
+) -> Response:
+    """Descarga un perfil como stacks colapsados (flamegraph) o como JSON."""
+    profile = profiling.profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Perfil '{profile_id}' no encontrado")
+    if format == "json":
+        return JSONResponse(profile.to_dict())
+    return PlainTextResponse(
+        profile.collapsed(),
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.collapsed"'},
+    )
 
 
 @app.post("/debug/auth")
@@ -872,6 +1217,114 @@ async def save_project_draft_state(
     return {"project": project_id, "status": "saved"}
 
 
+@app.get("/projects/{project_id}/stories/{story_id}/details")
+async def get_story_details(
+    request: Request,
+    project_id: Union[int, str],
+    story_id: int,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    fields: Annotated[
+        Optional[str], Query(description="Campos separados por coma (por defecto todos)")
+    ] = None,
+) -> Response:
+    """
+    Detalle de una user story (descripciones y tareas) para el modal del table map.
+
+    `story_id` es el ID interno (el mismo que usan las tarjetas). La respuesta
+    se cachea por versión de datos del proyecto y admite If-None-Match.
+    """
+    project = await _resolve_project(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail=f"Project '{project_id}' not found")
+    selected = _parse_detail_fields(fields)
+
+    async def build() -> Dict:
+        result = await db.execute(
+            select(UserStory)
+            .where(UserStory.id == story_id, UserStory.project_id == project.id)
+            .options(*_story_detail_options(selected))
+        )
+        user_story = result.scalar_one_or_none()
+        if not user_story:
+            raise HTTPException(status_code=404, detail=f"User story {story_id} not found")
+        return _serialize_story_detail(user_story, selected)
+
+    cache_key = ("story", project.id, project.data_version, story_id, ",".join(selected))
+    return await _cached_json(request, cache_key, build)
+
+
+@app.get("/projects/{project_id}/epics/{epic_ref}/stories")
+async def list_epic_stories(
+    request: Request,
+    project_id: Union[int, str],
+    epic_ref: str,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    cursor: Annotated[
+        Optional[int], Query(description="Ref de la última story recibida (next_cursor)")
+    ] = None,
+    limit: Annotated[int, Query(ge=1, le=200, description="Stories por página")] = 50,
+    fields: Annotated[
+        Optional[str], Query(description="Campos separados por coma (por defecto todos)")
+    ] = None,
+) -> Response:
+    """
+    Stories de una épica paginadas por ref descendente (keyset), con proyección.
+
+    `epic_ref` es el ref de la épica, u `orphans` para las stories sin épica.
+
+    Returns:
+        {"stories": [...], "next_cursor": ref | null}
+    """
+    project = await _resolve_project(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail=f"Project '{project_id}' not found")
+    selected = _parse_detail_fields(fields)
+
+    async def build() -> Dict:
+        conditions = [UserStory.project_id == project.id]
+        if epic_ref == "orphans":
+            conditions.append(UserStory.epic_id.is_(None))
+        else:
+            try:
+                ref = int(epic_ref)
+            except ValueError as exc:
+                raise HTTPException(
+                    status_code=400, detail="epic_ref debe ser un número o 'orphans'"
+                ) from exc
+            epic_id = await db.scalar(
+                select(Epic.id).where(Epic.project_id == project.id, Epic.ref == ref)
+            )
+            if epic_id is None:
+                raise HTTPException(status_code=404, detail=f"Epic #{ref} not found")
+            conditions.append(UserStory.epic_id == epic_id)
+        if cursor is not None:
+            conditions.append(UserStory.ref < cursor)
+
+        result = await db.execute(
+            select(UserStory)
+            .where(*conditions)
+            .options(*_story_detail_options(selected))
+            .order_by(UserStory.ref.desc())
+            .limit(limit + 1)
+        )
+        stories = list(result.scalars().all())
+        return {
+            "stories": [_serialize_story_detail(us, selected) for us in stories[:limit]],
+            "next_cursor": stories[limit - 1].ref if len(stories) > limit else None,
+        }
+
+    cache_key = (
+        "epic-stories",
+        project.id,
+        project.data_version,
+        epic_ref,
+        cursor,
+        limit,
+        ",".join(selected),
+    )
+    return await _cached_json(request, cache_key, build)
+
+
 @app.get("/tasks/{task_id}")
 async def get_task(task_id: int, taiga_client: TaigaClientDep) -> dict:
     """Obtiene detalle de una tarea específica."""
@@ -1078,6 +1531,10 @@ Otra descripción.
     }
 
 
+# Llamadas simultáneas a Taiga al crear tareas desde markdown
+BULK_TASK_CONCURRENCY = max(int(os.getenv("BULK_TASK_CONCURRENCY", "8")), 1)
+
+
 @app.post("/tasks/bulk-from-markdown", response_model=BulkTaskResponse)
 async def create_tasks_from_markdown(
     payload: BulkTaskFromMarkdownRequest, taiga_client: TaigaClientDep
@@ -1093,67 +1550,103 @@ async def create_tasks_from_markdown(
     **Criterios de aceptación**: ...
     **Dependencias**: ...
     """
-    # Resolver project slug
-    try:
-        if isinstance(payload.project, str):
-            project_slug = payload.project
-        else:
+    # Las mutaciones invalidan la caché de respuestas una sola vez, al terminar
+    async with taiga_client.batch_invalidation():
+        # Resolver el proyecto una sola vez (ID para crear las tareas, slug para los links)
+        try:
             project_data = await taiga_client.get_project(payload.project)
-            project_slug = project_data.get("slug", str(payload.project))
-    except TaigaClientError as exc:
-        raise HTTPException(status_code=400, detail=f"Proyecto no encontrado: {exc}") from exc
-
-    # Obtener la historia de usuario para actualizar su descripción
-    try:
-        user_story = await taiga_client.get_user_story(payload.user_story)
-
-        # Extraer la parte del markdown antes de "## Tareas Propuestas"
-        # Esto incluye descripción, contexto y diagramas
-        description_parts = payload.markdown.split("## Tareas Propuestas")
-        if len(description_parts) > 0:
-            us_description = description_parts[0].strip()
-
-            # Actualizar la historia con los diagramas
-            await taiga_client.update_user_story(
-                user_story_id=payload.user_story,
-                description=us_description,
-                version=user_story.get("version"),
-            )
-    except TaigaClientError as exc:
-        # No fallar si no se puede actualizar la historia, solo advertir
-        print(f"Advertencia: No se pudo actualizar la historia: {exc}")
-
-    # Parsear markdown
-    parser = MarkdownTaskParser(taiga_base_url=payload.taiga_base_url)
-    tasks_data = parser.parse_tasks(payload.markdown, project_slug)
-
-    if not tasks_data:
-        raise HTTPException(status_code=400, detail="No se encontraron tareas en el markdown")
-
-    # Crear tareas
-    created_tasks = []
-    errors = []
+        except TaigaClientError as exc:
+            raise HTTPException(status_code=400, detail=f"Proyecto no encontrado: {exc}") from exc
+        project_id = project_data["id"]
+        project_slug = project_data.get("slug", str(payload.project))
 
-    for idx, task_data in enumerate(tasks_data, 1):
+        # Obtener la historia de usuario para actualizar su descripción
         try:
-            task = await taiga_client.create_task(
-                project=payload.project,
-                subject=task_data["subject"],
-                user_story=payload.user_story,
-                description=task_data["description"],
-                # tags=task_data.get("tags"),  # Taiga no acepta tags en creación
-            )
-            created_tasks.append(TaskResponse(**task))
+            # Su `version` va en el PATCH: se lee de Taiga, no de la caché de respuestas
+            with taiga_client.bypass_response_cache():
+                user_story = await taiga_client.get_user_story(payload.user_story)
+
+            # Extraer la parte del markdown antes de "## Tareas Propuestas"
+            # Esto incluye descripción, contexto y diagramas
+            description_parts = payload.markdown.split("## Tareas Propuestas")
+            if len(description_parts) > 0:
+                us_description = description_parts[0].strip()
+
+                # Actualizar la historia con los diagramas
+                await taiga_client.update_user_story(
+                    user_story_id=payload.user_story,
+                    description=us_description,
+                    version=user_story.get("version"),
+                )
         except TaigaClientError as exc:
-            errors.append(
-                {
-                    "task_number": idx,
-                    "subject": task_data["subject"],
-                    "error": str(exc),
-                }
+            # No fallar si no se puede actualizar la historia, solo advertir
+            print(f"Advertencia: No se pudo actualizar la historia: {exc}")
+
+        # Parsear markdown
+        parser = MarkdownTaskParser(taiga_base_url=payload.taiga_base_url)
+        tasks_data = parser.parse_tasks(payload.markdown, project_slug)
+
+        if not tasks_data:
+            raise HTTPException(status_code=400, detail="No se encontraron tareas en el markdown")
+
+        # Crear tareas en paralelo (acotado); el orden de la respuesta sigue al del markdown
+        semaphore = asyncio.Semaphore(BULK_TASK_CONCURRENCY)
+        errors: List[dict] = []
+
+        async def create(idx: int, task_data: dict) -> Optional[dict]:
+            async with semaphore:
+                try:
+                    return await taiga_client.create_task(
+                        project=project_id,
+                        subject=task_data["subject"],
+                        user_story=payload.user_story,
+                        description=task_data["description"],
+                        # Taiga no acepta tags en creación: se aplican en una segunda tanda
+                    )
+                except TaigaClientError as exc:
+                    errors.append(
+                        {"task_number": idx, "subject": task_data["subject"], "error": str(exc)}
+                    )
+                    return None
+
+        async def apply_tags(idx: int, task_data: dict, task: dict) -> dict:
+            async with semaphore:
+                try:
+                    return await taiga_client.update_task(
+                        task_id=task["id"], tags=task_data["tags"], version=task.get("version")
+                    )
+                except TaigaClientError as exc:
+                    errors.append(
+                        {
+                            "task_number": idx,
+                            "subject": task_data["subject"],
+                            "error": f"Tarea creada sin tags: {exc}",
+                        }
+                    )
+                    return task
+
+        created = await asyncio.gather(
+            *(create(idx, task_data) for idx, task_data in enumerate(tasks_data, 1))
+        )
+        tagged = await asyncio.gather(
+            *(
+                apply_tags(idx, task_data, task)
+                for idx, (task_data, task) in enumerate(zip(tasks_data, created), 1)
+                if task is not None and task_data.get("tags")
             )
+        )
+        tagged_by_id = {task["id"]: task for task in tagged}
+
+        created_tasks = [
+            TaskResponse(**tagged_by_id.get(task["id"], task))
+            for task in created
+            if task is not None
+        ]
+        errors.sort(key=lambda error: error["task_number"])
 
-    return BulkTaskResponse(total_tasks=len(tasks_data), created_tasks=created_tasks, errors=errors)
+        return BulkTaskResponse(
+            total_tasks=len(tasks_data), created_tasks=created_tasks, errors=errors
+        )
 
 
 # ============================================================================
@@ -1163,7 +1656,7 @@ async def create_tasks_from_markdown(
 @app.get("/metrics/sprint-velocity")
 async def get_sprint_velocity_metrics(
     project: Annotated[Union[int, str], Query(..., description="ID o slug del proyecto")],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     sprint_count: Annotated[int, Query(description="Número de sprints a incluir")] = 6,
     use_milestones: Annotated[bool, Query(description="Usar milestones en lugar de semanas")] = False,
 ) -> dict:
@@ -1210,7 +1703,7 @@ async def get_sprint_velocity_metrics(
 @app.get("/metrics/stuck-tasks")
 async def get_stuck_tasks_metrics(
     project: Annotated[Union[int, str], Query(..., description="ID o slug del proyecto")],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     days_threshold: Annotated[int, Query(description="Días para considerar tarea estancada")] = 5,
 ) -> dict:
     """
@@ -1262,9 +1755,12 @@ async def get_stuck_tasks_metrics(
 @app.get("/metrics/activity-feed")
 async def get_activity_feed_metrics(
     project: Annotated[Union[int, str], Query(..., description="ID o slug del proyecto")],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     limit: Annotated[int, Query(description="Número máximo de eventos")] = 50,
     hours: Annotated[int, Query(description="Horas atrás para buscar actividad")] = 168,
+    cursor: Annotated[
+        Optional[str], Query(description="Cursor de la página anterior (next_cursor)")
+    ] = None,
 ) -> dict:
     """
     Feed de actividad para panel de Grafana.
@@ -1272,7 +1768,9 @@ async def get_activity_feed_metrics(
     Incluye:
     - Creación de user stories y tareas
     - Modificaciones (cambios de estado, actualización de campos)
-    - Comentarios (desde raw_data si están disponibles)
+
+    El orden y la paginación se resuelven en la base de datos: para obtener
+    eventos más antiguos se pasa el `next_cursor` de la respuesta anterior.
 
     Returns:
         Timeline de eventos ordenados por fecha
@@ -1287,11 +1785,17 @@ async def get_activity_feed_metrics(
         )
 
     exporter = MetricsExporter(db)
-    activities = await exporter.get_activity_feed(
-        project_id=db_project.id,
-        limit=limit,
-        hours=hours
-    )
+    try:
+        page = await exporter.get_activity_feed_page(
+            project_id=db_project.id,
+            limit=limit,
+            hours=hours,
+            cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    activities = page["activities"]
 
     return {
         "project_id": db_project.id,
@@ -1299,13 +1803,14 @@ async def get_activity_feed_metrics(
         "total_events": len(activities),
         "time_range_hours": hours,
         "activities": activities,
+        "next_cursor": page["next_cursor"],
     }
 
 
 @app.get("/metrics/project-summary")
 async def get_project_summary_metrics(
     project: Annotated[Union[int, str], Query(..., description="ID o slug del proyecto")],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
 ) -> dict:
     """
     Resumen general del proyecto para Grafana.
@@ -1330,6 +1835,102 @@ async def get_project_summary_metrics(
     return summary
 
 
+FlowEntityType = Literal["user_story", "task"]
+
+
+async def _flow_metrics_response(
+    db: AsyncSession,
+    project: Union[int, str],
+    metric: str,
+    entity_type: str,
+    sprint: Optional[str],
+) -> dict:
+    """Resuelve el proyecto y calcula una métrica de flujo del MetricsExporter."""
+    from app.metrics_exporter import MetricsExporter
+
+    db_project = await _resolve_project(db, project)
+    if not db_project:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Project '{project}' not found. Run POST /sync?project={project} first."
+        )
+
+    exporter = MetricsExporter(db)
+    compute = getattr(exporter, f"get_{metric}")
+    metrics = await compute(project_id=db_project.id, entity_type=entity_type, sprint=sprint)
+
+    return {
+        "project_id": db_project.id,
+        "project_name": db_project.name,
+        "entity_type": entity_type,
+        "sprint": sprint,
+        "metrics": metrics,
+    }
+
+
+@app.get("/metrics/cycle-time")
+async def get_cycle_time_metrics(
+    project: Annotated[Union[int, str], Query(..., description="ID o slug del proyecto")],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    entity_type: Annotated[FlowEntityType, Query(description="user_story o task")] = "user_story",
+    sprint: Annotated[Optional[str], Query(description="Filtrar por nombre de sprint")] = None,
+) -> dict:
+    """
+    Cycle time por sprint (inicio del trabajo → cierre), en días.
+
+    Se calcula sobre el historial de estados (status_history) con
+    percentiles p50/p85/p95.
+    """
+    return await _flow_metrics_response(db, project, "cycle_time", entity_type, sprint)
+
+
+@app.get("/metrics/lead-time")
+async def get_lead_time_metrics(
+    project: Annotated[Union[int, str], Query(..., description="ID o slug del proyecto")],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    entity_type: Annotated[FlowEntityType, Query(description="user_story o task")] = "user_story",
+    sprint: Annotated[Optional[str], Query(description="Filtrar por nombre de sprint")] = None,
+) -> dict:
+    """
+    Lead time por sprint (creación → cierre), en días.
+
+    Se calcula sobre el historial de estados (status_history) con
+    percentiles p50/p85/p95.
+    """
+    return await _flow_metrics_response(db, project, "lead_time", entity_type, sprint)
+
+
+@app.get("/metrics/time-in-status")
+async def get_time_in_status_metrics(
+    project: Annotated[Union[int, str], Query(..., description="ID o slug del proyecto")],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    entity_type: Annotated[FlowEntityType, Query(description="user_story o task")] = "user_story",
+    sprint: Annotated[Optional[str], Query(description="Filtrar por nombre de sprint")] = None,
+) -> dict:
+    """
+    Tiempo en cada estado por sprint, en horas (p50/p85/p95).
+
+    El estado actual de los items abiertos cuenta hasta el momento de la consulta.
+    """
+    return await _flow_metrics_response(db, project, "time_in_status", entity_type, sprint)
+
+
+@app.get("/metrics/prometheus", include_in_schema=False)
+async def get_prometheus_metrics() -> Response:
+    """
+    Exposición en formato Prometheus (scrapeado según prometheus/prometheus.yml).
+
+    Los gauges de proyecto salen de un snapshot cacheado (METRICS_SNAPSHOT_TTL),
+    así que un scrape no vuelve a agregar las tablas mientras siga vigente.
+    """
+    await telemetry.project_snapshots.ensure_fresh(AsyncReadSessionLocal)
+
+    return Response(
+        content=telemetry.REGISTRY.render(),
+        media_type=telemetry.PROMETHEUS_CONTENT_TYPE,
+    )
+
+
 @app.get("/health")
 async def health_check() -> dict:
     """Health check endpoint for Docker healthcheck."""
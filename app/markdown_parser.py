@@ -1,11 +1,42 @@
 """Parser de markdown para extraer tareas y convertir referencias a links de Taiga."""
 
 import re
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+# Separador de tareas (títulos de nivel 3 numerados)
+TASK_SPLIT_RE = re.compile(r"\n### \d+\.\s+")
+
+# Encabezados de campo: un solo recorrido por sección ubica todos los campos
+FIELD_HEADER_RE = re.compile(
+    r"\*\*(Componente|Descripción|Criterios de aceptación|Dependencias)\*\*:"
+)
+
+# Contenido de cada campo, anclado justo después de su encabezado. Los bloques
+# (descripción, criterios, dependencias) se delimitan con str.find en lugar del
+# `(.+?)(?=...)` perezoso, que evalúa el lookahead carácter por carácter
+COMPONENT_VALUE_RE = re.compile(r"\s*(.+)")
+BLOCK_START_RE = re.compile(r"\s*\n(?=.)", re.DOTALL)
+DEPENDENCIES_START_RE = re.compile(r"\s*(?=.)", re.DOTALL)
+LIST_ITEM_RE = re.compile(r"^[-*]\s+(.+)$", re.MULTILINE)
+
+# Referencias a Taiga: "Tarea N", "HU #N" / "US #N" y "#N" en una sola pasada
+REFERENCE_RE = re.compile(r"Tarea (\d+)|(HU|US) #(\d+)|#(\d+)")
+TASK_REFERENCE_RE = re.compile(r"Tarea (\d+)")
+STORY_REFERENCE_RE = re.compile(r"(HU|US) #(\d+)")
+WORD_CHAR_RE = re.compile(r"\w")
 
 
 class MarkdownTaskParser:
-    """Parser para extraer tareas de un documento markdown."""
+    """
+    Parser para extraer tareas de un documento markdown.
+
+    Cada sección se recorre una vez: un único `finditer` ubica los encabezados
+    de campo y cada valor se lee con un patrón anclado en su posición, en lugar
+    de buscar cada campo desde el inicio de la sección. Los links se reescriben
+    con una sola expresión que reproduce el resultado de aplicar en orden los
+    tres reemplazos originales (incluido el doble link de "HU #130", donde el
+    "#130" del texto del link vuelve a convertirse).
+    """
 
     def __init__(self, taiga_base_url: Optional[str] = None):
         """
@@ -39,39 +70,58 @@ class MarkdownTaskParser:
         # Agregar salto de línea al inicio si no existe para que el regex funcione
         if not markdown.startswith("\n"):
             markdown = "\n" + markdown
-        task_sections = re.split(r"\n### \d+\.\s+", markdown)
+        task_sections = TASK_SPLIT_RE.split(markdown)
 
+        link_prefixes = self._link_prefixes(project_slug)
         for section in task_sections[1:]:  # Saltar el preámbulo
-            task = self._parse_task_section(section, project_slug)
+            task = self._parse_task_section(section, project_slug, link_prefixes)
             if task:
                 tasks.append(task)
 
         return tasks
 
-    def _parse_task_section(self, section: str, project_slug: str) -> Optional[Dict]:
-        """Parsea una sección de tarea individual."""
-        lines = section.split("\n")
-        if not lines:
-            return None
+    def _link_prefixes(self, project_slug: str) -> Tuple[str, str]:
+        """Prefijos de URL para tareas e historias del proyecto."""
+        project_url = f"{self.taiga_base_url}/project/{project_slug}"
+        return f"{project_url}/task/", f"{project_url}/us/"
 
+    def _parse_task_section(
+        self, section: str, project_slug: str, link_prefixes: Tuple[str, str]
+    ) -> Optional[Dict]:
+        """Parsea una sección de tarea individual."""
         # Título es la primera línea
-        title = lines[0].strip()
+        title = section.split("\n", 1)[0].strip()
 
-        # Extraer metadatos
-        component = self._extract_field(section, r"\*\*Componente\*\*:\s*(.+)")
+        # Ubicar todos los encabezados de campo en un solo recorrido
+        headers: Dict[str, List[int]] = {}
+        for match in FIELD_HEADER_RE.finditer(section):
+            headers.setdefault(match.group(1), []).append(match.end())
 
-        # Extraer descripción
-        description = self._extract_description(section)
+        component = None
+        for position in headers.get("Componente", ()):
+            value = COMPONENT_VALUE_RE.match(section, position)
+            if value:
+                component = value.group(1).strip()
+                break
 
-        # Extraer criterios de aceptación
-        acceptance_criteria = self._extract_acceptance_criteria(section)
+        description = self._block_value(section, headers.get("Descripción"), BLOCK_START_RE, "\n**")
+        description = description.strip() if description is not None else ""
 
-        # Extraer dependencias
-        dependencies = self._extract_dependencies(section)
+        criteria_text = self._block_value(
+            section, headers.get("Criterios de aceptación"), BLOCK_START_RE, "\n**"
+        )
+        acceptance_criteria = LIST_ITEM_RE.findall(criteria_text) if criteria_text else []
+
+        deps_text = self._block_value(
+            section, headers.get("Dependencias"), DEPENDENCIES_START_RE, "\n\n"
+        )
+        dependencies = (
+            [d.strip() for d in deps_text.strip().split(",")] if deps_text is not None else []
+        )
 
         # Construir descripción completa con formato markdown
         full_description = self._build_full_description(
-            description, acceptance_criteria, dependencies, component, project_slug
+            description, acceptance_criteria, dependencies, component, project_slug, link_prefixes
         )
 
         # Extraer tags del componente
@@ -85,39 +135,31 @@ class MarkdownTaskParser:
             "tags": tags if tags else None,
         }
 
-    def _extract_field(self, text: str, pattern: str) -> Optional[str]:
-        """Extrae un campo usando regex."""
-        match = re.search(pattern, text)
-        return match.group(1).strip() if match else None
-
-    def _extract_description(self, section: str) -> str:
-        """Extrae la descripción de la tarea."""
-        desc_match = re.search(r"\*\*Descripción\*\*:\s*\n(.+?)(?=\n\*\*|$)", section, re.DOTALL)
-        if desc_match:
-            return desc_match.group(1).strip()
-        return ""
-
-    def _extract_acceptance_criteria(self, section: str) -> List[str]:
-        """Extrae los criterios de aceptación."""
-        criteria = []
-        criteria_match = re.search(
-            r"\*\*Criterios de aceptación\*\*:\s*\n(.+?)(?=\n\*\*|$)", section, re.DOTALL
-        )
-        if criteria_match:
-            criteria_text = criteria_match.group(1)
-            # Extraer items de lista
-            criteria = re.findall(r"^[-*]\s+(.+)$", criteria_text, re.MULTILINE)
-        return criteria
-
-    def _extract_dependencies(self, section: str) -> List[str]:
-        """Extrae las dependencias."""
-        deps = []
-        deps_match = re.search(r"\*\*Dependencias\*\*:\s*(.+?)(?=\n\n|$)", section, re.DOTALL)
-        if deps_match:
-            deps_text = deps_match.group(1).strip()
-            # Separar por comas
-            deps = [d.strip() for d in deps_text.split(",")]
-        return deps
+    @staticmethod
+    def _block_value(
+        section: str,
+        positions: Optional[List[int]],
+        start_pattern: "re.Pattern[str]",
+        terminator: str,
+    ) -> Optional[str]:
+        """
+        Bloque que sigue al primer encabezado válido (como `re.search`).
+
+        Equivale a `start_pattern(.+?)(?=terminator|$)` con DOTALL: el bloque
+        tiene al menos un carácter y termina en el primer `terminator`, en el
+        salto de línea final o al final de la sección.
+        """
+        for position in positions or ():
+            match = start_pattern.match(section, position)
+            if not match:
+                continue
+            start = match.end()
+            end = len(section)
+            if section.endswith("\n") and end - 1 > start:
+                end -= 1
+            stop = section.find(terminator, start + 1)
+            return section[start : stop if stop != -1 and stop < end else end]
+        return None
 
     def _extract_tags(self, component: Optional[str]) -> List[str]:
         """Extrae tags del componente."""
@@ -149,6 +191,7 @@ class MarkdownTaskParser:
         dependencies: List[str],
         component: Optional[str],
         project_slug: str,
+        link_prefixes: Optional[Tuple[str, str]] = None,
     ) -> str:
         """Construye la descripción completa con formato markdown y links."""
         parts = []
@@ -178,13 +221,15 @@ class MarkdownTaskParser:
             parts.append("## Dependencias")
             parts.append("")
             for dep in dependencies:
-                linked_dep = self._convert_to_taiga_link(dep, project_slug)
+                linked_dep = self._convert_to_taiga_link(dep, project_slug, link_prefixes)
                 parts.append(f"- {linked_dep}")
             parts.append("")
 
         return "\n".join(parts)
 
-    def _convert_to_taiga_link(self, text: str, project_slug: str) -> str:
+    def _convert_to_taiga_link(
+        self, text: str, project_slug: str, link_prefixes: Optional[Tuple[str, str]] = None
+    ) -> str:
         """
         Convierte referencias a links de Taiga.
 
@@ -194,33 +239,63 @@ class MarkdownTaskParser:
         - "US #88" -> Link a historia #88
         - "Sistema D3" -> Texto sin cambios
         """
-        # Patrón para "Tarea N"
-        text = re.sub(
-            r"Tarea (\d+)",
-            lambda m: (
-                f"[Tarea #{m.group(1)}]"
-                f"({self.taiga_base_url}/project/{project_slug}/task/{m.group(1)})"
-            ),
-            text,
+        if "#" not in text and "Tarea " not in text:
+            return text
+
+        task_url, us_url = link_prefixes or self._link_prefixes(project_slug)
+        if "#" in task_url:
+            # Una URL con "#" interactuaría con los reemplazos: aplicarlos en orden
+            return self._convert_sequentially(text, task_url, us_url)
+
+        def is_word(position: int) -> bool:
+            return 0 <= position < len(text) and WORD_CHAR_RE.match(text, position) is not None
+
+        def starts_link(position: int) -> bool:
+            # Una referencia "Tarea N"/"HU #N" en esa posición empieza con "[" tras reescribirse
+            return bool(
+                TASK_REFERENCE_RE.match(text, position) or STORY_REFERENCE_RE.match(text, position)
+            )
+
+        parts: List[str] = []
+        last = 0
+        previous_link_end = -1
+        for match in REFERENCE_RE.finditer(text):
+            task_ref, kind, story_ref, bare_ref = match.groups()
+            start, end = match.span()
+            if task_ref is not None:
+                # El "#N" del texto del link también se convierte (tercer reemplazo)
+                replacement = f"[Tarea [#{task_ref}]({us_url}{task_ref})]({task_url}{task_ref})"
+            elif story_ref is not None:
+                replacement = f"[{kind} [#{story_ref}]({us_url}{story_ref})]({us_url}{story_ref})"
+            else:
+                # "#N" suelto: no debe estar pegado a caracteres de palabra, teniendo en
+                # cuenta que los links vecinos ya reescritos empiezan con "[" y terminan en ")"
+                if start != previous_link_end and is_word(start - 1):
+                    continue
+                if is_word(end) and not starts_link(end):
+                    continue
+                replacement = f"[#{bare_ref}]({us_url}{bare_ref})"
+                parts.append(text[last:start])
+                parts.append(replacement)
+                last = end
+                continue
+
+            parts.append(text[last:start])
+            parts.append(replacement)
+            last = previous_link_end = end
+
+        parts.append(text[last:])
+        return "".join(parts)
+
+    @staticmethod
+    def _convert_sequentially(text: str, task_url: str, us_url: str) -> str:
+        """Los tres reemplazos originales aplicados en orden."""
+        text = TASK_REFERENCE_RE.sub(
+            lambda m: f"[Tarea #{m.group(1)}]({task_url}{m.group(1)})", text
         )
-
-        # Patrón para "HU #N" o "US #N"
-        text = re.sub(
-            r"(HU|US) #(\d+)",
-            lambda m: (
-                f"[{m.group(1)} #{m.group(2)}]"
-                f"({self.taiga_base_url}/project/{project_slug}/us/{m.group(2)})"
-            ),
-            text,
+        text = STORY_REFERENCE_RE.sub(
+            lambda m: f"[{m.group(1)} #{m.group(2)}]({us_url}{m.group(2)})", text
         )
-
-        # Patrón para "#N" solo
-        text = re.sub(
-            r"(?<!\w)#(\d+)(?!\w)",
-            lambda m: (
-                f"[#{m.group(1)}]" f"({self.taiga_base_url}/project/{project_slug}/us/{m.group(1)})"
-            ),
-            text,
+        return re.sub(
+            r"(?<!\w)#(\d+)(?!\w)", lambda m: f"[#{m.group(1)}]({us_url}{m.group(1)})", text
         )
-
-        return text
@@ -8,16 +8,60 @@ Métricas incluidas:
 - Velocidad de sprint (story points completados)
 - Tareas estancadas (en progreso > X días)
 - Timeline de actividad y comentarios
+- Cycle time, lead time y tiempo en cada estado (desde status_history)
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Type, Union
 
-from sqlalchemy import and_, func, or_, select
+from sqlalchemy import JSON, DateTime, String, and_, case, func, literal, or_, select, union_all
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-
-from app.models import Epic, Project, Task, UserStory
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.selectable import CompoundSelect, ScalarSelect, Select
+
+from app.models import ActivityEvent, Epic, Project, StatusTransition, Task, UserStory
+
+# Descripción legible de cada tipo de evento del feed de actividad
+ACTIVITY_DESCRIPTIONS = {
+    "user_story_created": "User Story #{ref} created",
+    "user_story_updated": "User Story #{ref} updated",
+    "user_story_status_changed": "User Story #{ref} moved to {status}",
+    "task_created": "Task #{ref} created",
+    "task_updated": "Task #{ref} updated",
+    "task_status_changed": "Task #{ref} moved to {status}",
+}
+
+# `kind` de las filas de la tabla events dentro del UNION ALL del feed (los
+# eventos inferidos usan 0-3); desempata el orden keyset entre ambas fuentes
+EVENT_LOG_KIND = 4
+
+# Etiqueta para items sin milestone asignado
+NO_SPRINT_LABEL = "(sin sprint)"
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentil con interpolación lineal sobre una lista ya ordenada."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def _distribution(values: List[float]) -> Dict:
+    """Resumen estadístico (promedio y percentiles p50/p85/p95) redondeado."""
+    ordered = sorted(values)
+    return {
+        "samples": len(ordered),
+        "avg": round(sum(ordered) / len(ordered), 2) if ordered else 0.0,
+        "p50": round(_percentile(ordered, 50), 2),
+        "p85": round(_percentile(ordered, 85), 2),
+        "p95": round(_percentile(ordered, 95), 2),
+    }
 
 
 class MetricsExporter:
@@ -188,120 +232,384 @@ class MetricsExporter:
         project_id: int,
         limit: int = 50,
         hours: int = 168,  # 1 semana por defecto
+        cursor: Optional[str] = None,
     ) -> List[Dict]:
         """
-        Obtiene feed de actividad: creación, modificación y comentarios.
+        Obtiene feed de actividad: creación y modificación de user stories y tareas.
 
         Args:
             project_id: ID del proyecto
             limit: Número máximo de eventos
             hours: Horas atrás para buscar actividad
+            cursor: Cursor opaco devuelto por la página anterior (keyset)
 
         Returns:
             Lista de eventos de actividad ordenados por fecha
         """
+        page = await self.get_activity_feed_page(project_id, limit, hours, cursor)
+        activities: List[Dict] = page["activities"]
+        return activities
+
+    async def get_activity_feed_page(
+        self,
+        project_id: int,
+        limit: int = 50,
+        hours: int = 168,
+        cursor: Optional[str] = None,
+    ) -> Dict:
+        """
+        Página del feed de actividad resuelta íntegramente en la base de datos.
+
+        La fuente principal es la tabla `events` que escribe la sincronización
+        (incluye cambios intermedios y transiciones de estado). La tabla sólo
+        cubre desde el primer evento registrado del proyecto: lo anterior (o
+        todo, si el proyecto todavía no tiene eventos) se infiere de la
+        creación/modificación de user stories y tareas. Ambas fuentes van en un
+        único UNION ALL que sólo proyecta las columnas necesarias; el orden, el
+        LIMIT y el cursor keyset (timestamp, kind, id) se aplican en SQL, por lo
+        que paginar hacia atrás no carga la ventana completa en memoria y un
+        cursor sigue siendo válido cuando aparecen los primeros eventos.
+
+        Returns:
+            Diccionario con "activities" y "next_cursor" (None en la última página)
+        """
         cutoff_date = datetime.now() - timedelta(hours=hours)
+        events = self._activity_events_query(project_id, cutoff_date).subquery("events")
+
+        query = select(events)
+        if cursor:
+            cursor_ts, cursor_kind, cursor_id = self._decode_activity_cursor(cursor)
+            query = query.where(
+                or_(
+                    events.c.timestamp < cursor_ts,
+                    and_(events.c.timestamp == cursor_ts, events.c.kind < cursor_kind),
+                    and_(
+                        events.c.timestamp == cursor_ts,
+                        events.c.kind == cursor_kind,
+                        events.c.entity_id < cursor_id,
+                    ),
+                )
+            )
+        query = query.order_by(
+            events.c.timestamp.desc(), events.c.kind.desc(), events.c.entity_id.desc()
+        ).limit(limit + 1)
+
+        result = await self.db.execute(query)
+        rows = result.all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = self._encode_activity_cursor(last.timestamp, last.kind, last.entity_id)
+
+        return {
+            "activities": [self._format_activity(row) for row in rows],
+            "next_cursor": next_cursor,
+        }
+
+    def _activity_events_query(self, project_id: int, cutoff_date: datetime) -> CompoundSelect:
+        """
+        Construye el UNION ALL del feed: la tabla `events` más los eventos
+        inferidos de user stories y tareas anteriores al primer evento registrado.
+        """
+        log_start = (
+            select(func.min(ActivityEvent.occurred_at))
+            .where(ActivityEvent.project_id == project_id)
+            .scalar_subquery()
+        )
+
+        def _events(
+            model: Union[Type[UserStory], Type[Task]],
+            event_type: str,
+            kind: int,
+            updated: bool,
+            status: ColumnElement[str],
+        ) -> Select:
+            if updated:
+                timestamp_col = model.modified_date
+                author_key = "modified_by_extra_info"
+                conditions = [timestamp_col >= cutoff_date, timestamp_col != model.created_date]
+            else:
+                timestamp_col = model.created_date
+                author_key = "owner_extra_info"
+                conditions = [timestamp_col >= cutoff_date]
+
+            return select(
+                timestamp_col.label("timestamp"),
+                literal(kind).label("kind"),
+                literal(event_type).label("type"),
+                model.id.label("entity_id"),
+                model.ref.label("ref"),
+                model.subject.label("subject"),
+                model.raw_data[(author_key, "full_name_display")].as_string().label("author"),
+                status.label("status"),
+                literal(None, type_=JSON).label("changes"),
+            ).where(
+                and_(
+                    model.project_id == project_id,
+                    or_(log_start.is_(None), timestamp_col < log_start),
+                    *conditions,
+                )
+            )
 
-        # Actividad de user stories
-        us_query = select(
-            UserStory.id,
-            UserStory.ref,
-            UserStory.subject,
-            UserStory.modified_date,
-            UserStory.created_date,
-            UserStory.raw_data,
+        event_log = select(
+            ActivityEvent.occurred_at.label("timestamp"),
+            literal(EVENT_LOG_KIND).label("kind"),
+            (ActivityEvent.entity_type + "_" + ActivityEvent.event_type).label("type"),
+            ActivityEvent.id.label("entity_id"),
+            ActivityEvent.entity_ref.label("ref"),
+            ActivityEvent.subject.label("subject"),
+            ActivityEvent.actor.label("author"),
+            ActivityEvent.to_status.label("status"),
+            ActivityEvent.changes.label("changes"),
         ).where(
             and_(
-                UserStory.project_id == project_id,
-                or_(
-                    UserStory.modified_date >= cutoff_date,
-                    UserStory.created_date >= cutoff_date,
-                ),
+                ActivityEvent.project_id == project_id,
+                ActivityEvent.occurred_at >= cutoff_date,
             )
-        ).order_by(UserStory.modified_date.desc())
-
-        us_result = await self.db.execute(us_query)
-        user_stories = us_result.all()
-
-        # Actividad de tareas
-        task_query = select(
-            Task.id,
-            Task.ref,
-            Task.subject,
-            Task.modified_date,
-            Task.created_date,
-            Task.raw_data,
-            Task.user_story_id,
+        )
+
+        no_status = literal(None, type_=String)
+        task_status = Task.raw_data[("status_extra_info", "name")].as_string()
+
+        return union_all(
+            event_log,
+            _events(UserStory, "user_story_created", 0, False, no_status),
+            _events(UserStory, "user_story_updated", 1, True, no_status),
+            _events(Task, "task_created", 2, False, no_status),
+            _events(Task, "task_updated", 3, True, task_status),
+        )
+
+    @staticmethod
+    def _format_activity(row: Row) -> Dict:
+        """Convierte una fila del UNION ALL al formato de evento del feed."""
+        activity = {
+            "timestamp": row.timestamp.isoformat(),
+            "type": row.type,
+            "ref": row.ref,
+            "subject": row.subject,
+            "description": ACTIVITY_DESCRIPTIONS[row.type].format(ref=row.ref, status=row.status),
+            "author": row.author,
+        }
+        if row.kind == EVENT_LOG_KIND:
+            activity["changes"] = row.changes or {}
+        if row.type.startswith("task_") and row.type != "task_created":
+            activity["status"] = row.status
+        return activity
+
+    @staticmethod
+    def _encode_activity_cursor(timestamp: datetime, kind: int, entity_id: int) -> str:
+        return f"{timestamp.isoformat()}|{kind}|{entity_id}"
+
+    @staticmethod
+    def _decode_activity_cursor(cursor: str) -> Tuple[datetime, int, int]:
+        """Decodifica un cursor `timestamp|kind|id`."""
+        try:
+            raw_ts, raw_kind, raw_id = cursor.split("|")
+            return datetime.fromisoformat(raw_ts), int(raw_kind), int(raw_id)
+        except ValueError as exc:
+            raise ValueError(f"Cursor de actividad inválido: {cursor}") from exc
+
+    def _status_timeline_query(self, project_id: int, entity_type: str) -> Select:
+        """
+        Historial de estados con funciones ventana por entidad.
+
+        Agrega a cada transición su número de orden (`seq`) y el momento en que
+        se abandonó ese estado (`left_at`, LEAD de la siguiente transición).
+        """
+        partition = (StatusTransition.entity_type, StatusTransition.entity_id)
+        ordering = (StatusTransition.changed_at, StatusTransition.id)
+        return select(
+            StatusTransition.entity_id,
+            StatusTransition.to_status,
+            StatusTransition.to_closed,
+            StatusTransition.changed_at,
+            func.row_number().over(partition_by=partition, order_by=ordering).label("seq"),
+            func.lead(StatusTransition.changed_at, type_=DateTime)
+            .over(partition_by=partition, order_by=ordering)
+            .label("left_at"),
         ).where(
             and_(
-                Task.project_id == project_id,
-                or_(
-                    Task.modified_date >= cutoff_date,
-                    Task.created_date >= cutoff_date,
+                StatusTransition.project_id == project_id,
+                StatusTransition.entity_type == entity_type,
+            )
+        )
+
+    @staticmethod
+    def _sprint_column(entity_type: str, entity_id_col: ColumnElement[int]) -> ScalarSelect:
+        """Milestone actual de la entidad (las tareas heredan el de su user story)."""
+        if entity_type == "task":
+            return (
+                select(UserStory.milestone_name)
+                .join(Task, Task.user_story_id == UserStory.id)
+                .where(Task.id == entity_id_col)
+                .scalar_subquery()
+            )
+        return (
+            select(UserStory.milestone_name)
+            .where(UserStory.id == entity_id_col)
+            .scalar_subquery()
+        )
+
+    async def _flow_durations(
+        self, project_id: int, entity_type: str, sprint: Optional[str]
+    ) -> List[Row]:
+        """
+        Fechas de creación, inicio y cierre por entidad calculadas en SQL.
+
+        - created_at: `created_date` de la entidad (no depende de que el
+          historial exista desde su creación)
+        - started_at: primera transición posterior a la creación
+        - closed_at: primera transición a un estado cerrado
+
+        Sólo devuelve entidades cerradas y, si se pide, del sprint indicado.
+        """
+        model = Task if entity_type == "task" else UserStory
+        timeline = self._status_timeline_query(project_id, entity_type).subquery("timeline")
+        per_entity = (
+            select(
+                timeline.c.entity_id,
+                func.min(model.created_date).label("created_at"),
+                func.min(
+                    case((timeline.c.changed_at > model.created_date, timeline.c.changed_at))
+                ).label("started_at"),
+                func.min(case((timeline.c.to_closed.is_(True), timeline.c.changed_at))).label(
+                    "closed_at"
                 ),
             )
-        ).order_by(Task.modified_date.desc())
-
-        task_result = await self.db.execute(task_query)
-        tasks = task_result.all()
-
-        # Combinar y formatear actividad
-        activities = []
-
-        for us in user_stories:
-            raw_data = us.raw_data or {}
-
-            # Evento de creación
-            if us.created_date >= cutoff_date:
-                activities.append({
-                    "timestamp": us.created_date.isoformat(),
-                    "type": "user_story_created",
-                    "ref": us.ref,
-                    "subject": us.subject,
-                    "description": f"User Story #{us.ref} created",
-                    "author": raw_data.get("owner_extra_info", {}).get("full_name_display"),
-                })
-
-            # Evento de modificación
-            if us.modified_date and us.modified_date >= cutoff_date and us.modified_date != us.created_date:
-                activities.append({
-                    "timestamp": us.modified_date.isoformat(),
-                    "type": "user_story_updated",
-                    "ref": us.ref,
-                    "subject": us.subject,
-                    "description": f"User Story #{us.ref} updated",
-                    "author": raw_data.get("modified_by_extra_info", {}).get("full_name_display"),
-                })
+            .join(model, model.id == timeline.c.entity_id)
+            .group_by(timeline.c.entity_id)
+            .subquery("per_entity")
+        )
+        sprint_col = self._sprint_column(entity_type, per_entity.c.entity_id)
+        query = select(per_entity, sprint_col.label("sprint")).where(
+            per_entity.c.closed_at.isnot(None)
+        )
+        if sprint is not None:
+            query = query.where(sprint_col == sprint)
 
-        for task in tasks:
-            raw_data = task.raw_data or {}
+        return list((await self.db.execute(query)).all())
+
+    @staticmethod
+    def _group_days_by_sprint(samples: List[tuple]) -> List[Dict]:
+        by_sprint: Dict[str, List[float]] = {}
+        for sprint_name, days in samples:
+            by_sprint.setdefault(sprint_name or NO_SPRINT_LABEL, []).append(days)
+
+        metrics = []
+        for sprint_name in sorted(by_sprint):
+            stats = _distribution(by_sprint[sprint_name])
+            metrics.append({
+                "sprint": sprint_name,
+                "items": stats["samples"],
+                "avg_days": stats["avg"],
+                "p50_days": stats["p50"],
+                "p85_days": stats["p85"],
+                "p95_days": stats["p95"],
+            })
+        return metrics
+
+    async def get_lead_time(
+        self,
+        project_id: int,
+        entity_type: str = "user_story",
+        sprint: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Lead time por sprint: días desde la creación de la entidad
+        (`created_date`) hasta el primer cierre registrado.
+
+        Args:
+            project_id: ID del proyecto
+            entity_type: "user_story" o "task"
+            sprint: Restringir a un milestone concreto
+
+        Returns:
+            Lista por sprint con promedio y percentiles (p50/p85/p95) en días
+        """
+        rows = await self._flow_durations(project_id, entity_type, sprint)
+        samples = [
+            (row.sprint, (row.closed_at - row.created_at).total_seconds() / 86400)
+            for row in rows
+        ]
+        return self._group_days_by_sprint(samples)
+
+    async def get_cycle_time(
+        self,
+        project_id: int,
+        entity_type: str = "user_story",
+        sprint: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Cycle time por sprint: días desde el primer cambio de estado posterior a
+        la creación (inicio del trabajo) hasta el primer cierre.
 
-            # Evento de creación
-            if task.created_date >= cutoff_date:
-                activities.append({
-                    "timestamp": task.created_date.isoformat(),
-                    "type": "task_created",
-                    "ref": task.ref,
-                    "subject": task.subject,
-                    "description": f"Task #{task.ref} created",
-                    "author": raw_data.get("owner_extra_info", {}).get("full_name_display"),
-                })
-
-            # Evento de modificación
-            if task.modified_date and task.modified_date >= cutoff_date and task.modified_date != task.created_date:
-                activities.append({
-                    "timestamp": task.modified_date.isoformat(),
-                    "type": "task_updated",
-                    "ref": task.ref,
-                    "subject": task.subject,
-                    "description": f"Task #{task.ref} updated",
-                    "author": raw_data.get("modified_by_extra_info", {}).get("full_name_display"),
-                    "status": raw_data.get("status_extra_info", {}).get("name"),
-                })
-
-        # Ordenar por timestamp descendente y limitar
-        activities.sort(key=lambda x: x["timestamp"], reverse=True)
-        return activities[:limit]
+        Returns:
+            Lista por sprint con promedio y percentiles (p50/p85/p95) en días
+        """
+        rows = await self._flow_durations(project_id, entity_type, sprint)
+        samples = [
+            (row.sprint, (row.closed_at - row.started_at).total_seconds() / 86400)
+            for row in rows
+            if row.started_at is not None
+        ]
+        return self._group_days_by_sprint(samples)
+
+    async def get_time_in_status(
+        self,
+        project_id: int,
+        entity_type: str = "user_story",
+        sprint: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Percentiles de tiempo en cada estado, por sprint.
+
+        La duración de cada estado se obtiene con LEAD sobre el historial; el
+        estado actual de los items abiertos cuenta hasta ahora.
+
+        Returns:
+            Lista por (sprint, estado) con promedio y percentiles en horas
+        """
+        timeline = self._status_timeline_query(project_id, entity_type).subquery("timeline")
+        sprint_col = self._sprint_column(entity_type, timeline.c.entity_id)
+        query = select(
+            timeline.c.to_status,
+            timeline.c.changed_at,
+            timeline.c.left_at,
+            sprint_col.label("sprint"),
+        ).where(
+            and_(
+                timeline.c.to_status.isnot(None),
+                # Estado final: no acumula tiempo
+                or_(timeline.c.left_at.isnot(None), timeline.c.to_closed.is_(False)),
+            )
+        )
+        if sprint is not None:
+            query = query.where(sprint_col == sprint)
+
+        rows = (await self.db.execute(query)).all()
+        now = datetime.now()
+
+        by_key: Dict[tuple, List[float]] = {}
+        for row in rows:
+            left_at = row.left_at or now
+            hours = (left_at - row.changed_at).total_seconds() / 3600
+            by_key.setdefault((row.sprint or NO_SPRINT_LABEL, row.to_status), []).append(hours)
+
+        metrics = []
+        for sprint_name, status in sorted(by_key):
+            stats = _distribution(by_key[(sprint_name, status)])
+            metrics.append({
+                "sprint": sprint_name,
+                "status": status,
+                "samples": stats["samples"],
+                "avg_hours": stats["avg"],
+                "p50_hours": stats["p50"],
+                "p85_hours": stats["p85"],
+                "p95_hours": stats["p95"],
+            })
+        return metrics
 
     def _calculate_severity(self, days_stuck: int, threshold: int) -> str:
         """
@@ -377,3 +685,53 @@ class MetricsExporter:
                 "user_stories": round((us_done or 0) / (us_count or 1) * 100, 2),
             },
         }
+
+    async def get_project_snapshots(self) -> List[Dict]:
+        """
+        Agregados de todos los proyectos para los gauges de Prometheus.
+
+        Usa una consulta agrupada por tabla (no una por proyecto), de modo que el
+        coste no crece con la cantidad de proyectos sincronizados.
+
+        Returns:
+            Lista con conteos de user stories/tareas y story points por proyecto
+        """
+        closed_us = case((UserStory.is_closed.is_(True), 1), else_=0)
+        us_rows = await self.db.execute(
+            select(
+                UserStory.project_id,
+                func.count(UserStory.id),
+                func.sum(closed_us),
+                func.sum(func.coalesce(UserStory.total_points, 0)),
+                func.sum(func.coalesce(UserStory.total_points, 0) * closed_us),
+            ).group_by(UserStory.project_id)
+        )
+        closed_task = case((Task.is_closed.is_(True), 1), else_=0)
+        task_rows = await self.db.execute(
+            select(Task.project_id, func.count(Task.id), func.sum(closed_task)).group_by(
+                Task.project_id
+            )
+        )
+        projects = await self.db.execute(select(Project.id, Project.slug))
+
+        snapshots: Dict[int, Dict] = {
+            project_id: {
+                "project": slug,
+                "user_stories": {"total": 0, "closed": 0},
+                "tasks": {"total": 0, "closed": 0},
+                "points": {"total": 0.0, "closed": 0.0},
+            }
+            for project_id, slug in projects.all()
+        }
+        for project_id, total, closed, points, closed_points in us_rows.all():
+            if project_id in snapshots:
+                snapshots[project_id]["user_stories"] = {"total": total, "closed": closed or 0}
+                snapshots[project_id]["points"] = {
+                    "total": float(points or 0),
+                    "closed": float(closed_points or 0),
+                }
+        for project_id, total, closed in task_rows.all():
+            if project_id in snapshots:
+                snapshots[project_id]["tasks"] = {"total": total, "closed": closed or 0}
+
+        return list(snapshots.values())
@@ -7,7 +7,18 @@ These models represent the local synchronized copy of Taiga data.
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import JSON, DateTime, ForeignKey, Integer, String, Text, Float
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -32,6 +43,8 @@ class Project(Base):
 
     # Sync metadata
     last_synced: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Bumped whenever synced data or the draft board changes; keys rendered-page caches
+    data_version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
 
     # Relationships
     epics: Mapped[List["Epic"]] = relationship("Epic", back_populates="project", cascade="all, delete-orphan")
@@ -81,6 +94,10 @@ class UserStory(Base):
     """User Story model - user-facing feature."""
 
     __tablename__ = "user_stories"
+    __table_args__ = (
+        Index("ix_user_stories_project_created", "project_id", "created_date"),
+        Index("ix_user_stories_project_modified", "project_id", "modified_date"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     taiga_id: Mapped[int] = mapped_column(Integer, unique=True, index=True)
@@ -124,6 +141,10 @@ class Task(Base):
     """Task model - smallest unit of work."""
 
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_project_created", "project_id", "created_date"),
+        Index("ix_tasks_project_modified", "project_id", "modified_date"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     taiga_id: Mapped[int] = mapped_column(Integer, unique=True, index=True)
@@ -229,3 +250,129 @@ class DraftBoard(Base):
 
     def __repr__(self) -> str:
         return f"<DraftBoard(project_id={self.project_id}, updated_at='{self.updated_at}')>"
+
+
+class ActivityEvent(Base):
+    """Append-only activity log populated by sync when an entity changes."""
+
+    __tablename__ = "events"
+    __table_args__ = (Index("ix_events_project_occurred", "project_id", "occurred_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), nullable=False)
+
+    # Entity that changed ("user_story" or "task") and its local/Taiga identifiers
+    entity_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    entity_taiga_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    entity_ref: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    subject: Mapped[str] = mapped_column(String(500), nullable=False)
+
+    # "created", "updated" or "status_changed"
+    event_type: Mapped[str] = mapped_column(String(30), nullable=False)
+    # Field-level diff summary: {field: {"old": ..., "new": ...}}
+    changes: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    from_status: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    to_status: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    actor: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+
+    # When it happened in Taiga and when sync recorded it
+    occurred_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    recorded_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return (
+            f"<ActivityEvent(id={self.id}, entity_type='{self.entity_type}', "
+            f"entity_id={self.entity_id}, event_type='{self.event_type}')>"
+        )
+
+
+class StatusTransition(Base):
+    """Status history of user stories and tasks, filled by sync on status changes."""
+
+    __tablename__ = "status_history"
+    __table_args__ = (
+        Index("ix_status_history_entity", "entity_type", "entity_id", "changed_at"),
+        Index("ix_status_history_project", "project_id", "entity_type"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), nullable=False)
+    entity_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    from_status: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    to_status: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    from_closed: Mapped[Optional[bool]] = mapped_column(Boolean, nullable=True)
+    to_closed: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    changed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"<StatusTransition(entity_type='{self.entity_type}', entity_id={self.entity_id}, "
+            f"to_status='{self.to_status}', changed_at='{self.changed_at}')>"
+        )
+
+
+class StoryProposal(Base):
+    """Cached AIReorganizer inference for a user story, refreshed by sync."""
+
+    __tablename__ = "story_proposals"
+
+    user_story_id: Mapped[int] = mapped_column(
+        ForeignKey("user_stories.id", ondelete="CASCADE"), primary_key=True
+    )
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), nullable=False, index=True)
+
+    # Cache key: hash of subject + description and version of the module definitions
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    modules_version: Mapped[str] = mapped_column(String(32), nullable=False)
+
+    proposed_module: Mapped[str] = mapped_column(String(100), nullable=False)
+    confidence: Mapped[float] = mapped_column(Float, nullable=False)
+    proposed_tags: Mapped[list] = mapped_column(JSON, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return (
+            f"<StoryProposal(user_story_id={self.user_story_id}, "
+            f"proposed_module='{self.proposed_module}', confidence={self.confidence})>"
+        )
+
+
+class AuthSession(Base):
+    """Taiga auth token shared by every worker (see app.auth.DatabaseSessionBackend).
+
+    The token is stored in plaintext: access to this table grants Taiga access.
+    """
+
+    __tablename__ = "auth_sessions"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    token: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<AuthSession(key='{self.key}', expires_at={self.expires_at})>"
+
+
+class TaigaResponseCacheEntry(Base):
+    """Cached Taiga GET response shared by every worker (see app.response_cache)."""
+
+    __tablename__ = "taiga_response_cache"
+
+    # sha256 of method, path, query params and token
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    path: Mapped[str] = mapped_column(String(255), nullable=False)
+    status_code: Mapped[int] = mapped_column(Integer, nullable=False)
+    headers: Mapped[dict] = mapped_column(JSON, nullable=False)
+    # zlib-compressed response body and its compressed size in bytes
+    body: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<TaigaResponseCacheEntry(path='{self.path}', size={self.size})>"
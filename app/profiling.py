@@ -0,0 +1,315 @@
+"""
+Perfilado por request, a pedido.
+
+Una request con la cabecera `X-Profile: 1` o el parámetro `?profile=1` (y un
+token válido, ver `require_auth`) se ejecuta con:
+
+- un muestreador de stacks (solo stdlib: `sys._current_frames()` desde un
+  hilo aparte cada PROFILE_SAMPLE_INTERVAL segundos) sobre el hilo del event
+  loop y los hilos del executor CPU-bound y del threadpool;
+- un `RequestTrace` en un ContextVar al que los hooks de instrumentación
+  suman cantidad y tiempo por categoría: sentencias SQL (los eventos del
+  engine de `app.query_monitor`), llamadas del TaigaClient (latencia y
+  bytes), operaciones de crud y etapas de render.
+
+Las trazas se apilan: `collect()` activa una traza adicional (la
+sincronización la usa para su propio desglose en SyncStats) sin ocultar la
+del perfil que la contiene.
+
+El resultado queda en memoria (los últimos PROFILE_KEEP) y se descarga desde
+/debug/profiles/{id} como stacks colapsados (formato de flamegraph.pl /
+speedscope) o como JSON. La respuesta perfilada lleva `X-Profile-Id` y un
+`Server-Timing` con el resumen.
+
+El muestreo es por hilo, no por request: si otras requests corren en el
+mismo loop a la vez, sus stacks también aparecen en el perfil.
+"""
+
+import collections
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import FrameType
+from typing import Any, ContextManager, Deque, Dict, Iterator, List, Optional, Tuple
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "true").lower() == "true"
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "300"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+
+PROFILE_HEADER = "x-profile"
+PROFILE_PARAM = "profile"
+
+# Hilos muestreados además del que atiende la request (executor y threadpool)
+WORKER_THREAD_PREFIXES = ("cpu-bound", "AnyIO worker thread", "ThreadPoolExecutor")
+# Un hilo de trabajo cuyo frame más interno está en estos módulos está ocioso
+IDLE_MODULES = ("threading.py", "queue.py", os.path.join("concurrent", "futures", "thread.py"))
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class Span:
+    count: int = 0
+    seconds: float = 0.0
+    bytes: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"count": self.count, "ms": round(self.seconds * 1000, 3)}
+        if self.bytes:
+            data["bytes"] = self.bytes
+        return data
+
+
+@dataclass
+class RequestTrace:
+    """Cantidad y tiempo acumulados por categoría durante una request perfilada."""
+
+    started: float = field(default_factory=time.perf_counter)
+    spans: Dict[str, Span] = field(default_factory=dict)
+
+    def add(self, name: str, seconds: float, size: int = 0) -> None:
+        span = self.spans.setdefault(name, Span())
+        span.count += 1
+        span.seconds += seconds
+        span.bytes += size
+
+    def seconds(self, name: str) -> float:
+        span = self.spans.get(name)
+        return span.seconds if span else 0.0
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {name: span.to_dict() for name, span in sorted(self.spans.items())}
+
+
+# Trazas activas en el contexto actual, de la más externa a la más interna
+_active_traces: ContextVar[Tuple[RequestTrace, ...]] = ContextVar("request_traces", default=())
+
+
+def current_trace() -> Optional[RequestTrace]:
+    traces = _active_traces.get()
+    return traces[-1] if traces else None
+
+
+def record(name: str, seconds: float, size: int = 0) -> None:
+    """Suma una operación a las trazas activas (no-op si no hay ninguna)."""
+    for trace in _active_traces.get():
+        trace.add(name, seconds, size)
+
+
+@contextmanager
+def collect(trace: RequestTrace) -> Iterator[RequestTrace]:
+    """Activa `trace` dentro del bloque, además de las que ya estuvieran activas."""
+    active = _active_traces.get()
+    if any(existing is trace for existing in active):
+        yield trace
+        return
+    token = _active_traces.set(active + (trace,))
+    try:
+        yield trace
+    finally:
+        _active_traces.reset(token)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Mide el bloque y lo suma a las trazas activas."""
+    if not _active_traces.get():
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+# ---------------------------------------------------------------------------
+# Muestreador de stacks
+# ---------------------------------------------------------------------------
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_PROJECT_ROOT):
+        filename = os.path.relpath(filename, _PROJECT_ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _is_idle(frame: FrameType) -> bool:
+    return bool(frame.f_code.co_filename.endswith(IDLE_MODULES))
+
+
+class StackSampler:
+    """Hilo que cuenta stacks colapsados de los hilos observados."""
+
+    def __init__(
+        self,
+        interval: float = PROFILE_SAMPLE_INTERVAL,
+        max_seconds: float = PROFILE_MAX_SECONDS,
+    ) -> None:
+        self.interval = max(interval, 0.001)
+        self.max_seconds = max_seconds
+        self.target_thread = threading.get_ident()
+        self.stacks: collections.Counter[str] = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.max_seconds
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                name = names.get(thread_id, "")
+                if thread_id == self.target_thread:
+                    root = "request"
+                elif name.startswith(WORKER_THREAD_PREFIXES) and not _is_idle(frame):
+                    root = name.split("_")[0]
+                else:
+                    continue
+                labels = []
+                current: Optional[FrameType] = frame
+                while current is not None:
+                    labels.append(_frame_label(current))
+                    current = current.f_back
+                labels.append(root)
+                self.stacks[";".join(reversed(labels))] += 1
+
+
+# ---------------------------------------------------------------------------
+# Perfiles guardados
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Profile:
+    id: str
+    method: str
+    path: str
+    status_code: int
+    created_at: datetime
+    duration_seconds: float
+    interval_seconds: float
+    samples: int
+    stacks: Dict[str, int]
+    spans: Dict[str, Span]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "created_at": self.created_at.isoformat(),
+            "duration_ms": round(self.duration_seconds * 1000, 3),
+            "interval_ms": round(self.interval_seconds * 1000, 3),
+            "samples": self.samples,
+            "spans": {name: value.to_dict() for name, value in sorted(self.spans.items())},
+        }
+
+    def to_dict(self, top: int = 50) -> Dict[str, Any]:
+        data = self.summary()
+        data["top_stacks"] = [
+            {"stack": stack.split(";"), "samples": samples}
+            for stack, samples in collections.Counter(self.stacks).most_common(top)
+        ]
+        return data
+
+    def collapsed(self) -> str:
+        """Stacks colapsados: `frame;frame;... muestras` por línea."""
+        return "".join(f"{stack} {samples}\n" for stack, samples in sorted(self.stacks.items()))
+
+    def server_timing(self) -> str:
+        entries = [
+            f'{name.replace(":", "-")};dur={value.seconds * 1000:.1f};desc="{value.count}x"'
+            for name, value in sorted(self.spans.items())
+        ]
+        entries.append(f"total;dur={self.duration_seconds * 1000:.1f}")
+        return ", ".join(entries)
+
+
+class ProfileStore:
+    """Últimos perfiles capturados, en memoria del proceso."""
+
+    def __init__(self, keep: int = PROFILE_KEEP) -> None:
+        self._profiles: Deque[Profile] = collections.deque(maxlen=max(keep, 1))
+
+    def add(self, profile: Profile) -> None:
+        self._profiles.append(profile)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        return next((p for p in self._profiles if p.id == profile_id), None)
+
+    def list(self) -> List[Profile]:
+        return list(reversed(self._profiles))
+
+    def clear(self) -> None:
+        self._profiles.clear()
+
+
+profile_store = ProfileStore()
+
+
+def profiling_requested(headers: Any, query_params: Any) -> bool:
+    """Si la request pide perfilado (cabecera X-Profile o ?profile=)."""
+    if not PROFILING_ENABLED:
+        return False
+    flag = headers.get(PROFILE_HEADER) or query_params.get(PROFILE_PARAM)
+    return flag is not None and flag.strip().lower() not in ("", "0", "false", "no")
+
+
+class RequestProfiler:
+    """Perfila un bloque de código: traza en el ContextVar más muestreo de stacks."""
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL) -> None:
+        self.trace = RequestTrace()
+        self.sampler = StackSampler(interval)
+        self.duration = 0.0
+        self._collecting: ContextManager[RequestTrace] = collect(self.trace)
+
+    def __enter__(self) -> "RequestProfiler":
+        self._collecting.__enter__()
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.sampler.stop()
+        self.duration = time.perf_counter() - self.trace.started
+        self._collecting.__exit__(*exc_info)
+
+    def result(self, method: str, path: str, status_code: int) -> Profile:
+        return Profile(
+            id=uuid.uuid4().hex[:12],
+            method=method,
+            path=path,
+            status_code=status_code,
+            created_at=datetime.utcnow(),
+            duration_seconds=self.duration,
+            interval_seconds=self.sampler.interval,
+            samples=self.sampler.samples,
+            stacks=dict(self.sampler.stacks),
+            spans=dict(self.trace.spans),
+        )
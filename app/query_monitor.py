@@ -0,0 +1,172 @@
+"""
+Conteo de sentencias SQL por request y detección de N+1.
+
+Es la única instrumentación SQL de la app: los eventos
+`before/after_cursor_execute` de SQLAlchemy (registrados sobre la clase
+Engine, así que cubren todos los engines, también los de tests) miden cada
+sentencia una sola vez si hay algo que la consuma, y el tiempo va tanto a las
+`QueryStats` activas en un ContextVar como al span "sql" de las trazas de
+`app.profiling`. Las QueryStats llevan cantidad de sentencias, tiempo total
+en la base y cuántas veces se repitió cada forma de sentencia (el SQL con los
+parámetros ya reemplazados por marcadores y las listas IN colapsadas). Una
+forma repetida SQL_N_PLUS_ONE_THRESHOLD veces o más en la misma request se
+marca como sospecha de N+1: consultas por fila dentro de un loop, accesos
+lazy a relaciones, búsquedas de tags una a una.
+
+El middleware de la app exporta el resultado por ruta a Prometheus y, con
+SQL_DEBUG_HEADERS=true, lo agrega a la respuesta (X-SQL-Queries,
+X-SQL-Time-Ms, X-SQL-N-Plus-One, con las sentencias hechas hasta que
+empieza la respuesta). En tests, `track()` permite acotar la
+cantidad de sentencias de un bloque:
+
+    with query_monitor.track() as stats:
+        await crud.list_userstories(db)
+    assert stats.count <= 2 and not stats.suspected_n_plus_one()
+"""
+
+import collections
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, ExecutionContext
+
+from app import profiling
+
+logger = logging.getLogger(__name__)
+
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "10"))
+SQL_DEBUG_HEADERS = os.getenv("SQL_DEBUG_HEADERS", "false").lower() == "true"
+
+# Largo máximo de la forma de sentencia incluida en cabeceras y logs
+SHAPE_PREVIEW_CHARS = 160
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|:\w+\b|%s")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_NUMBER = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+    """Forma normalizada de una sentencia: marcadores `?` e IN (...) colapsados."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    return _PLACEHOLDER_LIST.sub("(?...)", shape)
+
+
+@dataclass
+class QueryStats:
+    """Sentencias ejecutadas dentro de un bloque (una request, un test)."""
+
+    count: int = 0
+    seconds: float = 0.0
+    shapes: collections.Counter[str] = field(default_factory=collections.Counter)
+
+    def add(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def suspected_n_plus_one(
+        self, threshold: int = SQL_N_PLUS_ONE_THRESHOLD
+    ) -> List[Tuple[str, int]]:
+        """Formas repetidas `threshold` veces o más, de la más repetida a la menos."""
+        if threshold <= 0:
+            return []
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-SQL-Queries": str(self.count),
+            "X-SQL-Time-Ms": f"{self.seconds * 1000:.1f}",
+        }
+        suspects = self.suspected_n_plus_one()
+        if suspects:
+            shape, repeated = suspects[0]
+            preview = shape[:SHAPE_PREVIEW_CHARS].encode("latin-1", "replace").decode("latin-1")
+            headers["X-SQL-N-Plus-One"] = f"{len(suspects)}; top={repeated}x {preview}"
+        return headers
+
+
+_active_stats: ContextVar[Tuple[QueryStats, ...]] = ContextVar("query_stats", default=())
+
+
+@contextmanager
+def track() -> Iterator[QueryStats]:
+    """Cuenta las sentencias ejecutadas dentro del bloque (anidable)."""
+    stats = QueryStats()
+    token = _active_stats.set(_active_stats.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active_stats.reset(token)
+
+
+def current_stats() -> Optional[QueryStats]:
+    active = _active_stats.get()
+    return active[-1] if active else None
+
+
+def _before_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Optional[ExecutionContext],
+    executemany: bool,
+) -> None:
+    if context is not None and (_active_stats.get() or profiling.current_trace() is not None):
+        setattr(context, "_sql_started", time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Optional[ExecutionContext],
+    executemany: bool,
+) -> None:
+    started: Optional[float] = getattr(context, "_sql_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    for stats in _active_stats.get():
+        stats.add(statement, elapsed)
+    profiling.record("sql", elapsed)
+
+
+def install() -> None:
+    """Registra los eventos en la clase Engine (idempotente)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def report(route: str, stats: QueryStats) -> None:
+    """Exporta las sentencias de una request por ruta y avisa si hay sospecha de N+1."""
+    from app import telemetry
+
+    suspects = stats.suspected_n_plus_one()
+    telemetry.observe_request_sql(route, stats.count, stats.seconds, len(suspects))
+    if suspects:
+        shape, repeated = suspects[0]
+        logger.warning(
+            "Posible N+1 en %s: %s sentencias, '%s' repetida %s veces",
+            route,
+            stats.count,
+            shape[:SHAPE_PREVIEW_CHARS],
+            repeated,
+        )
+
+
+install()
@@ -0,0 +1,81 @@
+"""
+Caché en memoria de páginas renderizadas.
+
+Guarda el HTML ya renderizado por clave (proyecto, data_version, variante) con
+política LRU. La clave incluye la versión de datos del proyecto, así que una
+sincronización o un guardado del borrador invalidan la entrada de forma
+implícita: la versión nueva nunca coincide con la cacheada.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+# Cantidad máxima de páginas renderizadas en memoria (0 = desactivado)
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "32"))
+
+
+class RenderCache:
+    """LRU acotado de cuerpos HTML renderizados."""
+
+    def __init__(self, max_entries: int = RENDER_CACHE_SIZE) -> None:
+        self.max_entries = max(max_entries, 0)
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def set(self, key: Hashable, body: bytes) -> None:
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+table_map_cache = RenderCache()
+# Respuestas JSON de los endpoints de detalle que el table map carga bajo demanda
+details_cache = RenderCache(max_entries=RENDER_CACHE_SIZE * 32)
+
+
+def weak_etag(*parts: object) -> str:
+    """ETag débil (hash corto) a partir de los componentes de la clave de caché."""
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode("utf-8"), digest_size=8)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (admite listas y `*`)."""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any((c[2:] if c.startswith("W/") else c) == opaque for c in candidates)
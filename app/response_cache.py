@@ -0,0 +1,248 @@
+"""
+Caché persistente de respuestas GET de Taiga, compartida entre workers.
+
+Segundo nivel detrás del TaigaClient: las respuestas 200 se guardan en la
+tabla `taiga_response_cache` de la base existente (sin Redis), con el cuerpo
+JSON comprimido con zlib. La clave es la firma de la request (método, path,
+parámetros y un hash del token, para no compartir respuestas entre
+credenciales distintas), así que un worker recién iniciado —o el mismo tras
+un reinicio— sirve de inmediato lo que otro ya trajo de Taiga.
+
+- TAIGA_RESPONSE_CACHE_TTL: segundos de vigencia de cada entrada (0, el valor
+  por defecto, la desactiva: es opt-in porque los endpoints proxy pueden
+  devolver hasta TTL segundos de atraso respecto de lo editado en Taiga).
+- TAIGA_RESPONSE_CACHE_MAX_BYTES: tamaño comprimido máximo; al superarlo se
+  descartan primero las entradas vencidas y luego las más antiguas.
+
+Las escrituras no bloquean la request: `schedule_set` deja la respuesta en
+memoria (visible de inmediato para este worker) y una única tarea de fondo
+las vuelca a la tabla en una sola transacción. Las mutaciones
+(crear/actualizar/borrar) invalidan solo las entradas del recurso tocado
+(`invalidate("tasks")` borra `tasks` y `tasks/...`). La sincronización y
+las lecturas previas a una escritura con `version` (el control de
+concurrencia optimista de Taiga) la saltean para leer siempre de Taiga
+(aunque siguen guardando lo que traen, así que también la precalientan).
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import zlib
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, NamedTuple, Optional
+
+import httpx
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import telemetry
+
+if TYPE_CHECKING:
+    from app.models import TaigaResponseCacheEntry
+
+logger = logging.getLogger(__name__)
+
+TAIGA_RESPONSE_CACHE_TTL = int(os.getenv("TAIGA_RESPONSE_CACHE_TTL", "0"))
+TAIGA_RESPONSE_CACHE_MAX_BYTES = int(
+    os.getenv("TAIGA_RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+)
+
+# Cabeceras de la respuesta que se conservan (paginación y tipo de contenido)
+KEPT_HEADERS = ("content-type", "x-pagination-next", "x-pagination-count")
+
+# Cada cuántas escrituras se verifica el tamaño total de la tabla
+PRUNE_EVERY = 50
+
+
+class CachedResponse(NamedTuple):
+    status_code: int
+    content: bytes
+    headers: Dict[str, str]
+
+    def to_response(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            self.status_code, content=self.content, headers=self.headers, request=request
+        )
+
+
+class TaigaResponseCache:
+    """Caché de respuestas de Taiga en una tabla de la base de datos."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        ttl_seconds: int = TAIGA_RESPONSE_CACHE_TTL,
+        max_bytes: int = TAIGA_RESPONSE_CACHE_MAX_BYTES,
+        compress_level: int = 6,
+    ) -> None:
+        self.session_factory = session_factory
+        self.ttl_seconds = max(ttl_seconds, 0)
+        self.max_bytes = max(max_bytes, 0)
+        self.compress_level = compress_level
+        self._writes = 0
+        # Entradas aún no escritas en la tabla y la tarea que las vuelca
+        self._pending: Dict[str, "TaigaResponseCacheEntry"] = {}
+        self._flushing: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    @staticmethod
+    def request_key(method: str, path: str, params: Optional[Dict[str, Any]], token: str) -> str:
+        """Firma de la request: los parámetros se ordenan y el token se hashea."""
+        signature = json.dumps(
+            [
+                method.upper(),
+                path,
+                sorted((str(k), str(v)) for k, v in (params or {}).items()),
+                hashlib.sha256(token.encode("utf-8")).hexdigest(),
+            ]
+        )
+        return hashlib.sha256(signature.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        """Respuesta vigente para la clave, o None (los errores de base cuentan como miss)."""
+        from app.models import TaigaResponseCacheEntry
+
+        entry = self._pending.get(key)
+        if entry is not None and entry.expires_at <= datetime.utcnow():
+            entry = None
+        try:
+            if entry is None:
+                async with self.session_factory() as db:
+                    entry = await db.scalar(
+                        select(TaigaResponseCacheEntry).where(
+                            TaigaResponseCacheEntry.key == key,
+                            TaigaResponseCacheEntry.expires_at > datetime.utcnow(),
+                        )
+                    )
+        except SQLAlchemyError as exc:
+            logger.warning("No se pudo leer la caché de respuestas de Taiga: %s", exc)
+            entry = None
+
+        if entry is None:
+            telemetry.TAIGA_RESPONSE_CACHE.inc(result="miss")
+            return None
+        telemetry.TAIGA_RESPONSE_CACHE.inc(result="hit")
+        return CachedResponse(entry.status_code, zlib.decompress(entry.body), dict(entry.headers))
+
+    def _entry(self, key: str, path: str, response: httpx.Response) -> "TaigaResponseCacheEntry":
+        from app.models import TaigaResponseCacheEntry
+
+        body = zlib.compress(response.content, self.compress_level)
+        now = datetime.utcnow()
+        return TaigaResponseCacheEntry(
+            key=key,
+            path=path[:255],
+            status_code=response.status_code,
+            headers={
+                name: response.headers[name] for name in KEPT_HEADERS if name in response.headers
+            },
+            body=body,
+            size=len(body),
+            created_at=now,
+            expires_at=now + timedelta(seconds=self.ttl_seconds),
+        )
+
+    def schedule_set(self, key: str, path: str, response: httpx.Response) -> None:
+        """
+        Guarda la respuesta sin esperar a la base: queda en memoria y la tarea
+        de fondo la escribe junto con las demás pendientes.
+        """
+        self._pending[key] = self._entry(key, path, response)
+        if self._flushing is None or self._flushing.done():
+            self._flushing = asyncio.get_running_loop().create_task(self._flush_pending())
+
+    async def set(self, key: str, path: str, response: httpx.Response) -> None:
+        """Guarda (o reemplaza) la respuesta y espera a que quede escrita."""
+        self.schedule_set(key, path, response)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Espera a que las entradas pendientes queden escritas en la tabla."""
+        while self._flushing is not None and not self._flushing.done():
+            await asyncio.shield(self._flushing)
+
+    async def _flush_pending(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending, {}
+            try:
+                async with self.session_factory() as db:
+                    for entry in batch.values():
+                        await db.merge(entry)
+                    await db.commit()
+                previous = self._writes
+                self._writes += len(batch)
+                if self._writes // PRUNE_EVERY > previous // PRUNE_EVERY:
+                    await self.prune()
+            except SQLAlchemyError as exc:
+                logger.warning("No se pudo guardar en la caché de respuestas de Taiga: %s", exc)
+
+    async def prune(self) -> int:
+        """
+        Borra las entradas vencidas y, si la tabla sigue superando max_bytes,
+        las más antiguas hasta volver al límite. Devuelve cuántas borró.
+        """
+        from app.models import TaigaResponseCacheEntry as Entry
+
+        async with self.session_factory() as db:
+            result = await db.execute(delete(Entry).where(Entry.expires_at <= datetime.utcnow()))
+            removed = result.rowcount or 0
+
+            total = await db.scalar(select(func.coalesce(func.sum(Entry.size), 0)))
+            if total > self.max_bytes:
+                rows = await db.execute(select(Entry.key, Entry.size).order_by(Entry.created_at))
+                evicted = []
+                for key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    evicted.append(key)
+                    total -= size
+                if evicted:
+                    await db.execute(delete(Entry).where(Entry.key.in_(evicted)))
+                    removed += len(evicted)
+            await db.commit()
+        if removed:
+            telemetry.TAIGA_RESPONSE_CACHE_EVICTIONS.inc(removed)
+        return removed
+
+    async def invalidate(self, *prefixes: str) -> None:
+        """
+        Borra las entradas de los recursos indicados (`"tasks"` cubre `tasks` y
+        `tasks/...`) en una sola sentencia; sin prefijos vacía la caché.
+        """
+        from app.models import TaigaResponseCacheEntry as Entry
+
+        def matches(path: str) -> bool:
+            return not prefixes or any(
+                path == prefix or path.startswith(f"{prefix}/") for prefix in prefixes
+            )
+
+        # Lo pendiente se descarta o se escribe antes del DELETE, nunca después
+        self._pending = {key: e for key, e in self._pending.items() if not matches(e.path)}
+        await self.flush()
+
+        statement = delete(Entry)
+        if prefixes:
+            statement = statement.where(
+                or_(
+                    *(
+                        or_(Entry.path == prefix, Entry.path.like(f"{prefix}/%"))
+                        for prefix in prefixes
+                    )
+                )
+            )
+        try:
+            async with self.session_factory() as db:
+                await db.execute(statement)
+                await db.commit()
+        except SQLAlchemyError as exc:
+            logger.warning("No se pudo invalidar la caché de respuestas de Taiga: %s", exc)
+
+    async def clear(self) -> None:
+        """Vacía la caché."""
+        await self.invalidate()
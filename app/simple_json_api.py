@@ -1,15 +1,15 @@
-from typing import Any, Dict, List, Optional, Union
-from datetime import datetime
-import json
-from urllib.parse import urlparse, parse_qs
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.database import get_db
+from app.crud import get_project_by_slug, get_project_by_taiga_id
+from app.database import get_read_db, get_read_session_factory
 from app.metrics_exporter import MetricsExporter
-from app.crud import get_project_by_taiga_id, get_project_by_slug
+from app.models import Project
 
 router = APIRouter()
 
@@ -25,192 +25,288 @@ class SimpleJsonQuery(BaseModel):
     maxDataPoints: int = 100
     scopedVars: Dict[str, Any] = {}
 
-async def _resolve_project(db: AsyncSession, identifier: Union[int, str]):
+async def _resolve_project(db: AsyncSession, identifier: Union[int, str]) -> Optional[Project]:
     try:
         taiga_id = int(identifier)
         return await get_project_by_taiga_id(db, taiga_id)
     except (ValueError, TypeError):
         return await get_project_by_slug(db, str(identifier))
 
+Table = Tuple[List[Dict[str, str]], List[List[Any]]]
+
+
+async def _sprint_velocity_table(exporter: MetricsExporter, project_id: int, params: Dict) -> Table:
+    sprint_count = int(params.get("sprint_count", 6))
+    metrics = await exporter.get_sprint_velocity(project_id, sprint_count)
+
+    columns = [
+        {"text": "Sprint", "type": "string"},
+        {"text": "Tasks Completed", "type": "number"},
+        {"text": "Story Points", "type": "number"}
+    ]
+    rows = []
+    for m in metrics:
+        rows.append([
+            m["sprint_id"],
+            m["tasks_completed"],
+            m["story_points"]
+        ])
+    return columns, rows
+
+
+async def _stuck_tasks_table(exporter: MetricsExporter, project_id: int, params: Dict) -> Table:
+    days = int(params.get("days_threshold", 5))
+    tasks = await exporter.get_stuck_tasks(project_id, days)
+
+    # For Gauge, we need a value. But dashboard also has a Table.
+    # We return a Table with all details.
+    # The Gauge panel can use the Table data if configured to pick a column.
+    columns = [
+        {"text": "ID", "type": "number"},
+        {"text": "Ref", "type": "number"},
+        {"text": "Subject", "type": "string"},
+        {"text": "Status", "type": "string"},
+        {"text": "Days Stuck", "type": "number"},
+        {"text": "Severity", "type": "string"},
+        {"text": "Assigned To", "type": "string"},
+        {"text": "US Ref", "type": "number"}
+    ]
+    rows = []
+    for t in tasks:
+        rows.append([
+            t["task_id"],
+            t["ref"],
+            t["subject"],
+            t["status"],
+            t["days_stuck"],
+            t["severity"],
+            t["assigned_to"] or "",
+            t["user_story_ref"] or 0
+        ])
+    return columns, rows
+
+
+async def _activity_feed_table(exporter: MetricsExporter, project_id: int, params: Dict) -> Table:
+    limit = int(params.get("limit", 50))
+    hours = int(params.get("hours", 168))
+    activities = await exporter.get_activity_feed(
+        project_id, limit, hours, cursor=params.get("cursor")
+    )
+
+    columns = [
+        {"text": "Time", "type": "time"}, # Grafana expects time as number (ms) or ISO string
+        {"text": "Type", "type": "string"},
+        {"text": "Ref", "type": "number"},
+        {"text": "Subject", "type": "string"},
+        {"text": "Description", "type": "string"},
+        {"text": "Author", "type": "string"}
+    ]
+    rows = []
+    for a in activities:
+        # SimpleJson handles ISO strings usually.
+        rows.append([
+            a["timestamp"],
+            a["type"],
+            a["ref"],
+            a["subject"],
+            a["description"],
+            a["author"] or ""
+        ])
+    return columns, rows
+
+
+async def _project_summary_table(exporter: MetricsExporter, project_id: int, params: Dict) -> Table:
+    summary = await exporter.get_project_summary(project_id)
+
+    # Return as a single row table
+    columns = [
+        {"text": "Epics", "type": "number"},
+        {"text": "Total US", "type": "number"},
+        {"text": "US Completed", "type": "number"},
+        {"text": "Total Tasks", "type": "number"},
+        {"text": "Tasks Completed", "type": "number"},
+        {"text": "Task Completion %", "type": "number"},
+        {"text": "US Completion %", "type": "number"}
+    ]
+    rows = [[
+        summary["epics"],
+        summary["user_stories"]["total"],
+        summary["user_stories"]["completed"],
+        summary["tasks"]["total"],
+        summary["tasks"]["completed"],
+        summary["completion_rate"]["tasks"],
+        summary["completion_rate"]["user_stories"]
+    ]]
+    return columns, rows
+
+
+async def _flow_time_table(
+    exporter: MetricsExporter, project_id: int, params: Dict, metric: str
+) -> Table:
+    compute = getattr(exporter, f"get_{metric}")
+    metrics = await compute(
+        project_id, params.get("entity_type", "user_story"), params.get("sprint")
+    )
+
+    columns = [
+        {"text": "Sprint", "type": "string"},
+        {"text": "Items", "type": "number"},
+        {"text": "Avg Days", "type": "number"},
+        {"text": "P50 Days", "type": "number"},
+        {"text": "P85 Days", "type": "number"},
+        {"text": "P95 Days", "type": "number"}
+    ]
+    rows = []
+    for m in metrics:
+        rows.append([
+            m["sprint"],
+            m["items"],
+            m["avg_days"],
+            m["p50_days"],
+            m["p85_days"],
+            m["p95_days"]
+        ])
+    return columns, rows
+
+
+async def _cycle_time_table(exporter: MetricsExporter, project_id: int, params: Dict) -> Table:
+    return await _flow_time_table(exporter, project_id, params, "cycle_time")
+
+
+async def _lead_time_table(exporter: MetricsExporter, project_id: int, params: Dict) -> Table:
+    return await _flow_time_table(exporter, project_id, params, "lead_time")
+
+
+async def _time_in_status_table(exporter: MetricsExporter, project_id: int, params: Dict) -> Table:
+    metrics = await exporter.get_time_in_status(
+        project_id, params.get("entity_type", "user_story"), params.get("sprint")
+    )
+
+    columns = [
+        {"text": "Sprint", "type": "string"},
+        {"text": "Status", "type": "string"},
+        {"text": "Samples", "type": "number"},
+        {"text": "Avg Hours", "type": "number"},
+        {"text": "P50 Hours", "type": "number"},
+        {"text": "P85 Hours", "type": "number"},
+        {"text": "P95 Hours", "type": "number"}
+    ]
+    rows = []
+    for m in metrics:
+        rows.append([
+            m["sprint"],
+            m["status"],
+            m["samples"],
+            m["avg_hours"],
+            m["p50_hours"],
+            m["p85_hours"],
+            m["p95_hours"]
+        ])
+    return columns, rows
+
+
+# Target name -> table builder. /search lists exactly these targets.
+TARGET_HANDLERS: Dict[str, Callable[[MetricsExporter, int, Dict], Awaitable[Table]]] = {
+    "sprint-velocity": _sprint_velocity_table,
+    "stuck-tasks": _stuck_tasks_table,
+    "activity-feed": _activity_feed_table,
+    "project-summary": _project_summary_table,
+    "cycle-time": _cycle_time_table,
+    "lead-time": _lead_time_table,
+    "time-in-status": _time_in_status_table,
+}
+
+
+def _parse_target(target: str, scoped_vars: Dict[str, Any]) -> Tuple[str, Dict[str, str], Any]:
+    """Split a Grafana target (e.g. "/metrics/sprint-velocity?project=3") into its parts."""
+    target_name = target
+    params: Dict[str, str] = {}
+
+    if "?" in target_name:
+        parsed = urlparse(target_name)
+        target_name = parsed.path
+        # Flatten params (parse_qs returns lists)
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+
+    # Normalize target name
+    if target_name.startswith("/metrics/"):
+        target_name = target_name.replace("/metrics/", "")
+
+    project_id_or_slug = params.get("project")
+    if not project_id_or_slug and "project" in scoped_vars:
+        # Try to find project in scopedVars if not in URL
+        project_id_or_slug = scoped_vars["project"].get("value")
+
+    return target_name, params, project_id_or_slug
+
+
+async def _run_target(
+    session_factory: async_sessionmaker, target_name: str, project_id: int, params: Dict
+) -> Table:
+    """Run one distinct target on its own session so targets can execute concurrently."""
+    async with session_factory() as session:
+        exporter = MetricsExporter(session)
+        return await TARGET_HANDLERS[target_name](exporter, project_id, params)
+
+
 @router.get("/")
-async def health_check():
+async def health_check() -> Dict[str, str]:
     return {"status": "ok"}
 
 @router.post("/search")
-async def search():
-    return [
-        "sprint-velocity",
-        "stuck-tasks",
-        "activity-feed",
-        "project-summary"
-    ]
+async def search() -> List[str]:
+    return list(TARGET_HANDLERS)
 
 @router.post("/query")
-async def query(query: SimpleJsonQuery, db: AsyncSession = Depends(get_db)):
-    results = []
-
-    exporter = MetricsExporter(db)
+async def query(
+    query: SimpleJsonQuery,
+    db: AsyncSession = Depends(get_read_db),
+    session_factory: async_sessionmaker = Depends(get_read_session_factory),
+) -> List[Dict[str, Any]]:
+    """
+    Resolve Grafana targets as a batch.
 
+    Identical (target, params, project) combinations are computed once, each project
+    is resolved once, and the distinct queries run concurrently on separate sessions.
+    """
+    parsed_targets = []
     for target in query.targets:
-        # Parse target string (e.g. "/metrics/sprint-velocity?project=3")
-        # If it's just a name, handle it too
-        target_name = target.target
-        params = {}
-
-        if "?" in target_name:
-            parsed = urlparse(target_name)
-            target_name = parsed.path
-            query_params = parse_qs(parsed.query)
-            # Flatten params (parse_qs returns lists)
-            params = {k: v[0] for k, v in query_params.items()}
-
-        # Normalize target name
-        if target_name.startswith("/metrics/"):
-            target_name = target_name.replace("/metrics/", "")
-
-        project_id_or_slug = params.get("project")
-        if not project_id_or_slug:
-            # Try to find project in scopedVars if not in URL
-            if "project" in query.scopedVars:
-                project_id_or_slug = query.scopedVars["project"].get("value")
-
-        if not project_id_or_slug:
+        target_name, params, project_ref = _parse_target(target.target, query.scopedVars)
+        if target_name not in TARGET_HANDLERS or not project_ref:
             continue
+        parsed_targets.append((target, target_name, params, str(project_ref)))
 
-        project = await _resolve_project(db, project_id_or_slug)
-        if not project:
+    project_ids: Dict[str, Optional[int]] = {}
+    for project_ref in dict.fromkeys(ref for *_, ref in parsed_targets):
+        project = await _resolve_project(db, project_ref)
+        project_ids[project_ref] = project.id if project else None
+
+    pending: Dict[Tuple, Awaitable[Table]] = {}
+    planned = []
+    for target, target_name, params, project_ref in parsed_targets:
+        project_id = project_ids[project_ref]
+        if project_id is None:
             continue
+        query_params = {k: v for k, v in params.items() if k != "project"}
+        key = (target_name, project_id, tuple(sorted(query_params.items())))
+        if key not in pending:
+            pending[key] = _run_target(session_factory, target_name, project_id, query_params)
+        planned.append((target, key))
+
+    tables = dict(zip(pending, await asyncio.gather(*pending.values())))
 
-        if target_name == "sprint-velocity":
-            sprint_count = int(params.get("sprint_count", 6))
-            metrics = await exporter.get_sprint_velocity(project.id, sprint_count)
-
-            # Convert to Table
-            columns = [
-                {"text": "Sprint", "type": "string"},
-                {"text": "Tasks Completed", "type": "number"},
-                {"text": "Story Points", "type": "number"}
-            ]
-            rows = []
-            for m in metrics:
-                rows.append([
-                    m["sprint_id"],
-                    m["tasks_completed"],
-                    m["story_points"]
-                ])
-
-            results.append({
-                "target": target.target,
-                "type": "table",
-                "columns": columns,
-                "rows": rows
-            })
-
-        elif target_name == "stuck-tasks":
-            days = int(params.get("days_threshold", 5))
-            tasks = await exporter.get_stuck_tasks(project.id, days)
-
-            # For Gauge, we need a value. But dashboard also has a Table.
-            # We return a Table with all details.
-            # The Gauge panel can use the Table data if configured to pick a column.
-            # Or we can add a "total_stuck" column to every row?
-            # Better: Return the detailed table.
-
-            columns = [
-                {"text": "ID", "type": "number"},
-                {"text": "Ref", "type": "number"},
-                {"text": "Subject", "type": "string"},
-                {"text": "Status", "type": "string"},
-                {"text": "Days Stuck", "type": "number"},
-                {"text": "Severity", "type": "string"},
-                {"text": "Assigned To", "type": "string"},
-                {"text": "US Ref", "type": "number"}
-            ]
-            rows = []
-            for t in tasks:
-                rows.append([
-                    t["task_id"],
-                    t["ref"],
-                    t["subject"],
-                    t["status"],
-                    t["days_stuck"],
-                    t["severity"],
-                    t["assigned_to"] or "",
-                    t["user_story_ref"] or 0
-                ])
-
-            results.append({
-                "target": target.target,
-                "type": "table",
-                "columns": columns,
-                "rows": rows
-            })
-
-        elif target_name == "activity-feed":
-            limit = int(params.get("limit", 50))
-            hours = int(params.get("hours", 168))
-            activities = await exporter.get_activity_feed(project.id, limit, hours)
-
-            columns = [
-                {"text": "Time", "type": "time"}, # Grafana expects time as number (ms) or ISO string
-                {"text": "Type", "type": "string"},
-                {"text": "Ref", "type": "number"},
-                {"text": "Subject", "type": "string"},
-                {"text": "Description", "type": "string"},
-                {"text": "Author", "type": "string"}
-            ]
-            rows = []
-            for a in activities:
-                # Convert ISO string to ms timestamp if possible, or keep string
-                # SimpleJson handles ISO strings usually.
-                rows.append([
-                    a["timestamp"],
-                    a["type"],
-                    a["ref"],
-                    a["subject"],
-                    a["description"],
-                    a["author"] or ""
-                ])
-
-            results.append({
-                "target": target.target,
-                "type": "table",
-                "columns": columns,
-                "rows": rows
-            })
-
-        elif target_name == "project-summary":
-            summary = await exporter.get_project_summary(project.id)
-
-            # Return as a single row table
-            columns = [
-                {"text": "Epics", "type": "number"},
-                {"text": "Total US", "type": "number"},
-                {"text": "US Completed", "type": "number"},
-                {"text": "Total Tasks", "type": "number"},
-                {"text": "Tasks Completed", "type": "number"},
-                {"text": "Task Completion %", "type": "number"},
-                {"text": "US Completion %", "type": "number"}
-            ]
-            rows = [[
-                summary["epics"],
-                summary["user_stories"]["total"],
-                summary["user_stories"]["completed"],
-                summary["tasks"]["total"],
-                summary["tasks"]["completed"],
-                summary["completion_rate"]["tasks"],
-                summary["completion_rate"]["user_stories"]
-            ]]
-
-            results.append({
-                "target": target.target,
-                "type": "table",
-                "columns": columns,
-                "rows": rows
-            })
+    results: List[Dict[str, Any]] = []
+    for target, key in planned:
+        columns, rows = tables[key]
+        results.append({
+            "target": target.target,
+            "type": "table",
+            "columns": columns,
+            "rows": rows
+        })
 
     return results
 
 @router.post("/annotations")
-async def annotations():
+async def annotations() -> List[Dict[str, Any]]:
     return []
@@ -4,13 +4,21 @@ Synchronization service for Taiga data.
 This module handles syncing data from Taiga API to local database.
 """
 
-from typing import Dict, List
+import os
+import time
+from typing import Dict, List, Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app import crud
+from app import crud, profiling, telemetry
 from app.taiga_client import TaigaClient
 
+# Activity events older than this are pruned at the end of each project sync
+EVENTS_RETENTION_DAYS = int(os.getenv("EVENTS_RETENTION_DAYS", "365"))
+
+# Crud span of the tag sync inside each phase, exported as its "tags" sub-phase
+TAG_SPANS = {"userstories": "crud.sync_userstory_tags", "tasks": "crud.sync_task_tags"}
+
 
 class SyncStats:
     """Statistics for sync operations."""
@@ -26,6 +34,8 @@ class SyncStats:
         self.tasks_updated = 0
         self.tags_created = 0
         self.errors: List[str] = []
+        # Count, time and bytes per span (taiga calls, crud operations, sync phases)
+        self.timings = profiling.RequestTrace()
 
     def to_dict(self) -> Dict[str, any]:
         """Convert stats to dictionary."""
@@ -53,8 +63,40 @@ class SyncStats:
             "tags": {"created": self.tags_created},
             "errors": self.errors,
             "success": len(self.errors) == 0,
+            "timings": self.timings.to_dict(),
         }
 
+    def tag_seconds(self, phase: str) -> float:
+        """Time spent syncing the tags of a phase (userstories or tasks) so far."""
+        return self.timings.seconds(TAG_SPANS[phase])
+
+    def phase_counters(self, phase: str) -> Tuple[int, int, int]:
+        """Return (created, updated, errors) so far for a sync phase."""
+        return (
+            getattr(self, f"{phase}_created"),
+            getattr(self, f"{phase}_updated"),
+            len(self.errors),
+        )
+
+
+def _observe_phase(
+    stats: SyncStats,
+    phase: str,
+    started: float,
+    before: Tuple[int, int, int],
+    tags_before: Optional[float] = None,
+) -> None:
+    """
+    Export the duration and item throughput of a finished sync phase, and the
+    time its tag sync took as a separate sub-phase (already part of the phase).
+    """
+    created, updated, errors = (
+        now - prev for now, prev in zip(stats.phase_counters(phase), before)
+    )
+    telemetry.observe_sync_phase(phase, time.perf_counter() - started, created, updated, errors)
+    if tags_before is not None:
+        telemetry.observe_sync_subphase(phase, "tags", stats.tag_seconds(phase) - tags_before)
+
 
 async def sync_project(
     db: AsyncSession,
@@ -78,8 +120,23 @@ async def sync_project(
         project_id_or_slug: Project ID or slug
         stats: Sync statistics tracker
     """
+    with profiling.collect(stats.timings):
+        await _sync_project(db, taiga_client, project_id_or_slug, stats)
+
+
+async def _sync_project(
+    db: AsyncSession,
+    taiga_client: TaigaClient,
+    project_id_or_slug: int | str,
+    stats: SyncStats,
+) -> None:
+    sync_started = time.perf_counter()
+    errors_before = len(stats.errors)
+    project_db_id = None
+
     try:
         # 1. Get and sync project
+        phase_started, before = time.perf_counter(), stats.phase_counters("projects")
         project_data = await taiga_client.get_project(project_id_or_slug)
         existing_project = await crud.get_project_by_taiga_id(db, project_data["id"])
 
@@ -89,11 +146,13 @@ async def sync_project(
             stats.projects_updated += 1
         else:
             stats.projects_created += 1
+        _observe_phase(stats, "projects", phase_started, before)
 
         project_db_id = project.id
         project_taiga_id = project.taiga_id
 
         # 2. Sync epics
+        phase_started, before = time.perf_counter(), stats.phase_counters("epics")
         epics_data = await taiga_client.list_epics(project_taiga_id)
 
         for epic_data in epics_data:
@@ -110,8 +169,11 @@ async def sync_project(
                     stats.epics_created += 1
             except Exception as e:
                 stats.errors.append(f"Error syncing epic {epic_data.get('id')}: {str(e)}")
+        _observe_phase(stats, "epics", phase_started, before)
 
         # 3. Sync user stories
+        phase_started, before = time.perf_counter(), stats.phase_counters("userstories")
+        tags_before = stats.tag_seconds("userstories")
         userstories_data = await taiga_client.list_user_stories(
             project_taiga_id, titles_only=False
         )
@@ -158,8 +220,11 @@ async def sync_project(
                 stats.errors.append(
                     f"Error syncing user story {us_data.get('id')}: {str(e)}"
                 )
+        _observe_phase(stats, "userstories", phase_started, before, tags_before)
 
         # 4. Sync tasks
+        phase_started, before = time.perf_counter(), stats.phase_counters("tasks")
+        tags_before = stats.tag_seconds("tasks")
         tasks_data = await taiga_client.list_tasks(project_taiga_id)
 
         # Create user story mapping (taiga_id -> db_id)
@@ -194,10 +259,31 @@ async def sync_project(
                     stats.tasks_created += 1
             except Exception as e:
                 stats.errors.append(f"Error syncing task {task_data.get('id')}: {str(e)}")
+        _observe_phase(stats, "tasks", phase_started, before, tags_before)
+
+        # 5. Prune the activity log by age
+        await crud.prune_events(db, EVENTS_RETENTION_DAYS)
+
+        # 6. Re-score AIReorganizer proposals for stories whose text changed
+        from app.ai_reorganizer import AIReorganizer
+
+        await crud.refresh_story_proposals(db, project_db_id, AIReorganizer())
 
     except Exception as e:
         stats.errors.append(f"Error syncing project {project_id_or_slug}: {str(e)}")
 
+    # Items are committed one by one, so even a partial sync changes the data
+    if project_db_id is not None:
+        try:
+            await crud.bump_project_data_version(db, project_db_id)
+        except Exception as e:
+            stats.errors.append(f"Error bumping data version of {project_id_or_slug}: {str(e)}")
+
+    telemetry.observe_sync(
+        time.perf_counter() - sync_started, success=len(stats.errors) == errors_before
+    )
+    telemetry.project_snapshots.invalidate()
+
 
 async def sync_all_projects(
     db: AsyncSession, taiga_client: TaigaClient
@@ -214,13 +300,14 @@ async def sync_all_projects(
     """
     stats = SyncStats()
 
-    try:
-        projects = await taiga_client.list_projects()
+    with profiling.collect(stats.timings):
+        try:
+            projects = await taiga_client.list_projects()
 
-        for project_data in projects:
-            await sync_project(db, taiga_client, project_data["id"], stats)
+            for project_data in projects:
+                await sync_project(db, taiga_client, project_data["id"], stats)
 
-    except Exception as e:
-        stats.errors.append(f"Error listing projects: {str(e)}")
+        except Exception as e:
+            stats.errors.append(f"Error listing projects: {str(e)}")
 
     return stats
@@ -0,0 +1,234 @@
+"""
+Preparación y render del /table-map a partir de datos planos.
+
+`get_table_map` copia los objetos ORM a estructuras planas (SimpleNamespace,
+dicts y listas) mientras la sesión está abierta; el resto del trabajo —análisis
+del AIReorganizer, detalles embebidos de las user stories y render de la
+plantilla— lo hacen `build_table_map_context` y `render_table_map`, que no
+tocan la base de datos y por eso pueden ejecutarse en un thread o en otro
+proceso (ver app/executor.py).
+
+Los snapshots exponen los mismos atributos que usan la plantilla y el
+AIReorganizer, así que ambos funcionan igual sobre ORM o sobre datos planos.
+"""
+
+import functools
+import hashlib
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+import jinja2
+
+# Caracteres de descripción embebidos en la página para el resumen de las tarjetas
+STORY_PREVIEW_CHARS = 1000
+
+TEMPLATES_DIR = Path(__file__).parent / "templates"
+
+_environment: Optional[jinja2.Environment] = None
+
+
+def get_table_map_template(name: str = "table_map.html") -> jinja2.Template:
+    """Plantilla compilada (el entorno se crea una vez por proceso)."""
+    global _environment
+    if _environment is None:
+        # Mismas opciones que Jinja2Templates (autoescape activado)
+        _environment = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(str(TEMPLATES_DIR)), autoescape=True
+        )
+    return _environment.get_template(name)
+
+
+@functools.lru_cache(maxsize=None)
+def table_map_fingerprint(name: str = "table_map.html") -> str:
+    """
+    Hash corto de la plantilla y de este módulo (que arma su contexto).
+
+    Forma parte de la clave de caché y del ETag del table map: un deploy que
+    cambia la plantilla o el armado de la página invalida lo ya servido.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for path in (TEMPLATES_DIR / name, Path(__file__)):
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def tag_names(entity: Any) -> List[str]:
+    """Nombres de los tags asociados a una user story o tarea ORM."""
+    return [assoc.tag.name for assoc in getattr(entity, "tags", []) if assoc.tag is not None]
+
+
+def snapshot_project(project: Any) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=project.id,
+        taiga_id=project.taiga_id,
+        name=project.name,
+        slug=project.slug,
+        last_synced=project.last_synced,
+    )
+
+
+def snapshot_task(task: Any) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=task.id,
+        taiga_id=task.taiga_id,
+        ref=task.ref,
+        subject=task.subject,
+        is_closed=task.is_closed,
+        status_name=task.status_name,
+        assigned_to_username=task.assigned_to_username,
+        tag_names=tag_names(task),
+    )
+
+
+def snapshot_story(user_story: Any) -> SimpleNamespace:
+    raw_data = user_story.raw_data or {}
+    preview = raw_data.get("description_text") or user_story.description or ""
+    return SimpleNamespace(
+        id=user_story.id,
+        taiga_id=user_story.taiga_id,
+        ref=user_story.ref,
+        subject=user_story.subject,
+        description=user_story.description,
+        description_preview=preview[:STORY_PREVIEW_CHARS],
+        is_closed=user_story.is_closed,
+        version=user_story.version,
+        milestone_name=user_story.milestone_name,
+        tag_names=tag_names(user_story),
+        tasks=[snapshot_task(task) for task in user_story.tasks],
+    )
+
+
+def snapshot_epic(epic: Any) -> SimpleNamespace:
+    user_stories = [snapshot_story(us) for us in epic.user_stories]
+    return SimpleNamespace(
+        id=epic.id,
+        ref=epic.ref,
+        subject=epic.subject,
+        description=epic.description,
+        color=epic.color,
+        user_stories=user_stories,
+        total_tasks=sum(len(us.tasks) for us in user_stories),
+    )
+
+
+def build_story_details(
+    epics: List[SimpleNamespace], orphans: List[SimpleNamespace]
+) -> Dict[int, Dict]:
+    """
+    Prepare a lightweight mapping of user story details for the table map page.
+
+    Only what the board needs up front is embedded (tags, task list, a short
+    description preview); the modal fetches the full detail on demand from
+    /projects/{project}/stories/{story_id}/details, so entries carry `lazy`.
+    """
+
+    def _serialize(user_story: SimpleNamespace) -> Dict:
+        return {
+            "id": user_story.id,
+            "taiga_id": user_story.taiga_id,
+            "ref": user_story.ref,
+            "subject": user_story.subject,
+            "description_text": user_story.description_preview,
+            "version": user_story.version,
+            "tags": list(user_story.tag_names),
+            "tasks": [
+                {
+                    "id": task.id,
+                    "taiga_id": task.taiga_id,
+                    "ref": task.ref,
+                    "subject": task.subject or "",
+                    "tags": list(task.tag_names),
+                }
+                for task in user_story.tasks
+            ],
+            "lazy": True,
+        }
+
+    details: Dict[int, Dict] = {}
+    for epic in epics:
+        for user_story in epic.user_stories:
+            details[user_story.id] = _serialize(user_story)
+    for user_story in orphans:
+        details[user_story.id] = _serialize(user_story)
+    return details
+
+
+def build_table_map_shell_context(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Contexto del bloque `shell` de la plantilla: no requiere el análisis IA."""
+    return {
+        "project": data["project"],
+        "epics": data["epics"],
+        "orphan_user_stories": data["orphan_user_stories"],
+        "stats": data["stats"],
+        "draft_state": data["draft_state"],
+        "project_tags": data["project_tags"],
+        "show_token_modal": data["show_token_modal"],
+    }
+
+
+def build_table_map_context(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Contexto de la plantilla a partir de los snapshots del proyecto.
+
+    `data` trae project, epics, orphan_user_stories, stats, cached_inferences,
+    draft_state, project_tags y show_token_modal.
+    """
+    epics = data["epics"]
+    orphan_user_stories = data["orphan_user_stories"]
+
+    from app.ai_reorganizer import AIReorganizer
+
+    analysis = AIReorganizer().analyze_project(
+        epics, orphan_user_stories, data["cached_inferences"]
+    )
+
+    analyzed_epic_refs = {
+        proposal.get("current_epic_ref")
+        for proposal in analysis["proposals"]
+        if proposal.get("current_epic_ref") is not None
+    }
+
+    # Extend modules with project-specific epics that were not analyzed
+    draft_modules = {key: value for key, value in analysis["modules"].items()}
+    for epic in epics:
+        if epic.ref in analyzed_epic_refs:
+            continue
+        module_key = f"project-epic-{epic.ref}"
+        if module_key in draft_modules:
+            continue
+        draft_modules[module_key] = {
+            "name": epic.subject or f"Epic #{epic.ref}",
+            "description": epic.description or f"Epic #{epic.ref}",
+            "color": epic.color or "#6c757d",
+        }
+
+    return {
+        **build_table_map_shell_context(data),
+        "ai_analysis": analysis,
+        "draft_modules": draft_modules,
+        "story_details": build_story_details(epics, orphan_user_stories),
+    }
+
+
+def render_table_map_shell(data: Dict[str, Any]) -> bytes:
+    """
+    Cabecera, estadísticas y tabla actual del table map (bloque `shell`).
+
+    En streaming se envía antes de correr el análisis; concatenada con el bloque
+    `analysis` forma la misma página que `render_table_map`.
+    """
+    template = get_table_map_template()
+    context = template.new_context(build_table_map_shell_context(data))
+    return "".join(template.blocks["shell"](context)).encode("utf-8")
+
+
+def generate_table_map_analysis(context: Dict[str, Any]) -> Iterator[str]:
+    """Fragmentos del bloque `analysis` (propuesta IA, borrador y scripts)."""
+    template = get_table_map_template()
+    return template.blocks["analysis"](template.new_context(context))
+
+
+def render_table_map(data: Dict[str, Any]) -> bytes:
+    """Página completa del table map (análisis + render) codificada en UTF-8."""
+    return get_table_map_template().render(build_table_map_context(data)).encode("utf-8")
@@ -1,12 +1,29 @@
 import asyncio
 import logging
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Set, Union
 
 import httpx
 
+from app import telemetry
+from app.response_cache import TaigaResponseCache
+from app.telemetry import httpx_event_hooks
+
 logger = logging.getLogger(__name__)
 
+# Endpoints que nunca se sirven desde la caché de respuestas (verificación de credenciales)
+UNCACHED_PATHS = frozenset({"users/me"})
+
+# Activado por bypass_response_cache(): lecturas directas a Taiga en este contexto
+_bypass_response_cache: ContextVar[bool] = ContextVar("bypass_response_cache", default=False)
+
+# Activado por batch_invalidation(): recursos a invalidar al cerrar el bloque
+_deferred_invalidations: ContextVar[Optional[Set[str]]] = ContextVar(
+    "deferred_invalidations", default=None
+)
+
 
 class TaigaClientError(Exception):
     """Error genérico al interactuar con la API de Taiga."""
@@ -16,17 +33,19 @@ class TaigaClient:
     def __init__(
         self,
         base_url: str,
-        username: str = None,
-        password: str = None,
-        auth_token: str = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        auth_token: Optional[str] = None,
         token_ttl: int = 82800,
         token_refresh_margin: int = 60,
+        response_cache: Optional[TaigaResponseCache] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
     ) -> None:
         normalized_base = base_url.rstrip("/")
         self.base_url = f"{normalized_base}/"
         self.username = username
         self.password = password
-        self.auth_token = auth_token
+        self.auth_token: Optional[str] = auth_token
         self.token_ttl = max(token_ttl, 0)
         self.token_refresh_margin = max(token_refresh_margin, 0)
         self._client: Optional[httpx.AsyncClient] = None
@@ -34,6 +53,11 @@ class TaigaClient:
         self._token_expires_at: Optional[datetime] = None
         self._auth_lock = asyncio.Lock()
         self._last_response_meta: Dict[str, Any] = {}
+        # Transporte alternativo de httpx (p. ej. un Taiga simulado en tests y benchmarks)
+        self._transport = transport
+        self.response_cache = (
+            response_cache if response_cache is not None and response_cache.enabled else None
+        )
 
         # Validación de credenciales ahora es opcional
         # Si no hay credenciales al iniciar, se pueden setear después con set_auth_token()
@@ -46,10 +70,14 @@ class TaigaClient:
             self._client = httpx.AsyncClient(
                 base_url=self.base_url,
                 timeout=httpx.Timeout(10.0, read=30.0),
+                event_hooks=httpx_event_hooks(),
+                transport=self._transport,
             )
 
     async def close(self) -> None:
         """Cierra el cliente HTTP."""
+        if self.response_cache is not None:
+            await self.response_cache.flush()
         if self._client is not None:
             await self._client.aclose()
             self._client = None
@@ -61,6 +89,74 @@ class TaigaClient:
             raise RuntimeError("Taiga client was not started")
         return self._client
 
+    @contextmanager
+    def bypass_response_cache(self) -> Iterator[None]:
+        """
+        Lee siempre de Taiga dentro del bloque (p. ej. durante la sincronización).
+
+        Las respuestas obtenidas se siguen guardando en la caché.
+        """
+        reset_token = _bypass_response_cache.set(True)
+        try:
+            yield
+        finally:
+            _bypass_response_cache.reset(reset_token)
+
+    async def _get(
+        self,
+        client: httpx.AsyncClient,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> httpx.Response:
+        """GET a Taiga pasando por la caché de respuestas compartida, si está activa."""
+        cache = self.response_cache
+        if cache is None or path in UNCACHED_PATHS:
+            return await client.get(path, params=params, headers=headers)
+
+        key = cache.request_key("GET", path, params, (headers or {}).get("Auth-Token", ""))
+        if _bypass_response_cache.get():
+            telemetry.TAIGA_RESPONSE_CACHE.inc(result="bypass")
+        else:
+            cached = await cache.get(key)
+            if cached is not None:
+                request = client.build_request("GET", path, params=params, headers=headers)
+                return cached.to_response(request)
+
+        response = await client.get(path, params=params, headers=headers)
+        if response.status_code == 200:
+            cache.schedule_set(key, path, response)
+        return response
+
+    async def invalidate_response_cache(self, *resources: str) -> None:
+        """
+        Invalida la caché de respuestas de los recursos indicados (`"tasks"`,
+        `"userstories"`...); sin argumentos la vacía. Dentro de
+        `batch_invalidation()` se acumula y se aplica una vez al final.
+        """
+        if self.response_cache is None:
+            return
+        deferred = _deferred_invalidations.get()
+        if deferred is not None and resources:
+            deferred.update(resources)
+            return
+        await self.response_cache.invalidate(*resources)
+
+    @asynccontextmanager
+    async def batch_invalidation(self) -> AsyncIterator[None]:
+        """Agrupa las invalidaciones de las mutaciones del bloque en una sola (cargas masivas)."""
+        if _deferred_invalidations.get() is not None:
+            yield
+            return
+        resources: Set[str] = set()
+        reset_token = _deferred_invalidations.set(resources)
+        try:
+            yield
+        finally:
+            _deferred_invalidations.reset(reset_token)
+            if resources:
+                await self.invalidate_response_cache(*sorted(resources))
+
     def _build_headers(self, token: str) -> Dict[str, str]:
         return {
             "Authorization": f"Bearer {token}",
@@ -68,6 +164,7 @@ class TaigaClient:
         }
 
     def _record_response(self, response: httpx.Response) -> None:
+        telemetry.observe_taiga_response(response)
         logger.debug(
             "Taiga %s %s -> %s",
             response.request.method,
@@ -185,7 +282,9 @@ class TaigaClient:
         token = await self._get_token()
         headers = self._build_headers(token)
         try:
-            response = await client.get("projects/by_slug", params={"slug": slug}, headers=headers)
+            response = await self._get(
+                client, "projects/by_slug", params={"slug": slug}, headers=headers
+            )
         except httpx.RequestError as exc:
             raise TaigaClientError(f"No se pudo resolver el slug del proyecto: {exc}") from exc
         self._record_response(response)
@@ -230,7 +329,9 @@ class TaigaClient:
         if response.status_code not in (200, 201):
             raise TaigaClientError(self._parse_error(response))
 
-        return self._json_or_error(response)
+        data = self._json_or_error(response)
+        await self.invalidate_response_cache("tasks")
+        return data
 
     async def list_user_stories(
         self,
@@ -254,7 +355,9 @@ class TaigaClient:
         while True:
             params_with_page = {**params, "page": page}
             try:
-                response = await client.get("userstories", params=params_with_page, headers=headers)
+                response = await self._get(
+                    client, "userstories", params=params_with_page, headers=headers
+                )
             except httpx.RequestError as exc:
                 raise TaigaClientError(f"No se pudieron obtener las historias: {exc}") from exc
             self._record_response(response)
@@ -286,7 +389,7 @@ class TaigaClient:
 
         params = {"project": project_id}
         try:
-            response = await client.get("epics", params=params, headers=headers)
+            response = await self._get(client, "epics", params=params, headers=headers)
         except httpx.RequestError as exc:
             raise TaigaClientError(f"No se pudieron obtener las épicas: {exc}") from exc
         self._record_response(response)
@@ -303,7 +406,7 @@ class TaigaClient:
         headers = self._build_headers(token)
 
         try:
-            response = await client.get(f"epics/{epic_id}", headers=headers)
+            response = await self._get(client, f"epics/{epic_id}", headers=headers)
         except httpx.RequestError as exc:
             raise TaigaClientError(f"No se pudo obtener la épica {epic_id}: {exc}") from exc
         self._record_response(response)
@@ -341,7 +444,9 @@ class TaigaClient:
         if response.status_code != 200:
             raise TaigaClientError(self._parse_error(response))
 
-        return self._json_or_error(response)
+        data = self._json_or_error(response)
+        await self.invalidate_response_cache("epics", "userstories")
+        return data
 
     async def create_user_story(
         self,
@@ -371,7 +476,9 @@ class TaigaClient:
         if response.status_code not in (200, 201):
             raise TaigaClientError(self._parse_error(response))
 
-        return self._json_or_error(response)
+        data = self._json_or_error(response)
+        await self.invalidate_response_cache("userstories", "epics")
+        return data
 
     async def update_user_story(
         self,
@@ -410,7 +517,9 @@ class TaigaClient:
         if response.status_code != 200:
             raise TaigaClientError(self._parse_error(response))
 
-        return self._json_or_error(response)
+        data = self._json_or_error(response)
+        await self.invalidate_response_cache("userstories", "epics")
+        return data
 
     async def get_user_story(self, user_story_id: int) -> Dict[str, Any]:
         client = await self._ensure_client()
@@ -418,7 +527,7 @@ class TaigaClient:
         headers = self._build_headers(token)
 
         try:
-            response = await client.get(f"userstories/{user_story_id}", headers=headers)
+            response = await self._get(client, f"userstories/{user_story_id}", headers=headers)
         except httpx.RequestError as exc:
             raise TaigaClientError(
                 f"No se pudo obtener la historia {user_story_id}: {exc}"
@@ -437,7 +546,7 @@ class TaigaClient:
         params = {"user_story": user_story_id}
 
         try:
-            response = await client.get("tasks", params=params, headers=headers)
+            response = await self._get(client, "tasks", params=params, headers=headers)
         except httpx.RequestError as exc:
             raise TaigaClientError(
                 f"No se pudieron obtener las tareas de la historia {user_story_id}: {exc}"
@@ -464,6 +573,14 @@ class TaigaClient:
             self._cache_token(token)
             logger.info("Bearer token actualizado dinámicamente")
 
+    async def clear_auth_token(self) -> None:
+        """Olvida el bearer token (borrado o vencido en la sesión)."""
+        async with self._auth_lock:
+            self.auth_token = None
+            self._token = None
+            self._token_expires_at = None
+            logger.info("Bearer token eliminado")
+
     async def check_connection(self) -> Dict[str, Any]:
         token = await self._get_token()
         client = await self._ensure_client()
@@ -607,7 +724,7 @@ class TaigaClient:
         headers = self._build_headers(token)
 
         try:
-            response = await client.get("projects", headers=headers)
+            response = await self._get(client, "projects", headers=headers)
         except httpx.RequestError as exc:
             raise TaigaClientError(f"No se pudo listar proyectos: {exc}") from exc
 
@@ -626,7 +743,7 @@ class TaigaClient:
         headers = self._build_headers(token)
 
         try:
-            response = await client.get(f"projects/{project_id}", headers=headers)
+            response = await self._get(client, f"projects/{project_id}", headers=headers)
         except httpx.RequestError as exc:
             raise TaigaClientError(f"No se pudo obtener proyecto: {exc}") from exc
 
@@ -644,7 +761,7 @@ class TaigaClient:
         headers = self._build_headers(token)
 
         try:
-            response = await client.get(f"tasks/{task_id}", headers=headers)
+            response = await self._get(client, f"tasks/{task_id}", headers=headers)
         except httpx.RequestError as exc:
             raise TaigaClientError(f"No se pudo obtener tarea: {exc}") from exc
 
@@ -678,7 +795,7 @@ class TaigaClient:
             params["assigned_to"] = assigned_to
 
         try:
-            response = await client.get("tasks", headers=headers, params=params)
+            response = await self._get(client, "tasks", headers=headers, params=params)
         except httpx.RequestError as exc:
             raise TaigaClientError(f"No se pudo listar tareas: {exc}") from exc
 
@@ -705,6 +822,7 @@ class TaigaClient:
         if response.status_code not in (200, 204):
             raise TaigaClientError(self._parse_error(response))
 
+        await self.invalidate_response_cache("tasks")
         return True
 
     async def update_task(
@@ -750,7 +868,9 @@ class TaigaClient:
         if response.status_code != 200:
             raise TaigaClientError(self._parse_error(response))
 
-        return self._json_or_error(response)
+        data = self._json_or_error(response)
+        await self.invalidate_response_cache("tasks")
+        return data
 
     async def get_task_statuses(self, project: Union[int, str]) -> List[Dict[str, Any]]:
         """Obtiene los estados de tareas disponibles en un proyecto."""
@@ -760,8 +880,8 @@ class TaigaClient:
         headers = self._build_headers(token)
 
         try:
-            response = await client.get(
-                "task-statuses", headers=headers, params={"project": project_id}
+            response = await self._get(
+                client, "task-statuses", headers=headers, params={"project": project_id}
             )
         except httpx.RequestError as exc:
             raise TaigaClientError(f"No se pudo obtener estados de tareas: {exc}") from exc
@@ -781,8 +901,8 @@ class TaigaClient:
         headers = self._build_headers(token)
 
         try:
-            response = await client.get(
-                "userstory-statuses", headers=headers, params={"project": project_id}
+            response = await self._get(
+                client, "userstory-statuses", headers=headers, params={"project": project_id}
             )
         except httpx.RequestError as exc:
             raise TaigaClientError(f"No se pudo obtener estados de historias: {exc}") from exc
@@ -803,7 +923,7 @@ class TaigaClient:
 
         params = {"project": project_id}
         try:
-            response = await client.get("milestones", params=params, headers=headers)
+            response = await self._get(client, "milestones", params=params, headers=headers)
         except httpx.RequestError as exc:
             raise TaigaClientError(f"No se pudieron obtener los milestones: {exc}") from exc
         self._record_response(response)
@@ -821,7 +941,9 @@ class TaigaClient:
         headers = self._build_headers(token)
 
         try:
-            response = await client.get(f"projects/{project_id}/tags_colors", headers=headers)
+            response = await self._get(
+                client, f"projects/{project_id}/tags_colors", headers=headers
+            )
         except httpx.RequestError as exc:
             raise TaigaClientError(f"No se pudieron obtener las etiquetas: {exc}") from exc
         self._record_response(response)
@@ -0,0 +1,660 @@
+"""
+Telemetría del servicio en formato de exposición de Prometheus.
+
+Registro mínimo en memoria (sin dependencias externas) con contadores,
+histogramas y gauges etiquetados. Las métricas se actualizan en el camino
+caliente con operaciones O(1) y el scrape de /metrics/prometheus sólo
+serializa lo acumulado: nunca recorre tablas.
+
+Métricas incluidas:
+- Latencia y volumen de requests HTTP por ruta
+- Sentencias SQL, tiempo en la base y sospechas de N+1 por ruta
+- Latencia, tamaño y códigos de estado de las llamadas a la API de Taiga
+- Duración de las operaciones de crud (upserts y sincronización de tags)
+- Duración de la sincronización y throughput por fase
+- Uso del pool de conexiones de la base de datos
+- Lag del event loop y duración de las etapas CPU-bound enviadas al executor
+- Gauges por proyecto leídos de un snapshot cacheado (METRICS_SNAPSHOT_TTL)
+"""
+
+import abc
+import functools
+import math
+import os
+import re
+import threading
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import profiling
+
+T = TypeVar("T")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SYNC_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+CRUD_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SQL_STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Segundos que un snapshot de métricas por proyecto se considera vigente
+METRICS_SNAPSHOT_TTL = float(os.getenv("METRICS_SNAPSHOT_TTL", "60"))
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape_label(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric(abc.ABC):
+    """Base común: nombre, ayuda, etiquetas y lock para el acceso concurrente."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} espera las etiquetas {self.labelnames}, recibió {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    @abc.abstractmethod
+    def samples(self) -> Iterable[str]:
+        """Líneas de exposición de la métrica (sin HELP/TYPE)."""
+
+
+class Counter(_Metric):
+    """Contador monótono."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """Valor instantáneo; `replace` sustituye la serie completa (snapshots)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def replace(self, values: Dict[LabelValues, float]) -> None:
+        with self._lock:
+            self._values = dict(values)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Histograma acumulativo con buckets fijos."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Por serie: [conteos por bucket..., suma, total]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[idx] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels: str) -> float:
+        series = self._series.get(self._key(labels))
+        return series[-1] if series else 0.0
+
+    def _quantile(self, series: List[float], q: float) -> float:
+        """Cuantil estimado interpolando dentro del bucket (como histogram_quantile)."""
+        rank = q * series[-1]
+        cumulative, lower = 0.0, 0.0
+        for idx, bound in enumerate(self.buckets):
+            if series[idx] and cumulative + series[idx] >= rank:
+                if math.isinf(bound):
+                    return lower
+                return lower + (bound - lower) * (rank - cumulative) / series[idx]
+            cumulative += series[idx]
+            lower = bound if not math.isinf(bound) else lower
+        return lower
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Por serie (etiquetas unidas con `,`): count, sum, mean, p50, p95 y p99."""
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        result = {}
+        for key, series in items:
+            count = series[-1]
+            result[",".join(key) or "all"] = {
+                "count": count,
+                "sum": round(series[-2], 6),
+                "mean": round(series[-2] / count, 6) if count else 0.0,
+                "p50": round(self._quantile(series, 0.5), 6),
+                "p95": round(self._quantile(series, 0.95), 6),
+                "p99": round(self._quantile(series, 0.99), 6),
+            }
+        return result
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        bucket_labels = self.labelnames + ("le",)
+        for key, series in items:
+            cumulative = 0.0
+            for idx, bound in enumerate(self.buckets):
+                cumulative += series[idx]
+                labels = _format_labels(bucket_labels, key + (_format_value(bound),))
+                yield f"{self.name}_bucket{labels} {_format_value(cumulative)}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(series[-2])}"
+            yield f"{self.name}_count{labels} {_format_value(series[-1])}"
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class Registry:
+    """Conjunto de métricas con colectores opcionales ejecutados en cada scrape."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrica duplicada: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Registra un callback barato que refresca gauges justo antes de exponer."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# HTTP ----------------------------------------------------------------------
+HTTP_REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "taiga_api_http_request_duration_seconds",
+        "Latencia de las requests HTTP atendidas por la API, por ruta.",
+        ("method", "route"),
+    )
+)
+HTTP_REQUESTS = REGISTRY.register(
+    Counter(
+        "taiga_api_http_requests_total",
+        "Requests HTTP atendidas por la API, por ruta y código de estado.",
+        ("method", "route", "status"),
+    )
+)
+
+HTTP_REQUEST_SQL_STATEMENTS = REGISTRY.register(
+    Histogram(
+        "taiga_api_http_request_sql_statements",
+        "Sentencias SQL ejecutadas por request, por ruta.",
+        ("route",),
+        buckets=SQL_STATEMENT_BUCKETS,
+    )
+)
+HTTP_REQUEST_SQL_DURATION = REGISTRY.register(
+    Histogram(
+        "taiga_api_http_request_sql_duration_seconds",
+        "Tiempo total en la base de datos por request, por ruta.",
+        ("route",),
+    )
+)
+HTTP_REQUEST_N_PLUS_ONE = REGISTRY.register(
+    Counter(
+        "taiga_api_http_request_sql_n_plus_one_total",
+        "Requests con sentencias repetidas sobre el umbral (sospecha de N+1), por ruta.",
+        ("route",),
+    )
+)
+
+# Upstream Taiga ------------------------------------------------------------
+TAIGA_REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "taiga_upstream_request_duration_seconds",
+        "Latencia de las llamadas a la API de Taiga hasta recibir cabeceras.",
+        ("method", "endpoint"),
+    )
+)
+TAIGA_RESPONSE_SIZE = REGISTRY.register(
+    Histogram(
+        "taiga_upstream_response_size_bytes",
+        "Tamaño del cuerpo de las respuestas de la API de Taiga (sin las servidas por la caché).",
+        ("method", "endpoint"),
+        buckets=SIZE_BUCKETS,
+    )
+)
+TAIGA_RESPONSES = REGISTRY.register(
+    Counter(
+        "taiga_upstream_responses_total",
+        "Respuestas de la API de Taiga por método, endpoint y código de estado.",
+        ("method", "endpoint", "status"),
+    )
+)
+
+TAIGA_RESPONSE_CACHE = REGISTRY.register(
+    Counter(
+        "taiga_response_cache_requests_total",
+        "Lecturas de la caché persistente de respuestas de Taiga (hit, miss, bypass).",
+        ("result",),
+    )
+)
+TAIGA_RESPONSE_CACHE_EVICTIONS = REGISTRY.register(
+    Counter(
+        "taiga_response_cache_evictions_total",
+        "Entradas descartadas de la caché de respuestas por vencimiento o tamaño.",
+    )
+)
+
+# Crud ----------------------------------------------------------------------
+CRUD_DURATION = REGISTRY.register(
+    Histogram(
+        "taiga_crud_operation_duration_seconds",
+        "Duración de las operaciones de escritura de crud (upserts, tags, propuestas).",
+        ("operation",),
+        buckets=CRUD_BUCKETS,
+    )
+)
+
+# Sincronización ------------------------------------------------------------
+SYNC_DURATION = REGISTRY.register(
+    Histogram(
+        "taiga_sync_duration_seconds",
+        "Duración de la sincronización de un proyecto.",
+        ("outcome",),
+        buckets=SYNC_BUCKETS,
+    )
+)
+SYNC_PHASE_DURATION = REGISTRY.register(
+    Histogram(
+        "taiga_sync_phase_duration_seconds",
+        "Duración de cada fase de la sincronización.",
+        ("phase",),
+        buckets=SYNC_BUCKETS,
+    )
+)
+SYNC_SUBPHASE_DURATION = REGISTRY.register(
+    Histogram(
+        "taiga_sync_subphase_duration_seconds",
+        "Duración de una parte de una fase de la sincronización (ya incluida en la fase).",
+        ("phase", "subphase"),
+        buckets=SYNC_BUCKETS,
+    )
+)
+SYNC_ITEMS = REGISTRY.register(
+    Counter(
+        "taiga_sync_items_total",
+        "Items procesados por fase de la sincronización y resultado.",
+        ("phase", "result"),
+    )
+)
+SYNC_LAST_SUCCESS = REGISTRY.register(
+    Gauge(
+        "taiga_sync_last_success_timestamp_seconds",
+        "Momento (epoch) de la última sincronización de proyecto sin errores.",
+    )
+)
+
+# Base de datos -------------------------------------------------------------
+DB_POOL_CONNECTIONS = REGISTRY.register(
+    Gauge(
+        "taiga_db_pool_connections",
+        "Conexiones del pool de SQLAlchemy por engine (primary/read) y estado.",
+        ("engine", "state"),
+    )
+)
+
+# Proyecto (desde snapshot cacheado) ---------------------------------------
+PROJECT_ITEMS = REGISTRY.register(
+    Gauge(
+        "taiga_project_items",
+        "Items por proyecto, tipo y estado (snapshot cacheado).",
+        ("project", "kind", "state"),
+    )
+)
+PROJECT_STORY_POINTS = REGISTRY.register(
+    Gauge(
+        "taiga_project_story_points",
+        "Story points por proyecto y estado (snapshot cacheado).",
+        ("project", "state"),
+    )
+)
+PROJECT_SNAPSHOT_AGE = REGISTRY.register(
+    Gauge(
+        "taiga_project_snapshot_age_seconds",
+        "Antigüedad del snapshot de métricas por proyecto.",
+    )
+)
+
+# Arranque -------------------------------------------------------------------
+STARTUP_DURATION = REGISTRY.register(
+    Gauge(
+        "taiga_startup_duration_seconds",
+        "Duración del arranque del worker por fase (import, schema, taiga_client, mcp, total).",
+        ("phase",),
+    )
+)
+
+# Event loop y executor CPU-bound --------------------------------------------
+EVENT_LOOP_LAG = REGISTRY.register(
+    Gauge(
+        "taiga_event_loop_lag_seconds",
+        "Retraso del último tick del monitor respecto de lo programado.",
+    )
+)
+EVENT_LOOP_LAG_DURATION = REGISTRY.register(
+    Histogram(
+        "taiga_event_loop_lag_duration_seconds",
+        "Distribución del retraso del event loop medido por el monitor.",
+    )
+)
+CPU_STAGE_DURATION = REGISTRY.register(
+    Histogram(
+        "taiga_cpu_stage_duration_seconds",
+        "Duración de las etapas CPU-bound por etapa y modo de ejecución.",
+        ("stage", "mode"),
+    )
+)
+
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def normalize_endpoint(path: str) -> str:
+    """Reemplaza los IDs numéricos de una ruta para acotar la cardinalidad."""
+    return _ID_SEGMENT.sub("/{id}", path) or "/"
+
+
+# ---------------------------------------------------------------------------
+# Hooks de instrumentación
+# ---------------------------------------------------------------------------
+
+
+def observe_http_request(method: str, route: str, status_code: int, seconds: float) -> None:
+    HTTP_REQUEST_DURATION.observe(seconds, method=method, route=route)
+    HTTP_REQUESTS.inc(method=method, route=route, status=str(status_code))
+
+
+def observe_request_sql(route: str, statements: int, seconds: float, suspects: int) -> None:
+    HTTP_REQUEST_SQL_STATEMENTS.observe(statements, route=route)
+    HTTP_REQUEST_SQL_DURATION.observe(seconds, route=route)
+    if suspects:
+        HTTP_REQUEST_N_PLUS_ONE.inc(route=route)
+
+
+async def _on_taiga_request(request: httpx.Request) -> None:
+    request.extensions["telemetry_started_at"] = time.perf_counter()
+
+
+async def _on_taiga_response(response: httpx.Response) -> None:
+    request = response.request
+    started_at = request.extensions.get("telemetry_started_at")
+    endpoint = normalize_endpoint(request.url.path)
+    if started_at is not None:
+        TAIGA_REQUEST_DURATION.observe(
+            time.perf_counter() - started_at, method=request.method, endpoint=endpoint
+        )
+    TAIGA_RESPONSES.inc(method=request.method, endpoint=endpoint, status=str(response.status_code))
+
+
+def httpx_event_hooks() -> Dict[str, list]:
+    """Event hooks de httpx que miden las llamadas salientes a Taiga."""
+    return {"request": [_on_taiga_request], "response": [_on_taiga_response]}
+
+
+def observe_taiga_response(response: httpx.Response) -> None:
+    """
+    Span de una respuesta de Taiga ya leída: tamaño del cuerpo y latencia total.
+
+    Las respuestas servidas por la caché persistente no pasaron por los hooks
+    de httpx (no tienen momento de inicio): no viajaron desde Taiga, así que
+    no cuentan en TAIGA_RESPONSE_SIZE y se registran aparte en las trazas.
+    """
+    request = response.request
+    size = len(response.content)
+    started_at = request.extensions.get("telemetry_started_at")
+    if started_at is None:
+        profiling.record("taiga.cached", 0.0, size)
+        return
+    TAIGA_RESPONSE_SIZE.observe(
+        size, method=request.method, endpoint=normalize_endpoint(request.url.path)
+    )
+    profiling.record("taiga", time.perf_counter() - started_at, size)
+
+
+def observe_crud(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """Decorador: mide la corrutina de crud en CRUD_DURATION y en las trazas activas."""
+    operation = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        started = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            CRUD_DURATION.observe(elapsed, operation=operation)
+            profiling.record(f"crud.{operation}", elapsed)
+
+    return wrapper
+
+
+def observe_sync_phase(phase: str, seconds: float, created: int, updated: int, errors: int) -> None:
+    SYNC_PHASE_DURATION.observe(seconds, phase=phase)
+    profiling.record(f"sync.{phase}", seconds)
+    for result, amount in (("created", created), ("updated", updated), ("error", errors)):
+        if amount:
+            SYNC_ITEMS.inc(amount, phase=phase, result=result)
+
+
+def observe_sync_subphase(phase: str, subphase: str, seconds: float) -> None:
+    """Tiempo de una parte de `phase` (p. ej. los tags), sin sumarlo al total de las fases."""
+    SYNC_SUBPHASE_DURATION.observe(seconds, phase=phase, subphase=subphase)
+    profiling.record(f"sync.{phase}.{subphase}", seconds)
+
+
+def observe_sync(seconds: float, success: bool) -> None:
+    SYNC_DURATION.observe(seconds, outcome="success" if success else "error")
+    profiling.record("sync.project", seconds)
+    if success:
+        SYNC_LAST_SUCCESS.set(time.time())
+
+
+# Histogramas de los spans del camino caliente que se resumen en /debug/state
+TIMING_HISTOGRAMS = (
+    TAIGA_REQUEST_DURATION,
+    TAIGA_RESPONSE_SIZE,
+    CRUD_DURATION,
+    SYNC_PHASE_DURATION,
+    SYNC_SUBPHASE_DURATION,
+    SYNC_DURATION,
+)
+
+
+def timing_summary() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """count, suma, media y cuantiles estimados de cada histograma de tiempos, por serie."""
+    return {histogram.name: histogram.summary() for histogram in TIMING_HISTOGRAMS}
+
+
+def _collect_pool_usage() -> None:
+    from app.database import engine, read_engine
+
+    engines = [("primary", engine)]
+    if read_engine is not engine:
+        engines.append(("read", read_engine))
+    for name, async_engine in engines:
+        _collect_engine_pool(name, async_engine.sync_engine.pool)
+
+
+def _collect_engine_pool(name: str, pool: Any) -> None:
+    for state, attribute in (
+        ("size", "size"),
+        ("checked_out", "checkedout"),
+        ("checked_in", "checkedin"),
+        ("overflow", "overflow"),
+    ):
+        reader = getattr(pool, attribute, None)
+        if callable(reader):
+            DB_POOL_CONNECTIONS.set(reader(), engine=name, state=state)
+    # Capacidad máxima (pool_size + max_overflow): utilización = checked_out / capacity
+    max_overflow = getattr(pool, "_max_overflow", None)
+    if callable(getattr(pool, "size", None)) and isinstance(max_overflow, int):
+        capacity = pool.size() + max_overflow if max_overflow >= 0 else float("inf")
+        DB_POOL_CONNECTIONS.set(capacity, engine=name, state="capacity")
+
+
+REGISTRY.add_collector(_collect_pool_usage)
+
+
+# ---------------------------------------------------------------------------
+# Snapshot de métricas por proyecto
+# ---------------------------------------------------------------------------
+
+
+class ProjectSnapshotCache:
+    """
+    Cachea los agregados por proyecto que alimentan los gauges.
+
+    El snapshot se calcula con un puñado de consultas agregadas (GROUP BY) y se
+    reutiliza durante `ttl` segundos; la sincronización lo invalida para que el
+    siguiente scrape vea los datos nuevos.
+    """
+
+    def __init__(self, ttl: float = METRICS_SNAPSHOT_TTL) -> None:
+        self.ttl = ttl
+        self._taken_at: Optional[float] = None
+
+    def is_fresh(self) -> bool:
+        return self._taken_at is not None and time.monotonic() - self._taken_at < self.ttl
+
+    def invalidate(self) -> None:
+        self._taken_at = None
+
+    async def refresh(self, db: AsyncSession) -> None:
+        from app.metrics_exporter import MetricsExporter
+
+        snapshots = await MetricsExporter(db).get_project_snapshots()
+        items: Dict[LabelValues, float] = {}
+        points: Dict[LabelValues, float] = {}
+        for snapshot in snapshots:
+            project = snapshot["project"]
+            for kind in ("user_stories", "tasks"):
+                counts = snapshot[kind]
+                items[(project, kind, "open")] = counts["total"] - counts["closed"]
+                items[(project, kind, "closed")] = counts["closed"]
+            points[(project, "open")] = snapshot["points"]["total"] - snapshot["points"]["closed"]
+            points[(project, "closed")] = snapshot["points"]["closed"]
+        PROJECT_ITEMS.replace(items)
+        PROJECT_STORY_POINTS.replace(points)
+        self._taken_at = time.monotonic()
+
+    async def ensure_fresh(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        """Recalcula el snapshot sólo si venció; la sesión se abre bajo demanda."""
+        if not self.is_fresh():
+            async with session_factory() as db:
+                await self.refresh(db)
+        if self._taken_at is not None:
+            PROJECT_SNAPSHOT_AGE.set(time.monotonic() - self._taken_at)
+
+
+project_snapshots = ProjectSnapshotCache()
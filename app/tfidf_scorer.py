@@ -0,0 +1,142 @@
+"""
+TF-IDF module scorer for the AIReorganizer.
+
+Optional engine (requires numpy and scipy): each module is described by its
+key, name, description and keywords, and texts are vectorized with character
+n-grams (3-5, within word boundaries, so "organiz" still matches
+"organización"). A batch of stories and the module documents form one corpus:
+the term matrix is built as (texts x words) @ (words x n-grams), weighted with
+sublinear TF and smoothed IDF over the corpus, and every story is scored
+against every module with a single sparse matrix product.
+
+IDF weights come from the whole batch (that is what discounts the boilerplate
+shared by every story), so a story's score depends on the rest of the corpus.
+"""
+
+import re
+from collections import Counter
+from typing import Any, Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+    from scipy import sparse
+
+    TFIDF_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    TFIDF_AVAILABLE = False
+
+WORD_RE = re.compile(r"\w+")
+
+
+def char_ngrams(word: str, min_n: int = 3, max_n: int = 5) -> List[str]:
+    """Character n-grams of a word padded with spaces (like char_wb analyzers)."""
+    padded = f" {word} "
+    if len(padded) <= min_n:
+        return [padded]
+    return [
+        padded[start : start + size]
+        for size in range(min_n, max_n + 1)
+        for start in range(len(padded) - size + 1)
+    ]
+
+
+def module_document(module_key: str, module: Dict) -> str:
+    """Text that represents a module: key, name, description and keywords."""
+    return " ".join(
+        [module_key, module.get("name", ""), module.get("description", "")]
+        + list(module.get("keywords", []))
+    )
+
+
+class TfidfModuleScorer:
+    """Scores texts against module documents by TF-IDF cosine similarity."""
+
+    name = "tfidf"
+
+    def __init__(
+        self,
+        modules: Dict[str, Dict],
+        min_n: int = 3,
+        max_n: int = 5,
+        max_cached_words: int = 100_000,
+    ) -> None:
+        if not TFIDF_AVAILABLE:
+            raise RuntimeError("El motor TF-IDF requiere numpy y scipy")
+        self.module_keys = list(modules)
+        self.module_documents = [module_document(key, modules[key]) for key in modules]
+        self.min_n = min_n
+        self.max_n = max_n
+        self.max_cached_words = max_cached_words
+        # word -> n-grams, shared by every batch scored with this instance
+        self._word_ngrams: Dict[str, Tuple[str, ...]] = {}
+
+    def _ngrams(self, word: str) -> Tuple[str, ...]:
+        grams = self._word_ngrams.get(word)
+        if grams is None:
+            if len(self._word_ngrams) >= self.max_cached_words:
+                self._word_ngrams.clear()
+            grams = tuple(char_ngrams(word, self.min_n, self.max_n))
+            self._word_ngrams[word] = grams
+        return grams
+
+    def _term_matrix(self, texts: Sequence[str]) -> Any:
+        """(texts x n-grams) count matrix, built as word counts @ word n-grams."""
+        words: Dict[str, int] = {}
+        indptr: List[int] = [0]
+        indices: List[int] = []
+        counts: List[int] = []
+        for text in texts:
+            word_counts = Counter(WORD_RE.findall(text.lower()))
+            indices.extend(words.setdefault(word, len(words)) for word in word_counts)
+            counts.extend(word_counts.values())
+            indptr.append(len(indices))
+        text_words = sparse.csr_matrix(
+            (np.asarray(counts, dtype=np.float64), np.asarray(indices, dtype=np.int64), indptr),
+            shape=(len(texts), len(words)),
+        )
+
+        vocabulary: Dict[str, int] = {}
+        indptr, indices, counts = [0], [], []
+        for word in words:
+            gram_counts = Counter(
+                vocabulary.setdefault(gram, len(vocabulary)) for gram in self._ngrams(word)
+            )
+            indices.extend(gram_counts)
+            counts.extend(gram_counts.values())
+            indptr.append(len(indices))
+        word_grams = sparse.csr_matrix(
+            (np.asarray(counts, dtype=np.float64), np.asarray(indices, dtype=np.int64), indptr),
+            shape=(len(words), len(vocabulary)),
+        )
+        return (text_words @ word_grams).tocsr()
+
+    def scores(self, texts: Sequence[str]) -> "np.ndarray":
+        """Dense (texts x modules) matrix of cosine similarities."""
+        matrix = self._term_matrix(list(texts) + self.module_documents)
+        matrix.data = 1.0 + np.log(matrix.data)
+
+        # Smoothed IDF over the stories and the module documents
+        total = matrix.shape[0]
+        document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+        idf = np.log((1 + total) / (1 + document_frequency)) + 1
+        matrix = matrix @ sparse.diags(idf)
+
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        matrix = (sparse.diags(1.0 / norms) @ matrix).tocsr()
+
+        count = len(texts)
+        similarities: np.ndarray = (matrix[:count] @ matrix[count:].T).toarray()
+        return similarities
+
+    def best_many(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """Best module and its similarity for each text (first module wins ties)."""
+        if not texts:
+            return []
+        similarities = self.scores(texts)
+        best = similarities.argmax(axis=1)
+        confidence = similarities[np.arange(len(texts)), best]
+        return [
+            (self.module_keys[index], float(min(score, 1.0)))
+            for index, score in zip(best.tolist(), confidence.tolist())
+        ]
@@ -0,0 +1,169 @@
+"""
+Benchmark del AIReorganizer sobre miles de user stories sintéticas.
+
+Compara el costo por story del matcher compilado (una pasada por texto) contra
+el escaneo original de substrings (cada keyword de cada módulo por separado), y
+el motor de keywords contra el motor TF-IDF (si numpy/scipy están instalados)
+en throughput y en precisión sobre stories etiquetadas con su módulo.
+
+Uso:
+    python scripts/bench_ai_reorganizer.py --stories 5000 --repeat 3
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.ai_reorganizer import MODULE_DEFINITIONS, TAG_WORDS, AIReorganizer  # noqa: E402
+from app.tfidf_scorer import TFIDF_AVAILABLE, WORD_RE  # noqa: E402
+
+FILLER = (
+    "Como usuario quiero poder gestionar la información del sistema para cumplir "
+    "con los requisitos de la operación aduanera y validar los datos ingresados."
+).split()
+
+
+def naive_infer_module(subject: str, description: Optional[str] = None) -> tuple:
+    """Implementación original: un `in` por keyword y módulo."""
+    text = subject + (" " + description if description else "")
+    text_lower = text.lower()
+    scores = {}
+    for module_key, module in MODULE_DEFINITIONS.items():
+        keywords = module["keywords"]
+        matches = sum(1 for keyword in keywords if keyword in text_lower)
+        score = matches / len(keywords) if keywords else 0.0
+        if module_key.lower() in text_lower:
+            score += 0.3
+        scores[module_key] = min(score, 1.0)
+    best = max(scores, key=scores.get)
+    return best, scores[best]
+
+
+def build_stories(count: int, description_words: int, seed: int) -> List[SimpleNamespace]:
+    rng = random.Random(seed)
+    vocabulary = [kw for module in MODULE_DEFINITIONS.values() for kw in module["keywords"]]
+    vocabulary += list(TAG_WORDS)
+    stories = []
+    for idx in range(count):
+        subject = " ".join(rng.choices(FILLER, k=6) + rng.choices(vocabulary, k=2))
+        words = rng.choices(FILLER, k=description_words) + rng.choices(vocabulary, k=4)
+        rng.shuffle(words)
+        stories.append(
+            SimpleNamespace(id=idx, ref=idx, subject=subject, description=" ".join(words))
+        )
+    return stories
+
+
+def build_labelled_stories(
+    count: int, description_words: int, seed: int, source: str
+) -> List[SimpleNamespace]:
+    """Stories generadas desde un módulo conocido, con sus keywords o con su descripción."""
+    rng = random.Random(seed)
+    modules = list(MODULE_DEFINITIONS.items())
+    stories = []
+    for idx in range(count):
+        module_key, module = rng.choice(modules)
+        if source == "keywords":
+            terms = module["keywords"]
+        else:
+            terms = [w for w in WORD_RE.findall(module["description"].lower()) if len(w) > 3]
+        subject = " ".join(rng.choices(FILLER, k=5) + rng.choices(terms, k=2))
+        words = rng.choices(FILLER, k=description_words) + rng.choices(terms, k=2)
+        rng.shuffle(words)
+        stories.append(
+            SimpleNamespace(
+                id=idx, ref=idx, subject=subject, description=" ".join(words), module=module_key
+            )
+        )
+    return stories
+
+
+def accuracy(reorganizer: AIReorganizer, stories: List[SimpleNamespace]) -> float:
+    inferred = reorganizer.infer_stories([(us.subject, us.description) for us in stories])
+    hits = sum(1 for us, (module_key, _, _) in zip(stories, inferred) if module_key == us.module)
+    return hits / len(stories)
+
+
+def bench(label: str, fn: Callable[[SimpleNamespace], object], stories, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for story in stories:
+            fn(story)
+        best = min(best, time.perf_counter() - started)
+    per_story_us = best / len(stories) * 1e6
+    print(f"{label:<28} total {best * 1000:9.1f} ms   {per_story_us:8.2f} µs/story")
+    return per_story_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--stories", type=int, default=5000)
+    parser.add_argument("--description-words", type=int, default=120)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    stories = build_stories(args.stories, args.description_words, args.seed)
+    reorganizer = AIReorganizer()
+    print(f"{args.stories} stories, ~{args.description_words} palabras de descripción\n")
+
+    naive = bench(
+        "infer (scan por keyword)",
+        lambda us: naive_infer_module(us.subject, us.description),
+        stories,
+        args.repeat,
+    )
+    compiled = bench(
+        "infer (matcher compilado)",
+        lambda us: reorganizer._infer_module(us.subject, us.description),
+        stories,
+        args.repeat,
+    )
+    bench(
+        "infer + tags",
+        lambda us: reorganizer._generate_tags(
+            us.subject, reorganizer._infer_module(us.subject, us.description)[0]
+        ),
+        stories,
+        args.repeat,
+    )
+    print(f"\nspeedup infer: x{naive / compiled:.2f}")
+
+    engines = {"keywords": reorganizer}
+    if TFIDF_AVAILABLE:
+        engines["tfidf"] = AIReorganizer(engine="tfidf")
+    else:
+        print("\nnumpy/scipy no instalados: se omite el motor TF-IDF")
+
+    print("\nthroughput por lote (infer_stories)")
+    items = [(us.subject, us.description) for us in stories]
+    for name, engine in engines.items():
+        engine.infer_stories(items[:10])  # ajusta/compila el motor antes de medir
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            engine.infer_stories(items)
+            best = min(best, time.perf_counter() - started)
+        print(f"{'engine ' + name:<28} total {best * 1000:9.1f} ms   "
+              f"{best / len(items) * 1e6:8.2f} µs/story")
+
+    print("\nprecisión sobre stories etiquetadas")
+    for source in ("keywords", "description"):
+        labelled = build_labelled_stories(
+            min(args.stories, 2000), args.description_words, args.seed, source
+        )
+        scores = "   ".join(
+            f"{name} {accuracy(engine, labelled) * 100:5.1f}%" for name, engine in engines.items()
+        )
+        print(f"{'términos de ' + source:<28} {scores}")
+
+
+if __name__ == "__main__":
+    main()
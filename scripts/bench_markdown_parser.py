@@ -0,0 +1,153 @@
+"""
+Benchmark del MarkdownTaskParser sobre un documento de planificación sintético.
+
+Compara el parser actual (un recorrido de encabezados por sección y una sola
+pasada de reescritura de links) contra la implementación original basada en
+varias búsquedas regex por campo y tres `re.sub` por dependencia, y verifica
+que la salida sea idéntica.
+
+Uso:
+    python scripts/bench_markdown_parser.py --tasks 6000 --repeat 5
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.markdown_parser import MarkdownTaskParser  # noqa: E402
+
+
+class LegacyMarkdownTaskParser(MarkdownTaskParser):
+    """Implementación original: cada campo se busca con su propio regex."""
+
+    def parse_tasks(self, markdown: str, project_slug: str) -> List[Dict]:
+        if not markdown.startswith("\n"):
+            markdown = "\n" + markdown
+        sections = re.split(r"\n### \d+\.\s+", markdown)
+        return [self._parse_legacy_section(section, project_slug) for section in sections[1:]]
+
+    def _parse_legacy_section(self, section: str, project_slug: str) -> Dict:
+        title = section.split("\n")[0].strip()
+        match = re.search(r"\*\*Componente\*\*:\s*(.+)", section)
+        component = match.group(1).strip() if match else None
+
+        match = re.search(r"\*\*Descripción\*\*:\s*\n(.+?)(?=\n\*\*|$)", section, re.DOTALL)
+        description = match.group(1).strip() if match else ""
+
+        criteria = []
+        match = re.search(
+            r"\*\*Criterios de aceptación\*\*:\s*\n(.+?)(?=\n\*\*|$)", section, re.DOTALL
+        )
+        if match:
+            criteria = re.findall(r"^[-*]\s+(.+)$", match.group(1), re.MULTILINE)
+
+        dependencies = []
+        match = re.search(r"\*\*Dependencias\*\*:\s*(.+?)(?=\n\n|$)", section, re.DOTALL)
+        if match:
+            dependencies = [d.strip() for d in match.group(1).strip().split(",")]
+
+        parts = []
+        if component:
+            parts += [f"**Componente**: {component}", ""]
+        if description:
+            parts += ["## Descripción", "", description, ""]
+        if criteria:
+            parts += ["## Criterios de Aceptación", ""] + [f"- {c}" for c in criteria] + [""]
+        if dependencies:
+            parts += ["## Dependencias", ""]
+            parts += [f"- {self._legacy_link(dep, project_slug)}" for dep in dependencies]
+            parts.append("")
+
+        tags = [t for t in self._extract_tags(component) if t]
+        return {"subject": title, "description": "\n".join(parts), "tags": tags or None}
+
+    def _legacy_link(self, text: str, project_slug: str) -> str:
+        base = f"{self.taiga_base_url}/project/{project_slug}"
+        text = re.sub(
+            r"Tarea (\d+)", lambda m: f"[Tarea #{m.group(1)}]({base}/task/{m.group(1)})", text
+        )
+        text = re.sub(
+            r"(HU|US) #(\d+)",
+            lambda m: f"[{m.group(1)} #{m.group(2)}]({base}/us/{m.group(2)})",
+            text,
+        )
+        return re.sub(
+            r"(?<!\w)#(\d+)(?!\w)", lambda m: f"[#{m.group(1)}]({base}/us/{m.group(1)})", text
+        )
+
+
+def build_document(tasks: int, seed: int) -> str:
+    rng = random.Random(seed)
+    parts = ["# Plan de trabajo\n\nContexto y diagramas.\n\n## Tareas Propuestas\n"]
+    for number in range(1, tasks + 1):
+        description = "\n".join(
+            f"Línea {line} que menciona HU #{rng.randint(1, 500)} y Tarea {rng.randint(1, 50)} "
+            "con texto de relleno para simular una descripción real."
+            for line in range(rng.randint(1, 6))
+        )
+        criteria = "\n".join(
+            f"- Criterio {idx} relacionado con #{rng.randint(1, 99)}"
+            for idx in range(rng.randint(0, 5))
+        )
+        dependencies = ", ".join(
+            rng.choice(
+                [
+                    f"Tarea {rng.randint(1, 50)}",
+                    f"HU #{rng.randint(1, 300)}",
+                    f"US #{rng.randint(1, 300)}",
+                    f"#{rng.randint(1, 99)}",
+                    "Sistema D3",
+                ]
+            )
+            for _ in range(rng.randint(1, 4))
+        )
+        parts.append(
+            f"### {number}. Tarea número {number}\n\n"
+            f"**Componente**: {rng.choice(['Backend - API', 'Frontend - UI', 'Testing - E2E'])}\n"
+            "**Estimación**: 5 puntos\n\n"
+            f"**Descripción**:\n{description}\n\n"
+            f"**Criterios de aceptación**:\n{criteria}\n\n"
+            f"**Dependencias**: {dependencies}\n\n---\n"
+        )
+    return "\n".join(parts)
+
+
+def bench(label: str, fn: Callable[[], object], repeat: int, size_mb: float) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<10} {best * 1000:9.1f} ms   {size_mb / best:7.1f} MB/s")
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tasks", type=int, default=6000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    document = build_document(args.tasks, args.seed)
+    size_mb = len(document.encode("utf-8")) / 1e6
+    current = MarkdownTaskParser("https://taiga.example.com")
+    legacy = LegacyMarkdownTaskParser("https://taiga.example.com")
+    print(f"{args.tasks} tareas, {size_mb:.2f} MB\n")
+
+    if current.parse_tasks(document, "demo") != legacy.parse_tasks(document, "demo"):
+        raise SystemExit("La salida difiere de la implementación original")
+
+    original = bench("original", lambda: legacy.parse_tasks(document, "demo"), args.repeat, size_mb)
+    single = bench("actual", lambda: current.parse_tasks(document, "demo"), args.repeat, size_mb)
+    print(f"\nspeedup: x{original / single:.2f} (salida idéntica)")
+
+
+if __name__ == "__main__":
+    main()
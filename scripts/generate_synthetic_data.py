@@ -0,0 +1,658 @@
+"""
+Generador de datos sintéticos para la base local.
+
+Llena projects, epics, user_stories, tasks, tags, las tablas de unión,
+status_history, events y story_proposals con volúmenes configurables (hasta
+millones de filas) y datos deterministas por semilla, para probar el
+rendimiento de métricas y del table-map sin depender de lo que se haya
+sincronizado.
+
+- Fechas: creación repartida en `--days` días hacia atrás, con menos actividad
+  los fines de semana; modificación y cierre con colas largas (lognormal).
+- Estados: las historias más viejas tienen más probabilidad de estar cerradas.
+- Tags: frecuencia tipo Zipf sobre `--tags` nombres, de 0 a 4 por entidad.
+- raw_data: payloads con la forma de la API de Taiga.
+- Historial: cada historia y tarea recorre los estados en orden entre su
+  creación y su última modificación (el cierre cae en la fecha de fin), con
+  los eventos `created` / `status_changed` que registraría la sincronización.
+- Propuestas: las calcula `crud.refresh_story_proposals` con el AIReorganizer,
+  como al sincronizar (`--no-proposals` las omite en datasets muy grandes).
+
+El esquema se prepara con `init_db()` de la app: una base nueva se crea y
+queda marcada en la revisión head de Alembic; una desactualizada se rechaza.
+
+Inserta con `insert()` de SQLAlchemy Core en lotes (executemany) e IDs
+asignados por el generador, sin pasar por el ORM. Los `taiga_id` arrancan en
+SYNTHETIC_TAIGA_ID_BASE para no chocar con datos reales.
+
+Uso:
+    python scripts/generate_synthetic_data.py --projects 2 --stories 50000 --tasks 200000
+    python scripts/generate_synthetic_data.py --database-url postgresql+asyncpg://... \
+        --stories 1000000 --tasks 4000000 --end-date 2025-06-30
+"""
+
+import argparse
+import asyncio
+import itertools
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import func, insert, select, text, update  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession  # noqa: E402
+
+from app import crud  # noqa: E402
+from app.database import DATABASE_URL, SchemaOutdatedError, build_engine, init_db  # noqa: E402
+from app.models import (  # noqa: E402
+    ActivityEvent,
+    Epic,
+    Project,
+    StatusTransition,
+    StoryProposal,
+    Tag,
+    Task,
+    TaskTag,
+    UserStory,
+    UserStoryTag,
+)
+
+SYNTHETIC_TAIGA_ID_BASE = 900_000_000
+
+STORY_STATUSES = ["New", "Ready", "In progress", "Ready for test", "Done"]
+TASK_STATUSES = ["New", "In progress", "Ready for test", "Closed"]
+TAG_WORDS = [
+    "backend", "frontend", "api", "ui", "testing", "integracion", "arca", "firma",
+    "permisos", "reportes", "notificaciones", "seguridad", "performance", "bug", "deuda",
+    "d1", "d2", "d3", "d4", "mvp", "infra", "datos", "auditoria", "ux",
+]  # fmt: skip
+WORDS = (
+    "como usuario quiero poder gestionar permisos de empresa firma digital tramite "
+    "notificaciones reportes integracion arca login sesion token validar documentos "
+    "expediente auditoria historial busqueda exportar importar padron despachante "
+    "aduana liquidacion pago factura estado revision aprobar rechazar"
+).split()
+USERNAMES = [f"dev{n}" for n in range(1, 25)]
+COLORS = ["#e44057", "#a983e5", "#70728f", "#5b9bd5", "#f6a623", "#43bb9e", "#6c757d"]
+
+
+class SyntheticDataGenerator:
+    """Genera filas (dicts listos para insert()) de un dataset sintético."""
+
+    def __init__(
+        self,
+        projects: int,
+        epics: int,
+        stories: int,
+        tasks: int,
+        tags: int,
+        days: int,
+        seed: int,
+        first_ids: Dict[str, int],
+        slug_prefix: str = "synthetic",
+        now: Optional[datetime] = None,
+    ) -> None:
+        self.projects = projects
+        self.epics = epics
+        self.stories = stories
+        self.tasks = tasks
+        self.days = max(days, 1)
+        self.rng = random.Random(seed)
+        # Generador aparte para el historial: el resto del dataset no cambia con él
+        self.history_rng = random.Random(f"{seed}-history")
+        self.seed = seed
+        self.slug_prefix = slug_prefix
+        # Con la misma semilla y fecha de fin el dataset es idéntico
+        self.now = now or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.start = self.now - timedelta(days=self.days)
+        self.next_ids = dict(first_ids)
+        self.next_taiga_id = SYNTHETIC_TAIGA_ID_BASE + first_ids.get("taiga", 0)
+        self.project_ids: List[int] = []
+
+        self.tag_names = [
+            TAG_WORDS[i] if i < len(TAG_WORDS) else f"tag-{i}" for i in range(max(tags, 1))
+        ]
+        # Zipf (s=1.1): pocos tags concentran la mayoría de los usos
+        weights = [1 / (rank**1.1) for rank in range(1, len(self.tag_names) + 1)]
+        self.tag_cum_weights = list(itertools.accumulate(weights))
+
+    def _id(self, table: str) -> int:
+        value = self.next_ids[table]
+        self.next_ids[table] = value + 1
+        return value
+
+    def _taiga_id(self) -> int:
+        self.next_taiga_id += 1
+        return self.next_taiga_id
+
+    def _text(self, words: int) -> str:
+        return " ".join(self.rng.choices(WORDS, k=words))
+
+    def _description(self) -> str:
+        rng = self.rng
+        parts = [self._text(rng.randint(8, 40)).capitalize() + "."]
+        if rng.random() < 0.4:
+            parts.append("\n".join(f"- {self._text(rng.randint(3, 8))}" for _ in range(3)))
+        return "\n\n".join(parts)
+
+    def _created_date(self) -> datetime:
+        rng = self.rng
+        created = self.start + timedelta(seconds=rng.random() * self.days * 86400)
+        # Menos actividad el fin de semana: la mayoría se corre al lunes
+        if created.weekday() >= 5 and rng.random() < 0.8:
+            created += timedelta(days=7 - created.weekday())
+        return min(created, self.now)
+
+    def _after(self, moment: datetime, median_hours: float) -> datetime:
+        delay = self.rng.lognormvariate(math.log(median_hours), 1.0)
+        return min(moment + timedelta(hours=delay), self.now)
+
+    def _pick_tags(self, maximum: int) -> List[int]:
+        count = self.rng.choices(range(maximum + 1), weights=[3, 4, 2, 1, 0.5][: maximum + 1])[0]
+        picked = self.rng.choices(
+            range(len(self.tag_names)), cum_weights=self.tag_cum_weights, k=count
+        )
+        return sorted(set(picked))
+
+    def generate(self) -> Iterator[tuple]:
+        """Produce tuplas (modelo, fila) en orden compatible con las claves foráneas."""
+        for index in range(self.projects):
+            yield from self._project(index)
+
+    def _project(self, index: int) -> Iterator[tuple]:
+        rng = self.rng
+        project_id = self._id("projects")
+        self.project_ids.append(project_id)
+        slug = f"{self.slug_prefix}-{self.seed}-{index + 1}"
+        project_taiga_id = self._taiga_id()
+        project_raw = {
+            "id": project_taiga_id,
+            "name": f"Proyecto sintético {index + 1}",
+            "slug": slug,
+            "description": "Proyecto generado para pruebas de volumen",
+            "is_private": False,
+            "created_date": self.start.isoformat() + "Z",
+            "modified_date": self.now.isoformat() + "Z",
+            "total_milestones": self.days // 14,
+        }
+        yield Project, {
+            "id": project_id,
+            "taiga_id": project_taiga_id,
+            "name": project_raw["name"],
+            "slug": slug,
+            "description": project_raw["description"],
+            "is_private": False,
+            "created_date": self.start,
+            "modified_date": self.now,
+            "raw_data": project_raw,
+            "last_synced": self.now,
+            "data_version": 1,
+        }
+
+        tag_ids = []
+        for name in self.tag_names:
+            tag_id = self._id("tags")
+            tag_ids.append(tag_id)
+            yield Tag, {
+                "id": tag_id,
+                "project_id": project_id,
+                "name": name,
+                "color": rng.choice(COLORS),
+                "last_synced": self.now,
+            }
+
+        epic_rows = []
+        for epic_index in range(self.epics):
+            created = self._created_date()
+            raw = {
+                "id": self._taiga_id(),
+                "ref": epic_index + 1,
+                "project": project_taiga_id,
+                "subject": f"Épica {epic_index + 1}: {self._text(3)}",
+                "description": self._description(),
+                "color": rng.choice(COLORS),
+                "created_date": created.isoformat() + "Z",
+                "modified_date": self._after(created, 72).isoformat() + "Z",
+                "version": rng.randint(1, 6),
+            }
+            row = {
+                "id": self._id("epics"),
+                "taiga_id": raw["id"],
+                "project_id": project_id,
+                "ref": raw["ref"],
+                "subject": raw["subject"],
+                "description": raw["description"],
+                "color": raw["color"],
+                "created_date": created,
+                "modified_date": datetime.fromisoformat(raw["modified_date"][:-1]),
+                "raw_data": raw,
+                "last_synced": self.now,
+            }
+            epic_rows.append(row)
+            yield Epic, row
+        # Tamaño de épicas sesgado: algunas agrupan muchas historias
+        epic_cum_weights = list(
+            itertools.accumulate(1 / (rank**0.8) for rank in range(1, len(epic_rows) + 1))
+        )
+
+        # Tareas repartidas entre historias (multinomial); ~5% quedan sueltas
+        story_task_counts = [0] * self.stories
+        loose_tasks = 0
+        for _ in range(self.tasks):
+            if self.stories and rng.random() >= 0.05:
+                story_task_counts[rng.randrange(self.stories)] += 1
+            else:
+                loose_tasks += 1
+
+        ref = self.epics
+        span = self.days * 86400
+        for story_index in range(self.stories):
+            ref += 1
+            created = self._created_date()
+            age = (self.now - created).total_seconds() / span
+            status = "Done" if rng.random() < 0.15 + 0.7 * age else rng.choice(STORY_STATUSES[:-1])
+            closed = status == "Done"
+            modified = self._after(created, 48)
+            epic = (
+                rng.choices(epic_rows, cum_weights=epic_cum_weights)[0]
+                if epic_rows and rng.random() < 0.8
+                else None
+            )
+            story_tags = self._pick_tags(4)
+            raw = {
+                "id": self._taiga_id(),
+                "ref": ref,
+                "project": project_taiga_id,
+                "subject": f"HU {story_index + 1}: {self._text(6)}",
+                "description": self._description(),
+                "status_extra_info": {"name": status, "is_closed": closed},
+                "is_closed": closed,
+                "version": rng.randint(1, 12),
+                "milestone_name": f"Sprint {int(age * self.days) // 14 + 1}",
+                "total_points": float(rng.choice([1, 2, 3, 5, 8, 13])),
+                "tags": [[self.tag_names[t], None] for t in story_tags],
+                "epics": [{"id": epic["taiga_id"], "ref": epic["ref"]}] if epic else None,
+                "assigned_to_extra_info": {"username": rng.choice(USERNAMES)},
+                "created_date": created.isoformat() + "Z",
+                "modified_date": modified.isoformat() + "Z",
+                "finish_date": modified.isoformat() + "Z" if closed else None,
+            }
+            story_id = self._id("user_stories")
+            story_row = {
+                "id": story_id,
+                "taiga_id": raw["id"],
+                "project_id": project_id,
+                "epic_id": epic["id"] if epic else None,
+                "ref": ref,
+                "subject": raw["subject"],
+                "description": raw["description"],
+                "status_name": status,
+                "is_closed": closed,
+                "version": raw["version"],
+                "milestone_name": raw["milestone_name"],
+                "created_date": created,
+                "modified_date": modified,
+                "finish_date": modified if closed else None,
+                "total_points": raw["total_points"],
+                "raw_data": raw,
+                "last_synced": self.now,
+            }
+            yield UserStory, story_row
+            yield from self._history(
+                "user_story", story_row, STORY_STATUSES, raw["assigned_to_extra_info"]["username"]
+            )
+            for tag in story_tags:
+                yield UserStoryTag, {
+                    "id": self._id("user_story_tags"),
+                    "user_story_id": story_id,
+                    "tag_id": tag_ids[tag],
+                }
+            for _ in range(story_task_counts[story_index]):
+                ref += 1
+                yield from self._task(
+                    project_id, project_taiga_id, tag_ids, ref, raw, story_id, created
+                )
+
+        for _ in range(loose_tasks):
+            ref += 1
+            yield from self._task(project_id, project_taiga_id, tag_ids, ref, None, None, None)
+
+    def _task(
+        self,
+        project_id: int,
+        project_taiga_id: int,
+        tag_ids: List[int],
+        ref: int,
+        story_raw: Optional[Dict[str, Any]],
+        story_id: Optional[int],
+        story_created: Optional[datetime],
+    ) -> Iterator[tuple]:
+        rng = self.rng
+        if story_raw is not None and story_created is not None:
+            created = self._after(story_created, 24)
+            # Las tareas de una historia cerrada están casi todas cerradas
+            closed = rng.random() < (0.95 if story_raw["is_closed"] else 0.3)
+        else:
+            created = self._created_date()
+            closed = rng.random() < 0.5
+        status = "Closed" if closed else rng.choice(TASK_STATUSES[:-1])
+        modified = self._after(created, 30)
+        username = rng.choice(USERNAMES) if rng.random() < 0.85 else None
+        task_tags = self._pick_tags(2)
+        raw = {
+            "id": self._taiga_id(),
+            "ref": ref,
+            "project": project_taiga_id,
+            "user_story": story_raw["id"] if story_raw else None,
+            "subject": f"Tarea {ref}: {self._text(5)}",
+            "description": self._text(rng.randint(0, 30)),
+            "status_extra_info": {"name": status, "is_closed": closed},
+            "is_closed": closed,
+            "version": rng.randint(1, 8),
+            "assigned_to_extra_info": {"username": username} if username else None,
+            "tags": [[self.tag_names[t], None] for t in task_tags],
+            "created_date": created.isoformat() + "Z",
+            "modified_date": modified.isoformat() + "Z",
+            "finished_date": modified.isoformat() + "Z" if closed else None,
+        }
+        task_id = self._id("tasks")
+        task_row = {
+            "id": task_id,
+            "taiga_id": raw["id"],
+            "project_id": project_id,
+            "user_story_id": story_id,
+            "ref": ref,
+            "subject": raw["subject"],
+            "description": raw["description"],
+            "status_name": status,
+            "is_closed": closed,
+            "version": raw["version"],
+            "assigned_to_username": username,
+            "created_date": created,
+            "modified_date": modified,
+            "finished_date": modified if closed else None,
+            "raw_data": raw,
+            "last_synced": self.now,
+        }
+        yield Task, task_row
+        yield from self._history("task", task_row, TASK_STATUSES, username)
+        for tag in task_tags:
+            yield TaskTag, {"id": self._id("task_tags"), "task_id": task_id, "tag_id": tag_ids[tag]}
+
+    def _history(
+        self, entity_type: str, row: Dict[str, Any], statuses: List[str], actor: Optional[str]
+    ) -> Iterator[tuple]:
+        """
+        Historial de estados y eventos de una historia o tarea, coherente con sus
+        fechas: recorre `statuses` en orden hasta el estado actual, con la última
+        transición (el cierre, si está cerrada) en la fecha de modificación.
+        """
+        created, modified = row["created_date"], row["modified_date"]
+        path = statuses[: statuses.index(row["status_name"]) + 1]
+        moments = sorted(
+            created + (modified - created) * self.history_rng.random() for _ in path[2:]
+        )
+        moments.append(modified)
+
+        common = {"project_id": row["project_id"], "entity_type": entity_type}
+        event = dict(
+            common,
+            entity_id=row["id"],
+            entity_taiga_id=row["taiga_id"],
+            entity_ref=row["ref"],
+            subject=row["subject"],
+            actor=actor,
+        )
+        yield StatusTransition, dict(
+            common,
+            id=self._id("status_history"),
+            entity_id=row["id"],
+            from_status=None,
+            to_status=path[0],
+            from_closed=None,
+            to_closed=False,
+            changed_at=created,
+        )
+        yield ActivityEvent, dict(
+            event,
+            id=self._id("events"),
+            event_type="created",
+            changes=None,
+            from_status=None,
+            to_status=path[0],
+            occurred_at=created,
+            recorded_at=created,
+        )
+        for from_status, to_status, moment in zip(path, path[1:], moments):
+            closing = row["is_closed"] and to_status == path[-1]
+            changes: Dict[str, Any] = {"status_name": {"old": from_status, "new": to_status}}
+            if closing:
+                changes["is_closed"] = {"old": False, "new": True}
+            yield StatusTransition, dict(
+                common,
+                id=self._id("status_history"),
+                entity_id=row["id"],
+                from_status=from_status,
+                to_status=to_status,
+                from_closed=False,
+                to_closed=closing,
+                changed_at=moment,
+            )
+            yield ActivityEvent, dict(
+                event,
+                id=self._id("events"),
+                event_type="status_changed",
+                changes=changes,
+                from_status=from_status,
+                to_status=to_status,
+                occurred_at=moment,
+                recorded_at=moment,
+            )
+        if len(path) == 1 and modified != created:
+            yield ActivityEvent, dict(
+                event,
+                id=self._id("events"),
+                event_type="updated",
+                changes={},
+                from_status=None,
+                to_status=path[0],
+                occurred_at=modified,
+                recorded_at=modified,
+            )
+
+
+# Orden de inserción de cada lote (padres antes que hijos)
+INSERT_ORDER = [
+    Project,
+    Tag,
+    Epic,
+    UserStory,
+    UserStoryTag,
+    Task,
+    TaskTag,
+    StatusTransition,
+    ActivityEvent,
+]
+
+
+async def next_ids(engine: AsyncEngine) -> Dict[str, int]:
+    """Primer ID libre por tabla y el mayor taiga_id sintético ya usado."""
+    ids: Dict[str, int] = {}
+    taiga = 0
+    async with engine.connect() as conn:
+        for model in INSERT_ORDER:
+            table = model.__table__
+            ids[table.name] = (await conn.scalar(select(func.max(table.c.id))) or 0) + 1
+            if "taiga_id" in table.c:
+                used = await conn.scalar(select(func.max(table.c.taiga_id))) or 0
+                taiga = max(taiga, used - SYNTHETIC_TAIGA_ID_BASE)
+    ids["taiga"] = taiga
+    return ids
+
+
+async def reset_sequences(engine: AsyncEngine) -> None:
+    """En PostgreSQL, alinea las secuencias de ID con los IDs insertados a mano."""
+    if engine.dialect.name != "postgresql":
+        return
+    async with engine.begin() as conn:
+        for model in INSERT_ORDER:
+            name = model.__table__.name
+            await conn.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {name}))"
+                )
+            )
+
+
+async def write_rows(engine: AsyncEngine, rows: Iterator[tuple], batch_size: int) -> Dict[str, int]:
+    """Inserta las filas en lotes, una transacción por lote. Devuelve filas por tabla."""
+    buffers: Dict[Any, List[Dict[str, Any]]] = {model: [] for model in INSERT_ORDER}
+    counts = {model.__table__.name: 0 for model in INSERT_ORDER}
+    pending = 0
+
+    async def flush() -> None:
+        async with engine.begin() as conn:
+            for model in INSERT_ORDER:
+                batch = buffers[model]
+                if batch:
+                    await conn.execute(insert(model.__table__), batch)
+                    counts[model.__table__.name] += len(batch)
+                    buffers[model] = []
+
+    for model, row in rows:
+        buffers[model].append(row)
+        pending += 1
+        if pending >= batch_size:
+            await flush()
+            pending = 0
+    await flush()
+    return counts
+
+
+async def refresh_proposals(engine: AsyncEngine, project_ids: List[int], now: datetime) -> int:
+    """Calcula las propuestas del AIReorganizer como la sincronización, fechadas en `now`."""
+    from app.ai_reorganizer import AIReorganizer
+
+    reorganizer = AIReorganizer()
+    refreshed = 0
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        for project_id in project_ids:
+            refreshed += await crud.refresh_story_proposals(db, project_id, reorganizer)
+        await db.execute(
+            update(StoryProposal)
+            .where(StoryProposal.project_id.in_(project_ids))
+            .values(computed_at=now)
+        )
+        await db.commit()
+    return refreshed
+
+
+async def generate(
+    database_url: str,
+    projects: int,
+    epics: int,
+    stories: int,
+    tasks: int,
+    tags: int,
+    days: int,
+    seed: int,
+    batch_size: int,
+    slug_prefix: str = "synthetic",
+    end_date: Optional[datetime] = None,
+    proposals: bool = True,
+) -> Dict[str, int]:
+    engine = build_engine(database_url)
+    try:
+        try:
+            await init_db(engine)
+        except SchemaOutdatedError as exc:
+            raise SystemExit(str(exc)) from exc
+        async with engine.connect() as conn:
+            slugs = [f"{slug_prefix}-{seed}-{index + 1}" for index in range(projects)]
+            existing = (
+                await conn.scalars(select(Project.slug).where(Project.slug.in_(slugs)))
+            ).all()
+        if existing:
+            raise SystemExit(
+                f"Ya existen proyectos {', '.join(existing)}: usar otra --seed o --slug-prefix"
+            )
+
+        generator = SyntheticDataGenerator(
+            projects=projects,
+            epics=epics,
+            stories=stories,
+            tasks=tasks,
+            tags=tags,
+            days=days,
+            seed=seed,
+            first_ids=await next_ids(engine),
+            slug_prefix=slug_prefix,
+            now=end_date,
+        )
+        counts = await write_rows(engine, generator.generate(), batch_size)
+        await reset_sequences(engine)
+        if proposals:
+            counts[StoryProposal.__tablename__] = await refresh_proposals(
+                engine, generator.project_ids, generator.now
+            )
+        return counts
+    finally:
+        await engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--projects", type=int, default=1)
+    parser.add_argument("--epics", type=int, default=20, help="Épicas por proyecto")
+    parser.add_argument("--stories", type=int, default=10000, help="Historias por proyecto")
+    parser.add_argument("--tasks", type=int, default=40000, help="Tareas por proyecto")
+    parser.add_argument("--tags", type=int, default=40, help="Tags distintos por proyecto")
+    parser.add_argument("--days", type=int, default=365, help="Antigüedad del proyecto")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=5000, help="Filas por transacción")
+    parser.add_argument("--slug-prefix", default="synthetic")
+    parser.add_argument(
+        "--end-date",
+        type=datetime.fromisoformat,
+        help="Fecha más reciente del dataset (por defecto hoy a las 00:00 UTC)",
+    )
+    parser.add_argument(
+        "--no-proposals",
+        action="store_true",
+        help="No calcular story_proposals (el AIReorganizer tarda con millones de historias)",
+    )
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    counts = asyncio.run(
+        generate(
+            database_url=args.database_url,
+            projects=args.projects,
+            epics=args.epics,
+            stories=args.stories,
+            tasks=args.tasks,
+            tags=args.tags,
+            days=args.days,
+            seed=args.seed,
+            batch_size=max(args.batch_size, 1),
+            slug_prefix=args.slug_prefix,
+            end_date=args.end_date,
+            proposals=not args.no_proposals,
+        )
+    )
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    for table, count in counts.items():
+        print(f"{table:<18} {count:>12,}")
+    print(f"{'total':<18} {total:>12,}  en {elapsed:.1f}s ({total / elapsed:,.0f} filas/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Taiga simulado en proceso para benchmarks y tests.
+
+`FakeTaiga` genera un proyecto con la cantidad pedida de épicas, historias y
+tareas (datos deterministas por semilla) y responde los endpoints que usan
+el TaigaClient y la sincronización a través de un `httpx.MockTransport`,
+con una latencia opcional por request para simular la red.
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+API_PREFIX = "/api/v1/"
+BASE_URL = "https://taiga.bench/api/v1/"
+
+STORY_STATUSES = ["New", "Ready", "In progress", "Ready for test", "Done"]
+TASK_STATUSES = ["New", "In progress", "Ready for test", "Closed"]
+TAGS = ["backend", "frontend", "api", "ui", "testing", "integration", "d3", "d4"]
+WORDS = (
+    "como usuario quiero poder gestionar permisos de empresa firma digital tramite "
+    "notificaciones reportes integracion arca login sesion token validar documentos "
+    "expediente auditoria historial busqueda exportar"
+).split()
+
+
+class FakeTaiga:
+    """Proyecto sintético de Taiga servido por un MockTransport."""
+
+    def __init__(
+        self,
+        epics: int = 10,
+        stories: int = 200,
+        tasks: int = 800,
+        latency_ms: float = 0.0,
+        page_size: int = 100,
+        seed: int = 1,
+        project_id: int = 1,
+        slug: str = "bench",
+    ) -> None:
+        self.latency = max(latency_ms, 0.0) / 1000
+        self.page_size = max(page_size, 1)
+        self.requests = 0
+        rng = random.Random(seed)
+        base_date = datetime(2025, 1, 6)
+
+        def text(words: int) -> str:
+            return " ".join(rng.choice(WORDS) for _ in range(words))
+
+        def dates(index: int) -> Dict[str, str]:
+            created = base_date + timedelta(hours=index * 3)
+            return {
+                "created_date": created.isoformat() + "Z",
+                "modified_date": (created + timedelta(days=rng.randint(0, 30))).isoformat() + "Z",
+            }
+
+        self.project = {
+            "id": project_id,
+            "name": f"Proyecto {slug}",
+            "slug": slug,
+            "description": "Proyecto sintético para benchmarks",
+            "is_private": False,
+            **dates(0),
+        }
+
+        self.epics: List[Dict[str, Any]] = [
+            {
+                "id": 1000 + index,
+                "ref": index + 1,
+                "project": project_id,
+                "subject": f"Épica {index + 1}: {text(3)}",
+                "description": text(30),
+                "color": f"#{rng.randrange(0x1000000):06x}",
+                "version": 1,
+                **dates(index),
+            }
+            for index in range(epics)
+        ]
+
+        self.stories: List[Dict[str, Any]] = []
+        for index in range(stories):
+            # ~80% de las historias pertenecen a una épica
+            epic = rng.choice(self.epics) if self.epics and rng.random() < 0.8 else None
+            status = rng.choice(STORY_STATUSES)
+            closed = status == "Done"
+            story = {
+                "id": 5000 + index,
+                "ref": epics + index + 1,
+                "project": project_id,
+                "subject": f"HU {index + 1}: {text(6)}",
+                "description": text(rng.randint(20, 120)),
+                "status_extra_info": {"name": status},
+                "is_closed": closed,
+                "version": rng.randint(1, 5),
+                "milestone_name": f"Sprint {index % 12 + 1}",
+                "total_points": float(rng.choice([1, 2, 3, 5, 8])),
+                "tags": [[tag, None] for tag in rng.sample(TAGS, rng.randint(0, 3))],
+                "epics": [{"id": epic["id"]}] if epic else None,
+                "backlog_order": index,
+                **dates(index),
+            }
+            if closed:
+                story["finish_date"] = story["modified_date"]
+            self.stories.append(story)
+
+        self.tasks: List[Dict[str, Any]] = []
+        for index in range(tasks):
+            story = rng.choice(self.stories) if self.stories else None
+            status = rng.choice(TASK_STATUSES)
+            closed = status == "Closed"
+            task = {
+                "id": 20000 + index,
+                "ref": epics + stories + index + 1,
+                "project": project_id,
+                "user_story": story["id"] if story else None,
+                "subject": f"Tarea {index + 1}: {text(5)}",
+                "description": text(rng.randint(10, 60)),
+                "status_extra_info": {"name": status},
+                "is_closed": closed,
+                "version": rng.randint(1, 5),
+                "assigned_to_extra_info": {"username": f"dev{rng.randint(1, 8)}"},
+                "tags": [[tag, None] for tag in rng.sample(TAGS, rng.randint(0, 2))],
+                **dates(index),
+            }
+            if closed:
+                task["finished_date"] = task["modified_date"]
+            self.tasks.append(task)
+
+        self._epics_by_id = {epic["id"]: epic for epic in self.epics}
+        self._stories_by_id = {story["id"]: story for story in self.stories}
+        self._tasks_by_id = {task["id"]: task for task in self.tasks}
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if request.method != "GET":
+            return httpx.Response(405, json={"detail": "Solo lectura"})
+
+        path = request.url.path
+        if not path.startswith(API_PREFIX):
+            return httpx.Response(404, json={"detail": "Not found"})
+        parts = path[len(API_PREFIX) :].strip("/").split("/")
+        params = request.url.params
+
+        resource, identifier = parts[0], parts[1] if len(parts) > 1 else None
+        if resource == "projects":
+            if identifier == "by_slug":
+                matches = params.get("slug") == self.project["slug"]
+                return self._found(self.project if matches else None)
+            if identifier is None:
+                return httpx.Response(200, json=[self.project])
+            if len(parts) == 3 and parts[2] == "tags_colors":
+                return httpx.Response(200, json={tag: "#6c757d" for tag in TAGS})
+            return self._found(self.project if int(identifier) == self.project["id"] else None)
+        if resource == "epics":
+            if identifier is not None:
+                return self._found(self._epics_by_id.get(int(identifier)))
+            return httpx.Response(200, json=self.epics)
+        if resource == "userstories":
+            if identifier is not None:
+                return self._found(self._stories_by_id.get(int(identifier)))
+            return self._list_stories(params)
+        if resource == "tasks":
+            if identifier is not None:
+                return self._found(self._tasks_by_id.get(int(identifier)))
+            return self._list_tasks(params)
+        if resource == "milestones":
+            return httpx.Response(200, json=[])
+        if resource == "users" and identifier == "me":
+            return httpx.Response(200, json={"username": "bench", "full_name": "Benchmark"})
+        return httpx.Response(404, json={"detail": "Not found"})
+
+    @staticmethod
+    def _found(item: Optional[Dict[str, Any]]) -> httpx.Response:
+        if item is None:
+            return httpx.Response(404, json={"detail": "Not found"})
+        return httpx.Response(200, json=item)
+
+    def _list_stories(self, params: httpx.QueryParams) -> httpx.Response:
+        stories = self.stories
+        if "epic" in params:
+            epic_id = int(params["epic"])
+            stories = [s for s in stories if s["epics"] and s["epics"][0]["id"] == epic_id]
+        # Paginado como Taiga: x-pagination-next mientras queden páginas
+        page = int(params.get("page", 1))
+        start = (page - 1) * self.page_size
+        chunk = stories[start : start + self.page_size]
+        headers = {}
+        if start + self.page_size < len(stories):
+            headers["x-pagination-next"] = f"{BASE_URL}userstories?page={page + 1}"
+        return httpx.Response(200, json=chunk, headers=headers)
+
+    def _list_tasks(self, params: httpx.QueryParams) -> httpx.Response:
+        tasks = self.tasks
+        if "user_story" in params:
+            story_id = int(params["user_story"])
+            tasks = [t for t in tasks if t["user_story"] == story_id]
+        return httpx.Response(200, json=tasks)
@@ -0,0 +1,277 @@
+"""
+Suite de benchmarks contra un Taiga simulado en proceso.
+
+Mide la sincronización (`sync_project`) y los endpoints de lectura
+(/project-map, /table-map, /metrics/* y SimpleJSON /query) sobre una base
+SQLite temporal poblada por la propia sincronización. Por escenario reporta
+throughput, latencias p50/p99 y el pico de memoria (tracemalloc, en una
+iteración aparte para no sesgar los tiempos), y emite todo como JSON para
+comparar entre versiones.
+
+Uso:
+    python -m tests.benchmarks.run --stories 200 --tasks 800 --latency-ms 2 \\
+        --iterations 20 --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database import (
+    Base,
+    build_engine,
+    get_db,
+    get_read_db,
+    get_read_session_factory,
+    get_session_factory,
+)
+from app.main import app, get_taiga_client
+from app.render_cache import details_cache, table_map_cache
+from app.sync_service import SyncStats, sync_project
+from app.taiga_client import TaigaClient
+from tests.benchmarks.fake_taiga import BASE_URL, FakeTaiga
+
+METRIC_ENDPOINTS = (
+    "sprint-velocity",
+    "stuck-tasks",
+    "activity-feed",
+    "project-summary",
+    "cycle-time",
+    "lead-time",
+    "time-in-status",
+)
+
+
+@dataclass
+class ScenarioResult:
+    iterations: int
+    total_seconds: float
+    throughput_per_second: float
+    mean_ms: float
+    p50_ms: float
+    p99_ms: float
+    max_ms: float
+    peak_memory_mb: Optional[float]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano sobre valores ya ordenados."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+async def measure(
+    operation: Callable[[], Awaitable[Any]],
+    iterations: int,
+    concurrency: int = 1,
+    memory: bool = True,
+) -> ScenarioResult:
+    """Ejecuta la operación `iterations` veces (en tandas de `concurrency`) y resume."""
+    latencies: List[float] = []
+
+    async def timed() -> None:
+        started = time.perf_counter()
+        await operation()
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    remaining = iterations
+    while remaining > 0:
+        batch = min(concurrency, remaining)
+        await asyncio.gather(*(timed() for _ in range(batch)))
+        remaining -= batch
+    total = time.perf_counter() - started
+
+    peak_memory = None
+    if memory:
+        tracemalloc.start()
+        try:
+            await operation()
+            peak_memory = tracemalloc.get_traced_memory()[1] / 1e6
+        finally:
+            tracemalloc.stop()
+
+    ordered = sorted(latencies)
+    return ScenarioResult(
+        iterations=iterations,
+        total_seconds=round(total, 4),
+        throughput_per_second=round(iterations / total, 2) if total else 0.0,
+        mean_ms=round(sum(ordered) / len(ordered) * 1000, 3),
+        p50_ms=round(percentile(ordered, 50) * 1000, 3),
+        p99_ms=round(percentile(ordered, 99) * 1000, 3),
+        max_ms=round(ordered[-1] * 1000, 3),
+        peak_memory_mb=round(peak_memory, 3) if peak_memory is not None else None,
+    )
+
+
+def _ok(response) -> None:
+    if response.status_code != 200:
+        raise RuntimeError(
+            f"{response.request.url} -> {response.status_code}: {response.text[:200]}"
+        )
+
+
+async def run_benchmarks(
+    epics: int = 10,
+    stories: int = 200,
+    tasks: int = 800,
+    latency_ms: float = 0.0,
+    iterations: int = 20,
+    sync_iterations: int = 3,
+    concurrency: int = 1,
+    memory: bool = True,
+    seed: int = 1,
+) -> Dict[str, Any]:
+    """Corre todos los escenarios y devuelve el reporte (dict serializable a JSON)."""
+    fake = FakeTaiga(epics=epics, stories=stories, tasks=tasks, latency_ms=latency_ms, seed=seed)
+    slug = fake.project["slug"]
+    results: Dict[str, Any] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        taiga_client = TaigaClient(
+            base_url=BASE_URL, auth_token="bench-token", transport=fake.transport()
+        )
+        await taiga_client.start()
+
+        sync_errors: List[str] = []
+
+        async def sync_once() -> None:
+            stats = SyncStats()
+            async with session_factory() as db:
+                await sync_project(db, taiga_client, slug, stats)
+            sync_errors.extend(stats.errors)
+
+        try:
+            # La primera sincronización crea todo; las siguientes actualizan
+            requests_before = fake.requests
+            results["sync_project_initial"] = asdict(await measure(sync_once, 1, memory=memory))
+            results["sync_project_initial"]["upstream_requests"] = fake.requests - requests_before
+            results["sync_project_resync"] = asdict(
+                await measure(sync_once, sync_iterations, memory=memory)
+            )
+            results["sync_errors"] = len(sync_errors)
+
+            async def override_db():
+                async with session_factory() as session:
+                    yield session
+
+            app.dependency_overrides[get_db] = override_db
+            app.dependency_overrides[get_read_db] = override_db
+            app.dependency_overrides[get_session_factory] = lambda: session_factory
+            app.dependency_overrides[get_read_session_factory] = lambda: session_factory
+            app.dependency_overrides[get_taiga_client] = lambda: taiga_client
+
+            transport = ASGITransport(app=app)
+            async with AsyncClient(transport=transport, base_url="http://bench") as http:
+
+                async def get(path: str, **params: Any) -> None:
+                    _ok(await http.get(path, params=params))
+
+                async def table_map() -> None:
+                    # Sin caché de render: se mide análisis + render completos
+                    table_map_cache.clear()
+                    details_cache.clear()
+                    await get("/table-map", project=slug)
+
+                scenarios: Dict[str, Callable[[], Awaitable[None]]] = {
+                    "project_map": lambda: get("/project-map", project=slug),
+                    "table_map": table_map,
+                }
+                for name in METRIC_ENDPOINTS:
+                    scenarios[f"metrics_{name.replace('-', '_')}"] = lambda name=name: get(
+                        f"/metrics/{name}", project=slug
+                    )
+
+                query_body = {
+                    "range": {},
+                    "targets": [
+                        {"target": f"/metrics/{name}?project={slug}", "refId": str(index)}
+                        for index, name in enumerate(METRIC_ENDPOINTS)
+                    ],
+                    "scopedVars": {},
+                }
+
+                async def simple_json_query() -> None:
+                    _ok(await http.post("/query", json=query_body))
+
+                scenarios["simplejson_query"] = simple_json_query
+
+                for name, operation in scenarios.items():
+                    results[name] = asdict(
+                        await measure(operation, iterations, concurrency, memory=memory)
+                    )
+        finally:
+            app.dependency_overrides.clear()
+            await taiga_client.close()
+            await engine.dispose()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": {"epics": epics, "stories": stories, "tasks": tasks, "seed": seed},
+            "latency_ms": latency_ms,
+            "iterations": iterations,
+            "sync_iterations": sync_iterations,
+            "concurrency": concurrency,
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--epics", type=int, default=10)
+    parser.add_argument("--stories", type=int, default=200)
+    parser.add_argument("--tasks", type=int, default=800)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia simulada de Taiga")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--sync-iterations", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="No medir el pico de memoria")
+    parser.add_argument("--output", type=Path, help="Archivo JSON (por defecto stdout)")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(
+        run_benchmarks(
+            epics=args.epics,
+            stories=args.stories,
+            tasks=args.tasks,
+            latency_ms=args.latency_ms,
+            iterations=args.iterations,
+            sync_iterations=args.sync_iterations,
+            concurrency=max(args.concurrency, 1),
+            memory=not args.no_memory,
+            seed=args.seed,
+        )
+    )
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(payload + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(payload + "\n")
+
+
+if __name__ == "__main__":
+    main()
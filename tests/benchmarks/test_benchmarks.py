@@ -0,0 +1,31 @@
+"""
+Smoke test de la suite de benchmarks: una corrida mínima contra el Taiga
+simulado debe sincronizar sin errores y reportar todos los escenarios.
+"""
+
+import pytest
+
+from tests.benchmarks.run import METRIC_ENDPOINTS, run_benchmarks
+
+pytestmark = pytest.mark.benchmark
+
+
+async def test_benchmark_suite_smoke():
+    """Corrida chica: todos los escenarios con sus métricas de latencia y memoria."""
+    report = await run_benchmarks(
+        epics=2, stories=12, tasks=30, iterations=2, sync_iterations=1, memory=True
+    )
+
+    results = report["results"]
+    assert report["meta"]["dataset"] == {"epics": 2, "stories": 12, "tasks": 30, "seed": 1}
+    assert results["sync_errors"] == 0
+    assert results["sync_project_initial"]["upstream_requests"] > 0
+
+    expected = {"project_map", "table_map", "simplejson_query"} | {
+        f"metrics_{name.replace('-', '_')}" for name in METRIC_ENDPOINTS
+    }
+    for name in expected:
+        scenario = results[name]
+        assert scenario["iterations"] == 2
+        assert scenario["p50_ms"] <= scenario["p99_ms"]
+        assert scenario["peak_memory_mb"] is not None
@@ -2,7 +2,10 @@
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
 
+from app.database import Base
 from app.main import app
 
 
@@ -18,3 +21,21 @@ def mock_env_vars(monkeypatch):
     monkeypatch.setenv("TAIGA_BASE_URL", "https://test-taiga.example.com/api/v1/")
     monkeypatch.setenv("TAIGA_AUTH_TOKEN", "test_token_123")
     monkeypatch.setenv("TAIGA_TOKEN_TTL", "3600")
+
+
+@pytest.fixture
+async def db_session():
+    """Sesión sobre una base SQLite en memoria con el esquema completo."""
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+
+    await engine.dispose()
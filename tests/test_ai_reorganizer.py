@@ -0,0 +1,184 @@
+"""Tests para el matcher de keywords y la caché de inferencias del AIReorganizer."""
+
+import random
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app import ai_reorganizer, crud
+from app.ai_reorganizer import MODULE_DEFINITIONS, TAG_WORDS, AIReorganizer, KeywordMatcher
+from app.models import Epic, Project, UserStory
+
+
+def _legacy_infer_module(text: str):
+    """Implementación original (escaneo de substrings por módulo) usada como oráculo."""
+    text_lower = text.lower()
+    scores = {}
+    for module_key, module in MODULE_DEFINITIONS.items():
+        keywords = module["keywords"]
+        matches = sum(1 for keyword in keywords if keyword in text_lower)
+        score = matches / len(keywords) if keywords else 0.0
+        if module_key.lower() in text_lower:
+            score += 0.3
+        scores[module_key] = min(score, 1.0)
+    best = max(scores, key=scores.get)
+    return best, scores[best]
+
+
+def _random_texts(count: int):
+    rng = random.Random(42)
+    vocabulary = [kw for module in MODULE_DEFINITIONS.values() for kw in module["keywords"]]
+    vocabulary += list(TAG_WORDS) + [key.lower() for key in MODULE_DEFINITIONS]
+    vocabulary += ["Como", "quiero", "PARA", "control", "Permiso Empresa", "integ", "x"]
+    for _ in range(count):
+        words = rng.choices(vocabulary, k=rng.randint(0, 12))
+        # Pegar palabras sin espacio a veces para forzar solapamientos
+        yield "".join(word + rng.choice(["", " ", ". "]) for word in words)
+
+
+def test_keyword_matcher_equals_substring_scan():
+    """El matcher encuentra exactamente las keywords que `in` encontraría."""
+    keywords = ["permiso", "permiso empresa", "rol", "control", "e", "integ", "integración"]
+    matcher = KeywordMatcher(keywords)
+
+    for text in ["", "el permiso empresa de control", "integración", "ee", "sin nada"]:
+        assert matcher.find(text) == {kw for kw in keywords if kw in text}
+
+
+def test_module_inference_and_tags_match_legacy_scan():
+    """Scores, desempates y tags son idénticos a la implementación por substrings."""
+    reorganizer = AIReorganizer()
+
+    for text in _random_texts(2000):
+        assert reorganizer._infer_module(text) == _legacy_infer_module(text)
+
+    assert reorganizer._generate_tags("P0: Login del Dashboard API", "D3-authenticar") == [
+        "prioridad:alta",
+        "autenticación",
+        "backend",
+    ]
+
+
+async def test_story_proposals_are_reused_until_content_changes(db_session):
+    """La sync guarda inferencias; el análisis solo recalcula las HU modificadas."""
+    now = datetime.now()
+    project = Project(taiga_id=1, name="Demo", slug="demo", created_date=now, modified_date=now)
+    db_session.add(project)
+    await db_session.flush()
+    stories = [
+        UserStory(
+            taiga_id=10 + i,
+            project_id=project.id,
+            ref=i,
+            subject=subject,
+            created_date=now,
+            modified_date=now,
+        )
+        for i, subject in enumerate(["Login con permiso", "Dashboard de reportes API"])
+    ]
+    db_session.add_all(stories)
+    await db_session.commit()
+    reorganizer = AIReorganizer()
+
+    assert await crud.refresh_story_proposals(db_session, project.id, reorganizer) == 2
+    assert await crud.refresh_story_proposals(db_session, project.id, reorganizer) == 0
+
+    stories[1].subject = "Integración con la API de aduana"
+    await db_session.commit()
+    cached = await crud.get_story_proposals(db_session, project.id, reorganizer.modules_version)
+    analysis = reorganizer.analyze_project([], stories, cached)
+
+    assert analysis["statistics"]["cache"] == {"hits": 1, "misses": 1}
+    assert analysis["proposals"] == reorganizer.analyze_project([], stories)["proposals"]
+    assert await crud.get_story_proposals(db_session, project.id, "otra-version") == {}
+    assert await crud.refresh_story_proposals(db_session, project.id, reorganizer) == 1
+
+
+async def test_tfidf_proposals_score_the_same_corpus_as_the_analysis(db_session):
+    """Con TF-IDF, la sync puntúa las mismas HU que el análisis (sin épicas de gestión)."""
+    pytest.importorskip("scipy")
+    now = datetime.now()
+    project = Project(taiga_id=2, name="Demo", slug="demo", created_date=now, modified_date=now)
+    db_session.add(project)
+    await db_session.flush()
+    epics = [
+        Epic(
+            taiga_id=20 + i,
+            project_id=project.id,
+            ref=i,
+            subject=subject,
+            created_date=now,
+            modified_date=now,
+        )
+        for i, subject in enumerate(["D3 - Autenticación", "Requerimientos VUCE"])
+    ]
+    db_session.add_all(epics)
+    await db_session.flush()
+    subjects = [
+        (epics[0], "Login con SSO de ARCA"),
+        (epics[0], "Alta de empresas con su razón social"),
+        (epics[1], "Relevar requerimientos de reportes y dashboards"),
+        (None, "Notificaciones de operaciones"),
+    ]
+    stories = [
+        UserStory(
+            taiga_id=200 + i,
+            project_id=project.id,
+            ref=10 + i,
+            subject=subject,
+            epic_id=epic.id if epic else None,
+            created_date=now,
+            modified_date=now,
+        )
+        for i, (epic, subject) in enumerate(subjects)
+    ]
+    db_session.add_all(stories)
+    await db_session.commit()
+    reorganizer = AIReorganizer(engine="tfidf")
+
+    assert await crud.refresh_story_proposals(db_session, project.id, reorganizer) == 3
+
+    # Mismos snapshots planos que arma /table-map
+    epic_snapshots = [
+        SimpleNamespace(
+            ref=epic.ref,
+            subject=epic.subject,
+            user_stories=[us for us in stories if us.epic_id == epic.id],
+        )
+        for epic in epics
+    ]
+    orphans = [us for us in stories if us.epic_id is None]
+    cached = await crud.get_story_proposals(db_session, project.id, reorganizer.modules_version)
+    analysis = reorganizer.analyze_project(epic_snapshots, orphans, cached)
+
+    assert analysis["statistics"]["cache"] == {"hits": 3, "misses": 0}
+    fresh = reorganizer.analyze_project(epic_snapshots, orphans)
+    assert analysis["proposals"] == fresh["proposals"]
+    assert reorganizer.confidence_threshold != AIReorganizer().confidence_threshold
+
+
+def test_tfidf_engine_scores_batch_and_falls_back_to_keywords(monkeypatch):
+    """El motor TF-IDF puntúa el lote completo y sin numpy/scipy se usa el de keywords."""
+    pytest.importorskip("scipy")
+    reorganizer = AIReorganizer(engine="tfidf")
+
+    inferred = reorganizer.infer_stories(
+        [
+            ("Alta de empresas con su razón social", "Validar el CUIT y los datos fiscales"),
+            ("Login con SSO", None),
+            ("zzz", None),
+        ]
+    )
+
+    assert [module for module, _, _ in inferred] == [
+        "D3-organizacion",
+        "D3-authenticar",
+        reorganizer._matcher.best("zzz")[0],
+    ]
+    assert reorganizer.modules_version != AIReorganizer(engine="keywords").modules_version
+
+    monkeypatch.setattr(ai_reorganizer, "TFIDF_AVAILABLE", False)
+    assert AIReorganizer(engine="tfidf").engine == "keywords"
+    with pytest.raises(ValueError):
+        AIReorganizer(engine="bert")
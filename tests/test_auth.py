@@ -0,0 +1,54 @@
+"""Tests para el session store y sus backends."""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.auth import CURRENT_SESSION, DatabaseSessionBackend, MemorySessionBackend, SessionStore
+
+
+async def test_database_backend_shares_token_between_workers(db_session):
+    """Un token establecido en un worker es visible en otro que usa la misma tabla."""
+    factory = async_sessionmaker(db_session.bind, expire_on_commit=False)
+    worker_a = SessionStore(DatabaseSessionBackend(factory), cache_seconds=0)
+    worker_b = SessionStore(DatabaseSessionBackend(factory), cache_seconds=0)
+
+    assert await worker_b.get_token() is None
+    await worker_a.set_token("token-1234567890")
+    assert await worker_b.get_token() == "token-1234567890"
+    assert (await worker_b.get_token_info())["is_valid"] is True
+
+    await worker_b.clear()
+    assert await worker_a.has_valid_token() is False
+
+
+async def test_expired_token_is_removed_from_backend():
+    """Un token vencido no se entrega y se borra del backend."""
+    backend = MemorySessionBackend()
+    now = datetime.utcnow()
+    await backend.set(
+        CURRENT_SESSION,
+        {"token": "old", "created_at": now - timedelta(days=2), "expires_at": now - timedelta(1)},
+    )
+    store = SessionStore(backend)
+
+    assert await store.get_token() is None
+    assert await backend.get(CURRENT_SESSION) is None
+
+
+async def test_taiga_client_follows_token_cleared_in_another_worker(monkeypatch):
+    """Si otro worker borró el token, el cliente de este worker deja de usarlo."""
+    from app import main
+    from app.taiga_client import TaigaClient
+
+    store = SessionStore(MemorySessionBackend(), cache_seconds=0)
+    monkeypatch.setattr(main, "session_store", store)
+    client = TaigaClient(base_url="https://taiga.test/api/v1/")
+    monkeypatch.setattr(main.app.state, "taiga_client", client, raising=False)
+
+    await store.set_token("token-compartido")
+    assert (await main.get_taiga_client()).auth_token == "token-compartido"
+
+    await store.clear()
+    assert (await main.get_taiga_client()).auth_token is None
+    assert client.debug_state()["token_cached"] is False
@@ -0,0 +1,71 @@
+"""Tests para las operaciones CRUD de sincronización."""
+
+from sqlalchemy import select
+
+from app import crud
+from app.models import ActivityEvent
+
+
+def _task_payload(**overrides) -> dict:
+    payload = {
+        "id": 501,
+        "ref": 7,
+        "subject": "Endpoint de login",
+        "description": "Primera versión",
+        "status_extra_info": {"name": "New"},
+        "is_closed": False,
+        "version": 1,
+        "assigned_to_extra_info": {"username": "ana"},
+        "owner_extra_info": {"full_name_display": "Ana"},
+        "modified_by_extra_info": {"full_name_display": "Luis"},
+        "created_date": "2025-01-10T10:00:00Z",
+        "modified_date": "2025-01-10T10:00:00Z",
+    }
+    payload.update(overrides)
+    return payload
+
+
+async def test_task_upsert_records_diff_events(db_session):
+    """El upsert registra creación y transiciones de estado en la tabla events."""
+    project = await crud.create_or_update_project(
+        db_session,
+        {"id": 1, "name": "Demo", "slug": "demo", "created_date": "2025-01-01T00:00:00Z"},
+    )
+
+    await crud.create_or_update_task(db_session, _task_payload(), project.id)
+    # Re-sync sin cambios: no genera eventos nuevos
+    await crud.create_or_update_task(db_session, _task_payload(), project.id)
+    await crud.create_or_update_task(
+        db_session,
+        _task_payload(
+            status_extra_info={"name": "In progress"},
+            description="Versión revisada",
+            modified_date="2025-01-11T09:30:00Z",
+        ),
+        project.id,
+    )
+
+    result = await db_session.execute(select(ActivityEvent).order_by(ActivityEvent.id))
+    events = list(result.scalars().all())
+
+    assert [e.event_type for e in events] == ["created", "status_changed"]
+    transition = events[1]
+    assert transition.from_status == "New"
+    assert transition.to_status == "In progress"
+    assert transition.actor == "Luis"
+    assert transition.changes["status_name"] == {"old": "New", "new": "In progress"}
+    assert transition.changes["description"] == {"old_length": 15, "new_length": 16}
+
+
+async def test_task_upsert_normalizes_version_bucket(db_session):
+    """La versión se normaliza a MVP (1) / Post-MVP (2) al guardar, no al leer."""
+    project = await crud.create_or_update_project(
+        db_session,
+        {"id": 1, "name": "Demo", "slug": "demo", "created_date": "2025-01-01T00:00:00Z"},
+    )
+
+    task = await crud.create_or_update_task(db_session, _task_payload(version=None), project.id)
+    assert task.version == 1
+
+    task = await crud.create_or_update_task(db_session, _task_payload(version=7), project.id)
+    assert task.version == 2
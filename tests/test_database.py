@@ -0,0 +1,183 @@
+"""Tests para los perfiles de engine por dialecto."""
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError
+
+from app import database, telemetry
+from app.models import DraftBoard, Epic, Project, Tag, Task, TaskTag, UserStory, UserStoryTag
+
+
+def test_postgres_profile_sizes_pool_and_statement_cache():
+    """PostgreSQL/asyncpg recibe pool dimensionado, pre-ping y caché de statements."""
+    options = database.engine_options("postgresql+asyncpg://user:pass@db/taiga")
+
+    assert options["pool_size"] == database.DB_POOL_SIZE
+    assert options["max_overflow"] == database.DB_MAX_OVERFLOW
+    assert options["pool_pre_ping"] is database.DB_POOL_PRE_PING
+    assert options["connect_args"]["prepared_statement_cache_size"] == (
+        database.DB_STATEMENT_CACHE_SIZE
+    )
+    assert "pool_size" not in database.engine_options("sqlite+aiosqlite:///./x.db")
+
+
+async def test_sqlite_pragmas_applied_on_connect(tmp_path):
+    """Cada conexión SQLite nueva queda en WAL con synchronous=NORMAL y busy_timeout."""
+    engine = database.build_engine(f"sqlite+aiosqlite:///{tmp_path / 'pragmas.db'}")
+    try:
+        async with engine.connect() as conn:
+            journal_mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+            synchronous = (await conn.execute(text("PRAGMA synchronous"))).scalar()
+            busy_timeout = (await conn.execute(text("PRAGMA busy_timeout"))).scalar()
+    finally:
+        await engine.dispose()
+
+    assert journal_mode == "wal"
+    assert synchronous == 1  # NORMAL
+    assert busy_timeout == database.SQLITE_BUSY_TIMEOUT_MS
+    assert "journal_mode" not in database.sqlite_pragmas("sqlite+aiosqlite:///:memory:")
+
+
+async def test_read_only_sqlite_engine_rejects_writes(tmp_path):
+    """El engine de lectura SQLite lee la base pero no puede escribir en ella."""
+    url = f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}"
+    writer = database.build_engine(url)
+    reader = database.build_engine(url, read_only=True)
+    try:
+        async with writer.begin() as conn:
+            await conn.execute(text("CREATE TABLE items (id INTEGER)"))
+            await conn.execute(text("INSERT INTO items VALUES (1)"))
+
+        async with reader.connect() as conn:
+            assert (await conn.execute(text("SELECT count(*) FROM items"))).scalar() == 1
+            with pytest.raises(OperationalError):
+                await conn.execute(text("INSERT INTO items VALUES (2)"))
+    finally:
+        await reader.dispose()
+        await writer.dispose()
+
+
+async def test_pool_metrics_include_read_engine(tmp_path, monkeypatch):
+    """Con DATABASE_READ_URL, el pool del engine de lectura se exporta con engine="read"."""
+    reader = database.build_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(database, "read_engine", reader)
+    try:
+        async with reader.connect():
+            exposition = telemetry.REGISTRY.render()
+            checked_out = telemetry.DB_POOL_CONNECTIONS.value(engine="read", state="checked_out")
+    finally:
+        await reader.dispose()
+
+    assert checked_out == 1
+    assert 'taiga_db_pool_connections{engine="primary",state="size"}' in exposition
+
+
+async def test_schema_check_stamps_fresh_database_and_skips_when_current(tmp_path):
+    """Una base nueva se crea y marca en el head; al reiniciar no se vuelve a crear nada."""
+    engine = database.build_engine(f"sqlite+aiosqlite:///{tmp_path / 'schema.db'}")
+    script = database.alembic_script()
+    try:
+        async with engine.begin() as conn:
+            first, revision = await conn.run_sync(database._prepare_schema, script)
+        async with engine.begin() as conn:
+            second, _ = await conn.run_sync(database._prepare_schema, script)
+            stamped = (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+    finally:
+        await engine.dispose()
+
+    assert (first, second) == ("created", "current")
+    assert revision == tuple(script.get_heads()) == (stamped,)
+
+
+async def test_schema_check_refuses_outdated_database(tmp_path):
+    """Una base bien marcada pero detrás del head no arranca ni se toca su esquema."""
+    engine = database.build_engine(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}")
+    script = database.alembic_script()
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(database._prepare_schema, script)
+            await conn.execute(text("DROP TABLE taiga_response_cache"))
+            await conn.execute(text("UPDATE alembic_version SET version_num = 'b8e4f2a6c1d9'"))
+        async with engine.begin() as conn:
+            with pytest.raises(database.SchemaOutdatedError, match="b8e4f2a6c1d9"):
+                await conn.run_sync(database._prepare_schema, script)
+            assert not await conn.run_sync(
+                lambda sync_conn: inspect(sync_conn).has_table("taiga_response_cache")
+            )
+    finally:
+        await engine.dispose()
+
+    unrelated = database.build_engine(f"sqlite+aiosqlite:///{tmp_path / 'other.db'}")
+    try:
+        async with unrelated.begin() as conn:
+            await conn.execute(text("CREATE TABLE ajena (id INTEGER PRIMARY KEY)"))
+            with pytest.raises(database.SchemaOutdatedError, match="match no migration"):
+                await conn.run_sync(database._prepare_schema, script)
+    finally:
+        await unrelated.dispose()
+
+
+async def test_schema_check_upgrades_database_built_by_create_all(tmp_path):
+    """
+    Una base como las de antes del chequeo (create_all con draft_boards pero
+    marcada en la migración inicial) se marca donde corresponde y se migra.
+    """
+    baseline_tables = [
+        Project.__table__,
+        Epic.__table__,
+        Tag.__table__,
+        UserStory.__table__,
+        Task.__table__,
+        UserStoryTag.__table__,
+        TaskTag.__table__,
+        DraftBoard.__table__,
+    ]
+    engine = database.build_engine(f"sqlite+aiosqlite:///{tmp_path / 'baseline.db'}")
+    script = database.alembic_script()
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(database.Base.metadata.create_all, tables=baseline_tables)
+            for index in (
+                "ix_user_stories_project_created",
+                "ix_user_stories_project_modified",
+                "ix_tasks_project_created",
+                "ix_tasks_project_modified",
+            ):
+                await conn.execute(text(f"DROP INDEX {index}"))
+            await conn.execute(text("ALTER TABLE projects DROP COLUMN data_version"))
+            await conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32))"))
+            await conn.execute(text("INSERT INTO alembic_version VALUES ('fc0a31b11810')"))
+            await conn.execute(
+                text(
+                    "INSERT INTO projects (id, taiga_id, name, slug, is_private, "
+                    "created_date, modified_date, last_synced) "
+                    "VALUES (1, 7, 'Demo', 'demo', 0, '2025-01-01', '2025-01-01', '2025-01-03')"
+                )
+            )
+            await conn.execute(
+                text(
+                    "INSERT INTO user_stories (id, taiga_id, project_id, subject, status_name, "
+                    "is_closed, version, created_date, modified_date, last_synced) "
+                    "VALUES (1, 70, 1, 'Historia', 'Done', 1, 5, '2025-01-01', '2025-01-03', "
+                    "'2025-01-03')"
+                )
+            )
+
+        async with engine.begin() as conn:
+            outcome, revision = await conn.run_sync(database._prepare_schema, script)
+        async with engine.begin() as conn:
+            again, _ = await conn.run_sync(database._prepare_schema, script)
+            stamped = (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+            history = (await conn.execute(text("SELECT count(*) FROM status_history"))).scalar()
+            project = (await conn.execute(text("SELECT data_version FROM projects"))).scalar()
+            version = (await conn.execute(text("SELECT version FROM user_stories"))).scalar()
+            tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+    finally:
+        await engine.dispose()
+
+    assert (outcome, again) == ("upgraded", "current")
+    assert revision == tuple(script.get_heads()) == (stamped,)
+    assert {"events", "status_history", "story_proposals", "auth_sessions"} <= set(tables)
+    assert "taiga_response_cache" in tables
+    # Las migraciones de datos también corrieron: historial inicial y de cierre, versiones
+    assert (history, project, version) == (2, 1, 2)
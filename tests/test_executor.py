@@ -0,0 +1,35 @@
+"""Tests para el executor de etapas CPU-bound y el monitor de lag del event loop."""
+
+import asyncio
+import threading
+import time
+
+from app import executor, telemetry
+
+
+async def test_cpu_bound_stage_runs_off_the_event_loop():
+    """La etapa corre en otro thread y su duración queda registrada por etapa."""
+    before = telemetry.CPU_STAGE_DURATION.count(stage="demo", mode=executor.CPU_EXECUTOR)
+
+    thread_name = await executor.run_cpu_bound("demo", lambda: threading.current_thread().name)
+
+    assert thread_name != threading.current_thread().name
+    assert (
+        telemetry.CPU_STAGE_DURATION.count(stage="demo", mode=executor.CPU_EXECUTOR) == before + 1
+    )
+
+
+async def test_event_loop_lag_monitor_detects_blocking_work():
+    """Un bloqueo síncrono del loop se refleja en el gauge de lag."""
+    monitor = executor.EventLoopLagMonitor(interval=0.01)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)  # bloquea el loop a propósito
+        await asyncio.sleep(0.001)  # deja correr el tick atrasado
+        lag = telemetry.EVENT_LOOP_LAG.value()
+    finally:
+        await monitor.stop()
+
+    assert lag >= 0.05
+    assert telemetry.EVENT_LOOP_LAG_DURATION.count() >= 1
@@ -0,0 +1,64 @@
+"""Smoke test del generador de datos sintéticos (scripts/generate_synthetic_data.py)."""
+
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app import database
+from app.models import StoryProposal
+from scripts.generate_synthetic_data import INSERT_ORDER, generate
+
+END_DATE = datetime(2025, 6, 30)
+
+
+async def _generate(path) -> dict:
+    return await generate(
+        database_url=f"sqlite+aiosqlite:///{path}",
+        projects=1,
+        epics=2,
+        stories=12,
+        tasks=30,
+        tags=5,
+        days=30,
+        seed=7,
+        batch_size=16,
+        end_date=END_DATE,
+    )
+
+
+async def _dump(path) -> dict:
+    """Filas de cada tabla generada, ordenadas por clave primaria."""
+    engine = database.build_engine(f"sqlite+aiosqlite:///{path}")
+    try:
+        async with engine.connect() as conn:
+            tables = {}
+            for model in [*INSERT_ORDER, StoryProposal]:
+                table = model.__table__
+                query = select(table).order_by(*table.primary_key.columns)
+                rows = (await conn.execute(query)).all()
+                tables[table.name] = [tuple(row) for row in rows]
+    finally:
+        await engine.dispose()
+    return tables
+
+
+async def test_generator_writes_requested_volume_deterministically(tmp_path):
+    """Misma semilla y fecha de fin: dos bases idénticas con los volúmenes pedidos."""
+    counts = await _generate(tmp_path / "first.db")
+    again = await _generate(tmp_path / "second.db")
+    first = await _dump(tmp_path / "first.db")
+    second = await _dump(tmp_path / "second.db")
+
+    assert counts == again
+    assert first == second
+
+    assert counts["projects"] == 1
+    assert counts["epics"] == 2
+    assert counts["user_stories"] == 12
+    assert counts["tasks"] == 30
+    assert counts["tags"] == 5
+    assert counts["story_proposals"] == 12
+    # Cada historia y tarea tiene al menos su evento de creación y su estado inicial
+    assert counts["events"] >= 42
+    assert counts["status_history"] >= 42
+    assert {name: len(rows) for name, rows in first.items()} == counts
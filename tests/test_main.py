@@ -29,3 +29,141 @@ def test_health_check():
     """Test de integración básico."""
     # Este test se marca como integración para ejecutarse por separado
     assert True  # Placeholder para tests de integración reales
+
+
+async def test_bulk_tasks_from_markdown_are_created_concurrently():
+    """El proyecto se resuelve una vez, las tareas se crean en paralelo y los tags después."""
+    import asyncio
+    from contextlib import asynccontextmanager, contextmanager
+
+    from httpx import ASGITransport, AsyncClient
+
+    from app.main import app, get_taiga_client
+    from app.taiga_client import TaigaClientError
+
+    class FakeTaiga:
+        def __init__(self):
+            self.calls = {"get_project": 0, "update_task": 0, "batch_invalidation": 0}
+            self.in_flight = self.max_in_flight = 0
+
+        @asynccontextmanager
+        async def batch_invalidation(self):
+            self.calls["batch_invalidation"] += 1
+            yield
+
+        @contextmanager
+        def bypass_response_cache(self):
+            yield
+
+        async def get_project(self, project):
+            self.calls["get_project"] += 1
+            return {"id": 3, "slug": "demo"}
+
+        async def get_user_story(self, user_story_id):
+            return {"id": user_story_id, "version": 1}
+
+        async def update_user_story(self, **kwargs):
+            return {}
+
+        async def create_task(self, project, subject, user_story=None, description=None):
+            assert project == 3
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            if subject == "Tarea 2":
+                raise TaigaClientError("rechazada")
+            number = int(subject.split()[-1])
+            return {"id": number, "ref": number, "subject": subject, "project": project,
+                    "version": 1, "tags": []}
+
+        async def update_task(self, task_id, tags, version):
+            self.calls["update_task"] += 1
+            return {"id": task_id, "ref": task_id, "subject": f"Tarea {task_id}", "project": 3,
+                    "tags": tags}
+
+    markdown = "\n---\n".join(
+        f"### {n}. Tarea {n}\n\n**Componente**: Backend - API\n\n**Descripción**:\nTexto {n}\n"
+        for n in range(1, 6)
+    )
+    fake = FakeTaiga()
+    app.dependency_overrides[get_taiga_client] = lambda: fake
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+            response = await http.post(
+                "/tasks/bulk-from-markdown",
+                json={"markdown": markdown, "project": "demo", "user_story": 88},
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    body = response.json()
+    assert response.status_code == 200
+    assert [task["subject"] for task in body["created_tasks"]] == [
+        "Tarea 1", "Tarea 3", "Tarea 4", "Tarea 5"
+    ]
+    assert body["created_tasks"][0]["tags"] == ["backend", "api"]
+    assert body["errors"] == [{"task_number": 2, "subject": "Tarea 2", "error": "rechazada"}]
+    assert fake.calls == {"get_project": 1, "update_task": 4, "batch_invalidation": 1}
+    assert fake.max_in_flight > 1
+
+
+async def test_bulk_markdown_reads_story_version_from_taiga_not_the_cache(db_session):
+    """Con la caché de respuestas activa, el PATCH de la historia lleva su versión actual."""
+    import json
+
+    import httpx
+    from httpx import ASGITransport, AsyncClient
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    from app.main import app, get_taiga_client
+    from app.response_cache import TaigaResponseCache
+    from app.taiga_client import TaigaClient
+
+    story = {"id": 88, "version": 1, "subject": "Historia"}
+    patched = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/api/v1/")
+        if path == "projects/3":
+            return httpx.Response(200, json={"id": 3, "slug": "demo"})
+        if path == "userstories/88" and request.method == "GET":
+            return httpx.Response(200, json=story)
+        if path == "userstories/88":
+            body = json.loads(request.content)
+            patched.append(body["version"])
+            if body["version"] != story["version"]:
+                return httpx.Response(400, json={"_error_message": "version conflict"})
+            story["version"] += 1
+            return httpx.Response(200, json=story)
+        return httpx.Response(201, json={"id": 1, "ref": 1, "subject": "Tarea 1", "project": 3})
+
+    taiga = TaigaClient(
+        base_url="https://test.example.com/api/v1/",
+        auth_token="token",
+        response_cache=TaigaResponseCache(
+            async_sessionmaker(db_session.bind, expire_on_commit=False), ttl_seconds=60
+        ),
+        transport=httpx.MockTransport(handler),
+    )
+    await taiga.start()
+    app.dependency_overrides[get_taiga_client] = lambda: taiga
+    try:
+        # Una lectura anterior deja la versión 1 en caché; después se edita en Taiga
+        assert (await taiga.get_user_story(88))["version"] == 1
+        story["version"] = 2
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+            response = await http.post(
+                "/tasks/bulk-from-markdown",
+                json={
+                    "markdown": "Diagrama\n## Tareas Propuestas\n### 1. Tarea 1\n",
+                    "project": 3,
+                    "user_story": 88,
+                },
+            )
+    finally:
+        app.dependency_overrides.clear()
+        await taiga.close()
+
+    assert response.status_code == 200
+    assert patched == [2]
@@ -0,0 +1,69 @@
+"""Tests del MarkdownTaskParser (campos y conversión de referencias a links)."""
+
+import random
+import re
+
+from app.markdown_parser import MarkdownTaskParser
+
+BASE = "https://taiga.example.com/project/demo"
+
+
+def _legacy_link(text: str, base: str) -> str:
+    """Los tres reemplazos originales, aplicados en orden (oráculo)."""
+    text = re.sub(
+        r"Tarea (\d+)", lambda m: f"[Tarea #{m.group(1)}]({base}/task/{m.group(1)})", text
+    )
+    text = re.sub(
+        r"(HU|US) #(\d+)", lambda m: f"[{m.group(1)} #{m.group(2)}]({base}/us/{m.group(2)})", text
+    )
+    return re.sub(
+        r"(?<!\w)#(\d+)(?!\w)", lambda m: f"[#{m.group(1)}]({base}/us/{m.group(1)})", text
+    )
+
+
+def test_parse_tasks_extracts_fields():
+    """Cada sección produce título, descripción con links y tags del componente."""
+    markdown = (
+        "# Plan\n\n### 1. Crear endpoint\n\n"
+        "**Componente**: Backend - API\n**Estimación**: 5 puntos\n\n"
+        "**Descripción**:\nExponer el recurso.\nSegunda línea.\n\n"
+        "**Criterios de aceptación**:\n- Responde 200\n* Valida entrada\n\n"
+        "**Dependencias**: Tarea 1, HU #130, Sistema D3\n\n---\n"
+        "### 2. Sin campos\n"
+    )
+    tasks = MarkdownTaskParser("https://taiga.example.com").parse_tasks(markdown, "demo")
+
+    assert [task["subject"] for task in tasks] == ["Crear endpoint", "Sin campos"]
+    assert tasks[0]["tags"] == ["backend", "api"]
+    assert tasks[1] == {"subject": "Sin campos", "description": "", "tags": None}
+    assert tasks[0]["description"] == "\n".join(
+        [
+            "**Componente**: Backend - API",
+            "",
+            "## Descripción",
+            "",
+            "Exponer el recurso.\nSegunda línea.",
+            "",
+            "## Criterios de Aceptación",
+            "",
+            "- Responde 200",
+            "- Valida entrada",
+            "",
+            "## Dependencias",
+            "",
+            f"- [Tarea [#1]({BASE}/us/1)]({BASE}/task/1)",
+            f"- [HU [#130]({BASE}/us/130)]({BASE}/us/130)",
+            "- Sistema D3",
+            "",
+        ]
+    )
+
+
+def test_single_pass_links_match_sequential_replacements():
+    """La pasada única de links produce lo mismo que los tres `re.sub` en orden."""
+    parser = MarkdownTaskParser("https://taiga.example.com")
+    rng = random.Random(7)
+    tokens = ["Tarea ", "HU #", "US #", "#", "1", "23", "x", " ", ",", "_", "(", "Tarea", "á"]
+    for _ in range(3000):
+        text = "".join(rng.choice(tokens) for _ in range(rng.randint(0, 10)))
+        assert parser._convert_to_taiga_link(text, "demo") == _legacy_link(text, BASE), text
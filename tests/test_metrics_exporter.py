@@ -0,0 +1,207 @@
+"""Tests para el exportador de métricas."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.metrics_exporter import MetricsExporter
+from app.models import ActivityEvent, Project, StatusTransition, Task, UserStory
+
+
+async def _seed_project(db, stories: int = 3, tasks_per_story: int = 2) -> Project:
+    now = datetime.now()
+    project = Project(taiga_id=1, name="Demo", slug="demo", created_date=now, modified_date=now)
+    db.add(project)
+    await db.flush()
+
+    for idx in range(stories):
+        created = now - timedelta(hours=10 * (idx + 1))
+        story = UserStory(
+            taiga_id=100 + idx,
+            project_id=project.id,
+            ref=idx + 1,
+            subject=f"Story {idx}",
+            created_date=created,
+            modified_date=created + timedelta(hours=1),
+            raw_data={
+                "owner_extra_info": {"full_name_display": "Ana"},
+                "modified_by_extra_info": {"full_name_display": "Luis"},
+            },
+        )
+        db.add(story)
+        await db.flush()
+        for task_idx in range(tasks_per_story):
+            db.add(
+                Task(
+                    taiga_id=1000 + idx * 10 + task_idx,
+                    project_id=project.id,
+                    user_story_id=story.id,
+                    ref=100 + idx * 10 + task_idx,
+                    subject=f"Task {idx}.{task_idx}",
+                    created_date=created + timedelta(minutes=task_idx + 1),
+                    modified_date=created + timedelta(minutes=task_idx + 1),
+                    raw_data={"owner_extra_info": {"full_name_display": "Eva"}},
+                )
+            )
+    await db.commit()
+    return project
+
+
+async def test_activity_feed_orders_and_limits_in_sql(db_session):
+    """El feed viene ordenado por fecha descendente y respeta el límite."""
+    project = await _seed_project(db_session)
+    exporter = MetricsExporter(db_session)
+
+    activities = await exporter.get_activity_feed(project.id, limit=4, hours=168)
+
+    assert len(activities) == 4
+    timestamps = [a["timestamp"] for a in activities]
+    assert timestamps == sorted(timestamps, reverse=True)
+    assert activities[0]["type"] == "user_story_updated"
+    assert activities[0]["author"] == "Luis"
+    assert activities[0]["description"] == "User Story #1 updated"
+
+
+async def test_activity_feed_keyset_pagination_covers_all_events(db_session):
+    """Paginar con el cursor recorre todos los eventos sin repetir ninguno."""
+    project = await _seed_project(db_session)
+    exporter = MetricsExporter(db_session)
+
+    seen = []
+    cursor = None
+    while True:
+        page = await exporter.get_activity_feed_page(project.id, limit=4, cursor=cursor)
+        seen.extend((a["type"], a["ref"]) for a in page["activities"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    # 3 stories (created + updated) + 6 tasks (created only, never modified)
+    assert len(seen) == 12
+    assert len(set(seen)) == 12
+
+
+async def test_activity_feed_reads_event_log_when_available(db_session):
+    """Con eventos registrados por sync, el feed usa la tabla events."""
+    project = await _seed_project(db_session, stories=1, tasks_per_story=0)
+    now = datetime.now()
+    for idx, status in enumerate(["In progress", "Done"]):
+        db_session.add(
+            ActivityEvent(
+                project_id=project.id,
+                entity_type="task",
+                entity_id=1,
+                entity_taiga_id=1,
+                entity_ref=42,
+                subject="Task 42",
+                event_type="status_changed",
+                changes={"status_name": {"old": None, "new": status}},
+                to_status=status,
+                actor="Eva",
+                occurred_at=now - timedelta(hours=2 - idx),
+            )
+        )
+    await db_session.commit()
+
+    page = await MetricsExporter(db_session).get_activity_feed_page(project.id, limit=1)
+
+    assert page["activities"][0]["type"] == "task_status_changed"
+    assert page["activities"][0]["description"] == "Task #42 moved to Done"
+    assert page["next_cursor"] is not None
+
+
+async def test_activity_feed_keeps_inferred_activity_before_event_log(db_session):
+    """La actividad previa al primer evento registrado se sigue infiriendo y paginando."""
+    project = await _seed_project(db_session)
+    occurred_at = datetime.now() - timedelta(hours=5)
+    db_session.add(
+        ActivityEvent(
+            project_id=project.id,
+            entity_type="user_story",
+            entity_id=1,
+            entity_taiga_id=100,
+            entity_ref=1,
+            subject="Story 0",
+            event_type="updated",
+            changes={"subject": {"old": "Story", "new": "Story 0"}},
+            actor="Eva",
+            occurred_at=occurred_at,
+        )
+    )
+    await db_session.commit()
+    exporter = MetricsExporter(db_session)
+
+    seen = []
+    cursor = None
+    while True:
+        page = await exporter.get_activity_feed_page(project.id, limit=5, cursor=cursor)
+        seen.extend(page["activities"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+        assert len(cursor.split("|")) == 3
+
+    assert seen[0]["type"] == "user_story_updated"
+    assert seen[0]["changes"] == {"subject": {"old": "Story", "new": "Story 0"}}
+    # El evento registrado más los 12 inferidos anteriores a él
+    assert len(seen) == 13
+    assert all("changes" not in activity for activity in seen[1:])
+
+    with pytest.raises(ValueError):
+        await exporter.get_activity_feed_page(
+            project.id, limit=5, cursor=f"{occurred_at.isoformat()}|1"
+        )
+
+
+async def test_flow_metrics_from_status_history(db_session):
+    """Cycle time, lead time y tiempo en estado salen del historial de estados."""
+    project = await _seed_project(db_session, stories=3, tasks_per_story=0)
+    stories = (await db_session.execute(select(UserStory).order_by(UserStory.ref))).scalars().all()
+    start = datetime(2025, 1, 1)
+    for story in stories:
+        story.milestone_name = "Sprint 1"
+        story.created_date = start
+
+    # (días desde start, estado, cerrado) por user story; la tercera es anterior
+    # al historial y sólo tiene registradas las transiciones posteriores
+    histories = [
+        [(0, "New", False), (1, "In progress", False), (3, "Done", True)],
+        [(0, "New", False), (2, "In progress", False), (6, "Done", True)],
+        [(2, "In progress", False), (5, "Done", True)],
+    ]
+    for story, history in zip(stories, histories):
+        for offset, status, closed in history:
+            db_session.add(
+                StatusTransition(
+                    project_id=project.id,
+                    entity_type="user_story",
+                    entity_id=story.id,
+                    to_status=status,
+                    to_closed=closed,
+                    changed_at=start + timedelta(days=offset),
+                )
+            )
+    await db_session.commit()
+    exporter = MetricsExporter(db_session)
+
+    lead = await exporter.get_lead_time(project.id)
+    cycle = await exporter.get_cycle_time(project.id)
+    in_status = await exporter.get_time_in_status(project.id, sprint="Sprint 1")
+
+    assert lead == [
+        {
+            "sprint": "Sprint 1",
+            "items": 3,
+            "avg_days": 4.67,
+            "p50_days": 5.0,
+            "p85_days": 5.7,
+            "p95_days": 5.9,
+        }
+    ]
+    assert cycle[0]["items"] == 3
+    assert cycle[0]["avg_days"] == 3.0
+    by_status = {m["status"]: m for m in in_status}
+    assert set(by_status) == {"New", "In progress"}
+    assert by_status["New"]["avg_hours"] == 36.0
+    assert by_status["In progress"]["p50_hours"] == 72.0
@@ -0,0 +1,72 @@
+"""Tests para el perfilado por request (X-Profile / ?profile=1)."""
+
+from datetime import datetime
+
+from httpx import ASGITransport, AsyncClient
+
+from app import profiling
+from app.auth import session_store
+from app.database import get_db, get_read_db
+from app.main import app
+from app.models import Project
+from app.render_cache import table_map_cache
+
+
+async def test_profiled_request_is_downloadable_as_collapsed_stacks(db_session):
+    """Una request perfilada trae Server-Timing y su perfil se descarga para flamegraph."""
+    now = datetime.now()
+    db_session.add(
+        Project(taiga_id=7, name="Demo", slug="demo", created_date=now, modified_date=now)
+    )
+    await db_session.commit()
+
+    async def override_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_read_db] = override_db
+    table_map_cache.clear()
+    profiling.profile_store.clear()
+    await session_store.set_token("token-profiling")
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+            plain = await http.get("/table-map", params={"project": 7, "stream": True})
+            table_map_cache.clear()
+            profiled = await http.get(
+                "/table-map", params={"project": 7, "stream": True}, headers={"X-Profile": "1"}
+            )
+            profile_id = profiled.headers["x-profile-id"]
+            collapsed = await http.get(f"/debug/profiles/{profile_id}")
+            summary = await http.get(f"/debug/profiles/{profile_id}", params={"format": "json"})
+            listed = await http.get("/debug/profiles")
+
+            await session_store.clear()
+            unauthorized = await http.get("/table-map", params={"project": 7, "profile": "1"})
+    finally:
+        app.dependency_overrides.clear()
+        table_map_cache.clear()
+        await session_store.clear()
+
+    assert "x-profile-id" not in plain.headers
+    assert profiled.status_code == 200
+    assert profiled.text == plain.text
+    assert "sql;dur=" in profiled.headers["server-timing"]
+
+    assert collapsed.headers["content-disposition"].endswith(f'profile-{profile_id}.collapsed"')
+    for line in collapsed.text.splitlines():
+        stack, samples = line.rsplit(" ", 1)
+        assert stack and int(samples) > 0
+
+    spans = summary.json()["spans"]
+    assert spans["sql"]["count"] >= 1
+    assert spans["table_map_context"]["count"] == 1
+    assert [item["id"] for item in listed.json()] == [profile_id]
+    assert unauthorized.status_code == 401
+
+
+def test_profiling_flag_parsing():
+    """Solo valores afirmativos activan el perfil."""
+    assert profiling.profiling_requested({"x-profile": "1"}, {})
+    assert profiling.profiling_requested({}, {"profile": "true"})
+    assert not profiling.profiling_requested({"x-profile": "0"}, {})
+    assert not profiling.profiling_requested({}, {})
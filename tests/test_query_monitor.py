@@ -0,0 +1,103 @@
+"""Tests para el conteo de sentencias SQL por request y la detección de N+1."""
+
+from datetime import datetime
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+
+from app import profiling, query_monitor, telemetry
+from app.database import get_db, get_read_db
+from app.main import app
+from app.models import Project, Task, UserStory
+from app.render_cache import table_map_cache
+
+
+async def test_repeated_statement_shape_is_flagged(db_session):
+    """La misma consulta por fila dentro de un loop se marca; una consulta IN no."""
+    with query_monitor.track() as per_row:
+        for taiga_id in range(12):
+            await db_session.execute(select(Project).where(Project.taiga_id == taiga_id))
+    with query_monitor.track() as batched:
+        await db_session.execute(select(Project).where(Project.taiga_id.in_(range(12))))
+
+    suspects = per_row.suspected_n_plus_one(threshold=10)
+    assert per_row.count == 12
+    assert len(suspects) == 1 and suspects[0][1] == 12
+    assert "projects.taiga_id = ?" in suspects[0][0]
+    assert batched.count == 1 and not batched.suspected_n_plus_one(threshold=10)
+
+
+async def test_statement_feeds_query_stats_and_profile_trace(db_session):
+    """Una sola instrumentación: cada sentencia suma a las QueryStats y al span "sql"."""
+    trace = profiling.RequestTrace()
+    with profiling.collect(trace), query_monitor.track() as stats:
+        await db_session.execute(select(Project))
+
+    assert stats.count == 1 and trace.spans["sql"].count == 1
+    assert trace.seconds("sql") == stats.seconds
+
+
+async def _table_map_statements(http: AsyncClient, taiga_id: int) -> int:
+    table_map_cache.clear()
+    with query_monitor.track() as stats:
+        response = await http.get("/table-map", params={"project": taiga_id})
+    assert response.status_code == 200
+    return stats.count
+
+
+async def test_table_map_statements_do_not_grow_with_stories(db_session, monkeypatch):
+    """/table-map hace la misma cantidad de consultas con 2 o con 12 historias."""
+    now = datetime.now()
+    for taiga_id, stories in ((21, 2), (22, 12)):
+        project = Project(
+            taiga_id=taiga_id,
+            name="Demo",
+            slug=f"demo-{taiga_id}",
+            created_date=now,
+            modified_date=now,
+        )
+        db_session.add(project)
+        await db_session.flush()
+        for index in range(stories):
+            story = UserStory(
+                taiga_id=taiga_id * 100 + index,
+                project_id=project.id,
+                subject=f"Historia {index}",
+                created_date=now,
+                modified_date=now,
+            )
+            db_session.add(story)
+            await db_session.flush()
+            db_session.add(
+                Task(
+                    taiga_id=taiga_id * 1000 + index,
+                    project_id=project.id,
+                    user_story_id=story.id,
+                    subject=f"Tarea {index}",
+                    created_date=now,
+                    modified_date=now,
+                )
+            )
+    await db_session.commit()
+
+    async def override_db():
+        yield db_session
+
+    monkeypatch.setattr(query_monitor, "SQL_DEBUG_HEADERS", True)
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_read_db] = override_db
+    before = telemetry.HTTP_REQUEST_SQL_STATEMENTS.count(route="/table-map")
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+            small = await _table_map_statements(http, 21)
+            large = await _table_map_statements(http, 22)
+            table_map_cache.clear()
+            response = await http.get("/table-map", params={"project": 22})
+    finally:
+        app.dependency_overrides.clear()
+        table_map_cache.clear()
+
+    assert small == large
+    assert int(response.headers["x-sql-queries"]) == large
+    assert "x-sql-n-plus-one" not in response.headers
+    assert telemetry.HTTP_REQUEST_SQL_STATEMENTS.count(route="/table-map") == before + 3
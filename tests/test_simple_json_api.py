@@ -0,0 +1,65 @@
+"""Tests para el adaptador SimpleJSON de Grafana."""
+
+from datetime import datetime
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import simple_json_api
+from app.database import get_read_db, get_read_session_factory
+from app.main import app
+from app.models import Project
+
+
+async def test_query_deduplicates_targets_and_resolves_project_once(db_session, monkeypatch):
+    """Paneles idénticos se calculan una sola vez y el proyecto se resuelve una vez."""
+    now = datetime.now()
+    db_session.add(Project(taiga_id=7, name="Demo", slug="demo", created_date=now, modified_date=now))
+    await db_session.commit()
+
+    calls = {"summary": 0, "resolve": 0}
+    summary_handler = simple_json_api.TARGET_HANDLERS["project-summary"]
+    resolve_project = simple_json_api._resolve_project
+
+    async def counting_summary(exporter, project_id, params):
+        calls["summary"] += 1
+        return await summary_handler(exporter, project_id, params)
+
+    async def counting_resolve(db, identifier):
+        calls["resolve"] += 1
+        return await resolve_project(db, identifier)
+
+    monkeypatch.setitem(simple_json_api.TARGET_HANDLERS, "project-summary", counting_summary)
+    monkeypatch.setattr(simple_json_api, "_resolve_project", counting_resolve)
+
+    async def override_db():
+        yield db_session
+
+    app.dependency_overrides[get_read_db] = override_db
+    app.dependency_overrides[get_read_session_factory] = lambda: async_sessionmaker(
+        db_session.bind, expire_on_commit=False
+    )
+    targets = [
+        {"target": "/metrics/project-summary?project=7", "refId": "A"},
+        {"target": "project-summary", "refId": "B"},
+        {"target": "/metrics/sprint-velocity?project=7", "refId": "C"},
+        {"target": "/metrics/unknown?project=7", "refId": "D"},
+    ]
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+            response = await http.post(
+                "/query",
+                json={
+                    "range": {},
+                    "targets": targets,
+                    "scopedVars": {"project": {"value": "7"}},
+                },
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [r["target"] for r in body] == [t["target"] for t in targets[:3]]
+    assert body[0]["rows"] == body[1]["rows"]
+    assert calls == {"summary": 1, "resolve": 1}
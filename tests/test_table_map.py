@@ -0,0 +1,229 @@
+"""Tests para la caché versionada de /table-map."""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+
+from app import crud, main
+from app.database import get_db, get_read_db
+from app.main import app
+from app.models import Epic, Project, UserStory
+from app.render_cache import details_cache, table_map_cache
+from app.table_map import build_table_map_context, render_table_map
+
+
+async def test_table_map_is_cached_per_data_version(db_session):
+    """Visitas repetidas salen de caché (o 304) hasta que cambia data_version."""
+    now = datetime.now()
+    project = Project(taiga_id=5, name="Demo", slug="demo", created_date=now, modified_date=now)
+    db_session.add(project)
+    await db_session.commit()
+
+    async def override_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_read_db] = override_db
+    table_map_cache.clear()
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+            first = await http.get("/table-map", params={"project": 5})
+            hits = table_map_cache.hits
+            second = await http.get("/table-map", params={"project": 5})
+            served_from_cache = table_map_cache.hits == hits + 1
+            not_modified = await http.get(
+                "/table-map",
+                params={"project": 5},
+                headers={"If-None-Match": first.headers["etag"]},
+            )
+
+            await crud.save_draft_board_state(db_session, project.id, {"columns": []})
+            await db_session.refresh(project)
+            after_save = await http.get("/table-map", params={"project": 5})
+    finally:
+        app.dependency_overrides.clear()
+        table_map_cache.clear()
+
+    assert first.status_code == 200
+    assert second.text == first.text
+    assert served_from_cache
+    assert not_modified.status_code == 304
+    assert after_save.status_code == 200
+    assert after_save.headers["etag"] != first.headers["etag"]
+
+
+async def test_table_map_etag_follows_reorganizer_and_template(db_session, monkeypatch):
+    """Cambiar el motor/módulos del AIReorganizer o la plantilla invalida ETag y caché."""
+    from app import ai_reorganizer, main
+
+    now = datetime.now()
+    db_session.add(
+        Project(taiga_id=8, name="Demo", slug="demo", created_date=now, modified_date=now)
+    )
+    await db_session.commit()
+
+    async def override_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_read_db] = override_db
+    table_map_cache.clear()
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+            first = await http.get("/table-map", params={"project": 8})
+            monkeypatch.setattr(ai_reorganizer, "TAG_RULES_REVISION", 2)
+            new_modules = await http.get(
+                "/table-map",
+                params={"project": 8},
+                headers={"If-None-Match": first.headers["etag"]},
+            )
+            monkeypatch.setattr(main, "table_map_fingerprint", lambda: "next-build")
+            new_build = await http.get("/table-map", params={"project": 8})
+    finally:
+        app.dependency_overrides.clear()
+        table_map_cache.clear()
+
+    assert new_modules.status_code == 200
+    etags = {first.headers["etag"], new_modules.headers["etag"], new_build.headers["etag"]}
+    assert len(etags) == 3
+
+
+async def test_table_map_stream_matches_buffered_render(db_session):
+    """El modo streaming produce el mismo HTML y deja la página en caché."""
+    now = datetime.now()
+    db_session.add(
+        Project(taiga_id=6, name="Demo", slug="demo", created_date=now, modified_date=now)
+    )
+    await db_session.commit()
+
+    async def override_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_read_db] = override_db
+    table_map_cache.clear()
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+            streamed = await http.get("/table-map", params={"project": 6, "stream": True})
+            cached_entries = table_map_cache.stats()["entries"]
+            table_map_cache.clear()
+            buffered = await http.get("/table-map", params={"project": 6})
+    finally:
+        app.dependency_overrides.clear()
+        table_map_cache.clear()
+
+    assert streamed.status_code == 200
+    assert "content-length" not in streamed.headers
+    assert streamed.text == buffered.text
+    assert cached_entries == 1
+
+
+async def test_table_map_stream_sends_shell_before_analysis(monkeypatch):
+    """El primer bloque (cabecera y estadísticas) sale antes de correr el análisis IA."""
+    data = {
+        "project": SimpleNamespace(
+            id=1, taiga_id=9, name="Demo", slug="demo", last_synced=datetime.now()
+        ),
+        "epics": [],
+        "orphan_user_stories": [],
+        "stats": {"epics": 0, "user_stories": 0, "tasks": 0, "tags": 4321},
+        "cached_inferences": {},
+        "draft_state": None,
+        "project_tags": [],
+        "show_token_modal": False,
+    }
+    analyzed = []
+
+    def tracking_context(data):
+        analyzed.append(True)
+        return build_table_map_context(data)
+
+    monkeypatch.setattr(main, "build_table_map_context", tracking_context)
+    pages = []
+    stream = main._stream_table_map(data, on_complete=pages.append)
+
+    first = await stream.__anext__()
+    assert not analyzed
+    assert b"4321" in first
+    assert b"tab-proposal" not in first
+
+    rest = [chunk async for chunk in stream]
+    assert analyzed
+    assert first + b"".join(rest) == render_table_map(data)
+    assert pages == [render_table_map(data)]
+
+
+async def test_story_detail_endpoints_project_and_paginate(db_session):
+    """Los detalles se sirven bajo demanda, con proyección, cursor y ETag."""
+    now = datetime.now()
+    project = Project(taiga_id=8, name="Demo", slug="demo", created_date=now, modified_date=now)
+    db_session.add(project)
+    await db_session.flush()
+    epic = Epic(
+        taiga_id=80,
+        project_id=project.id,
+        ref=1,
+        subject="Epic",
+        created_date=now,
+        modified_date=now,
+    )
+    db_session.add(epic)
+    await db_session.flush()
+    for ref in (2, 3, 4):
+        db_session.add(
+            UserStory(
+                taiga_id=800 + ref,
+                project_id=project.id,
+                epic_id=epic.id,
+                ref=ref,
+                subject=f"US {ref}",
+                description=f"Detalle {ref}",
+                created_date=now,
+                modified_date=now,
+            )
+        )
+    await db_session.commit()
+
+    async def override_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_read_db] = override_db
+    details_cache.clear()
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+            first_page = await http.get(
+                "/projects/8/epics/1/stories", params={"limit": 2, "fields": "ref,subject"}
+            )
+            second_page = await http.get(
+                "/projects/8/epics/1/stories",
+                params={
+                    "limit": 2,
+                    "fields": "ref,subject",
+                    "cursor": first_page.json()["next_cursor"],
+                },
+            )
+            story_id = (
+                await db_session.execute(select(UserStory.id).where(UserStory.ref == 4))
+            ).scalar_one()
+            detail = await http.get(f"/projects/8/stories/{story_id}/details")
+            revalidated = await http.get(
+                f"/projects/8/stories/{story_id}/details",
+                headers={"If-None-Match": detail.headers["etag"]},
+            )
+            bad_fields = await http.get(f"/projects/8/stories/{story_id}/details?fields=nope")
+    finally:
+        app.dependency_overrides.clear()
+        details_cache.clear()
+
+    assert first_page.json() == {
+        "stories": [{"ref": 4, "subject": "US 4"}, {"ref": 3, "subject": "US 3"}],
+        "next_cursor": 3,
+    }
+    assert second_page.json() == {"stories": [{"ref": 2, "subject": "US 2"}], "next_cursor": None}
+    assert detail.json()["description"] == "Detalle 4"
+    assert detail.json()["tasks"] == []
+    assert revalidated.status_code == 304
+    assert bad_fields.status_code == 400
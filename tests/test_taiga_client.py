@@ -2,6 +2,7 @@
 
 import pytest
 
+from app import telemetry
 from app.taiga_client import TaigaClient
 
 
@@ -47,3 +48,107 @@ async def test_client_lifecycle():
     # Test close
     await client.close()
     assert client._client is None
+
+
+async def test_response_cache_shared_between_clients(db_session):
+    """Un segundo cliente (otro worker) lee de la caché; una mutación la invalida."""
+    import httpx
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    from app.response_cache import TaigaResponseCache
+
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append((request.method, request.url.path))
+        if request.method == "PATCH":
+            return httpx.Response(200, json={"id": 7, "subject": "nuevo"})
+        return httpx.Response(200, json=[{"id": 7, "subject": "tarea"}])
+
+    factory = async_sessionmaker(db_session.bind, expire_on_commit=False)
+    clients = []
+    for _ in range(2):
+        client = TaigaClient(
+            base_url="https://test.example.com/api/v1/",
+            auth_token="test_token",
+            response_cache=TaigaResponseCache(factory, ttl_seconds=60),
+            transport=httpx.MockTransport(handler),
+        )
+        await client.start()
+        clients.append(client)
+    first, second = clients
+
+    try:
+        size = telemetry.TAIGA_RESPONSE_SIZE
+        assert await first.list_tasks(project=1) == [{"id": 7, "subject": "tarea"}]
+        await first.response_cache.flush()
+        observed = size.count(method="GET", endpoint="/api/v1/tasks")
+        assert await second.list_tasks(project=1) == [{"id": 7, "subject": "tarea"}]
+        assert len(calls) == 1
+        # La respuesta servida por la caché no viajó desde Taiga: no cuenta en el tamaño
+        assert size.count(method="GET", endpoint="/api/v1/tasks") == observed
+
+        with second.bypass_response_cache():
+            await second.list_tasks(project=1)
+        await second.response_cache.flush()
+        assert len(calls) == 2
+
+        await first.update_task(7, subject="nuevo")
+        await second.list_tasks(project=1)
+        assert calls[-2:] == [("PATCH", "/api/v1/tasks/7"), ("GET", "/api/v1/tasks")]
+    finally:
+        for client in clients:
+            await client.close()
+
+
+async def test_response_cache_invalidates_by_resource_once_per_batch(db_session):
+    """La escritura no bloquea, una mutación borra solo su recurso y un lote borra una vez."""
+    import httpx
+    from sqlalchemy import event, select
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    from app.models import TaigaResponseCacheEntry
+    from app.response_cache import TaigaResponseCache
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "POST":
+            return httpx.Response(201, json={"id": 8, "subject": "nueva"})
+        return httpx.Response(200, json=[{"id": 1}])
+
+    cache = TaigaResponseCache(
+        async_sessionmaker(db_session.bind, expire_on_commit=False), ttl_seconds=60
+    )
+    client = TaigaClient(
+        base_url="https://test.example.com/api/v1/",
+        auth_token="test_token",
+        response_cache=cache,
+        transport=httpx.MockTransport(handler),
+    )
+    await client.start()
+
+    deletes = []
+
+    def count_deletes(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("DELETE FROM taiga_response_cache"):
+            deletes.append(statement)
+
+    sync_engine = db_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", count_deletes)
+    try:
+        await client.list_tasks(project=1)
+        await client.list_epics(project=1)
+        assert set(cache._pending) and await cache.get(next(iter(cache._pending))) is not None
+        await cache.flush()
+        assert not cache._pending
+
+        async with client.batch_invalidation():
+            for index in range(5):
+                await client.create_task(project=1, subject=f"Tarea {index}")
+        assert len(deletes) == 1
+
+        async with db_session.bind.connect() as conn:
+            paths = (await conn.execute(select(TaigaResponseCacheEntry.path))).scalars().all()
+        assert paths == ["epics"]
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", count_deletes)
+        await client.close()
@@ -0,0 +1,152 @@
+"""Tests para la telemetría expuesta en formato Prometheus."""
+
+import asyncio
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
+
+from app import telemetry
+from app.main import RecordRequestMetricsMiddleware
+from app.models import Project, Task, UserStory
+from app.sync_service import SyncStats, sync_project
+from app.taiga_client import TaigaClient
+from tests.benchmarks.fake_taiga import BASE_URL, FakeTaiga
+
+
+def test_histogram_exposition_is_cumulative():
+    """Los buckets se exponen acumulados e incluyen +Inf, suma y conteo."""
+    histogram = telemetry.Histogram("demo_seconds", "Demo.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(3, route="/a")
+
+    lines = list(histogram.samples())
+
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{route="/a"} 3' in lines
+
+
+def test_histogram_summary_estimates_quantiles():
+    """El resumen interpola los cuantiles dentro de los buckets."""
+    histogram = telemetry.Histogram("demo_ms", "Demo.", buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        histogram.observe(value)
+
+    summary = histogram.summary()["all"]
+
+    assert summary["count"] == 4
+    assert summary["mean"] == 1.625
+    assert summary["p50"] == 1.5
+    assert 2.0 < summary["p99"] <= 4.0
+
+
+def test_request_latency_uses_route_template(client: TestClient):
+    """La latencia HTTP se etiqueta con la plantilla de la ruta, no con la URL."""
+    before = telemetry.HTTP_REQUEST_DURATION.count(method="GET", route="/health")
+
+    client.get("/health")
+
+    assert telemetry.HTTP_REQUEST_DURATION.count(method="GET", route="/health") == before + 1
+    assert telemetry.normalize_endpoint("/api/v1/tasks/42") == "/api/v1/tasks/{id}"
+
+
+async def test_request_latency_covers_streamed_body(monkeypatch):
+    """En streaming la latencia se mide hasta el último bloque del cuerpo."""
+    observed = []
+    monkeypatch.setattr(telemetry, "observe_http_request", lambda *args: observed.append(args))
+
+    async def streaming_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"shell", "more_body": True})
+        assert observed == []
+        await asyncio.sleep(0.05)
+        await send({"type": "http.response.body", "body": b"rest"})
+
+    transport = ASGITransport(app=RecordRequestMetricsMiddleware(streaming_app))
+    async with AsyncClient(transport=transport, base_url="http://test") as http:
+        response = await http.get("/stream")
+
+    assert response.text == "shellrest"
+    [(method, route, status_code, seconds)] = observed
+    assert (method, route, status_code) == ("GET", "unmatched", 200)
+    assert seconds >= 0.05
+
+
+async def test_project_snapshot_feeds_gauges(db_session):
+    """El snapshot agrega por proyecto y alimenta los gauges expuestos."""
+    now = datetime.now()
+    project = Project(taiga_id=1, name="Demo", slug="demo", created_date=now, modified_date=now)
+    db_session.add(project)
+    await db_session.flush()
+    db_session.add_all(
+        [
+            UserStory(
+                taiga_id=10,
+                project_id=project.id,
+                ref=1,
+                subject="A",
+                is_closed=True,
+                total_points=3,
+                created_date=now,
+                modified_date=now,
+            ),
+            UserStory(
+                taiga_id=11,
+                project_id=project.id,
+                ref=2,
+                subject="B",
+                is_closed=False,
+                total_points=5,
+                created_date=now,
+                modified_date=now,
+            ),
+            Task(
+                taiga_id=20,
+                project_id=project.id,
+                ref=3,
+                subject="T",
+                is_closed=False,
+                created_date=now,
+                modified_date=now,
+            ),
+        ]
+    )
+    await db_session.commit()
+
+    await telemetry.ProjectSnapshotCache(ttl=60).refresh(db_session)
+    exposition = telemetry.REGISTRY.render()
+
+    assert 'taiga_project_items{project="demo",kind="user_stories",state="closed"} 1' in exposition
+    assert 'taiga_project_items{project="demo",kind="tasks",state="open"} 1' in exposition
+    assert 'taiga_project_story_points{project="demo",state="open"} 5' in exposition
+
+
+async def test_sync_stats_report_where_time_went(db_session):
+    """La sincronización desglosa su tiempo en llamadas a Taiga, crud y fases."""
+    fake = FakeTaiga(epics=2, stories=6, tasks=10)
+    taiga_client = TaigaClient(base_url=BASE_URL, auth_token="token", transport=fake.transport())
+    await taiga_client.start()
+    stats = SyncStats()
+    try:
+        await sync_project(db_session, taiga_client, "bench", stats)
+    finally:
+        await taiga_client.close()
+
+    timings = stats.to_dict()["timings"]
+
+    assert timings["taiga"]["count"] == fake.requests
+    assert timings["taiga"]["bytes"] > 0
+    assert timings["crud.create_or_update_userstory"]["count"] == 6
+    assert timings["crud.create_or_update_task"]["count"] == 10
+    for phase in ("projects", "epics", "userstories", "tasks"):
+        assert f"sync.{phase}" in timings
+    # Los tags son una sub-fase: su tiempo ya está dentro de historias y tareas
+    assert "sync.tags" not in timings
+    for phase in ("userstories", "tasks"):
+        assert timings[f"sync.{phase}.tags"]["count"] == 1
+        assert telemetry.SYNC_SUBPHASE_DURATION.count(phase=phase, subphase="tags") >= 1
+    assert telemetry.SYNC_PHASE_DURATION.count(phase="tags") == 0
+    assert "taiga_crud_operation_duration_seconds" in telemetry.timing_summary()